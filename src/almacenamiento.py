@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import shutil
+import warnings
+
+import numpy as np
+
+# Carpeta de datos del proyecto (junto a regiones.csv y distancias.csv)
+DIRECTORIO_DATOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+ARCHIVO_METADATOS = 'metadatos.json'
+ARCHIVO_DISTANCIAS = 'distancias'
+ARCHIVO_DISTANCIAS_ENRIQUECIDO = 'distancias_regionales_peru_enriquecido'
+# Formatos de las tablas de regiones y distancias, en orden de preferencia
+FORMATOS_TABLAS = {'parquet': '.parquet', 'arrow': '.arrow', 'csv': '.csv'}
+
+def ruta_datos(nombre_archivo):
+    """Ruta absoluta de un archivo dentro de la carpeta de datos"""
+    return os.path.join(DIRECTORIO_DATOS, nombre_archivo)
+
+def rutas_tablas(directorio=None, formato=None):
+    """
+    Rutas de las tablas de regiones y distancias de una carpeta de datos
+    
+    Se usa la tabla de distancias enriquecida si existe y, si no, la básica.
+    Sin formato se elige el primero disponible en FORMATOS_TABLAS (los
+    columnares antes que el CSV, que es más lento de leer), salvo que el CSV
+    de alguna de las dos tablas sea más reciente que su copia columnar: en
+    ese caso se avisa y se usan los CSV, que son la fuente de los datos.
+    
+    Args:
+        directorio: Carpeta con las tablas; por defecto la carpeta data del proyecto
+        formato: 'parquet', 'arrow' o 'csv'; por defecto el primero disponible
+    
+    Returns:
+        tuple: (ruta_regiones, ruta_distancias, usar_enriquecido)
+    
+    Raises:
+        ValueError: Si el formato no existe
+    """
+    if formato is not None and formato not in FORMATOS_TABLAS:
+        raise ValueError(f"Formato de tabla desconocido: {formato}. Opciones: {', '.join(FORMATOS_TABLAS)}")
+    if directorio is None:
+        directorio = DIRECTORIO_DATOS
+    formatos = [formato] if formato is not None else list(FORMATOS_TABLAS)
+    for candidato in formatos:
+        extension = FORMATOS_TABLAS[candidato]
+        regiones_path = os.path.join(directorio, 'regiones' + extension)
+        if not os.path.exists(regiones_path):
+            continue
+        for nombre, enriquecido in ((ARCHIVO_DISTANCIAS_ENRIQUECIDO, True), (ARCHIVO_DISTANCIAS, False)):
+            distancias_path = os.path.join(directorio, nombre + extension)
+            if not os.path.exists(distancias_path):
+                continue
+            if formato is None and candidato != 'csv':
+                desactualizadas = [ruta for ruta in (regiones_path, distancias_path) if _csv_mas_reciente(ruta)]
+                if desactualizadas:
+                    warnings.warn(f"Los CSV son más recientes que {', '.join(map(os.path.basename, desactualizadas))}; "
+                                  f"se leen los CSV (volver a convertirlos con python -m src.tablas {candidato})",
+                                  stacklevel=2)
+                    break
+            return regiones_path, distancias_path, enriquecido
+    # Sin tablas completas: las rutas del último formato, para que el error las indique
+    extension = FORMATOS_TABLAS[formatos[-1]]
+    return (os.path.join(directorio, 'regiones' + extension),
+            os.path.join(directorio, ARCHIVO_DISTANCIAS + extension), False)
+
+def _csv_mas_reciente(ruta):
+    """Indicar si el CSV del que sale una tabla columnar se modificó después que ella"""
+    ruta_csv = os.path.splitext(ruta)[0] + FORMATOS_TABLAS['csv']
+    return os.path.exists(ruta_csv) and os.path.getmtime(ruta_csv) > os.path.getmtime(ruta)
+
+def ruta_precalculo(grafo, nombre_archivo):
+    """
+    Ruta de un archivo precalculado junto a los CSV de origen del grafo
+    
+    Returns:
+        str o None: Ruta en la carpeta de los CSV, o None si el grafo no se
+            cargó desde archivos
+    """
+    fuentes = grafo.graph.get('fuentes')
+    if not fuentes:
+        return None
+    return os.path.join(os.path.dirname(fuentes[0]), nombre_archivo)
+
+def huella_archivos(rutas, tamano_bloque=1 << 20):
+    """
+    Calcular una huella (hash SHA-256) del contenido de varios archivos
+
+    Sirve para saber si los archivos precalculados a partir de los CSV
+    siguen siendo válidos: si cambia cualquiera de los CSV cambia la huella.
+
+    Args:
+        rutas: Lista de rutas de archivos
+        tamano_bloque: Tamaño de los bloques leídos en bytes
+
+    Returns:
+        str: Huella hexadecimal
+    """
+    huella = hashlib.sha256()
+    for ruta in rutas:
+        huella.update(os.path.basename(ruta).encode('utf-8'))
+        with open(ruta, 'rb') as archivo:
+            for bloque in iter(lambda: archivo.read(tamano_bloque), b''):
+                huella.update(bloque)
+    return huella.hexdigest()
+
+def huella_grafo(grafo):
+    """
+    Huella de los archivos fuente de un grafo creado con cargar_datos
+
+    Returns:
+        str o None: Huella de los CSV de origen, o None si el grafo no se
+            cargó desde archivos
+    """
+    fuentes = grafo.graph.get('fuentes')
+    if not fuentes:
+        return None
+    if 'huella' not in grafo.graph:
+        grafo.graph['huella'] = huella_archivos(fuentes)
+    return grafo.graph['huella']
+
+def guardar_arreglos(carpeta, arreglos, metadatos):
+    """
+    Guardar arreglos como archivos .npy de una carpeta, mapeables en memoria
+    
+    La carpeta se escribe primero con otro nombre y después se mueve, para
+    no dejar nunca una carpeta a medias; si ya existía se reemplaza.
+    
+    Args:
+        carpeta: Ruta de la carpeta
+        arreglos: Diccionario {nombre: arreglo de NumPy} (sin objetos de Python)
+        metadatos: Diccionario serializable en JSON
+    """
+    temporal = f'{carpeta}.tmp{os.getpid()}'
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    for nombre, arreglo in arreglos.items():
+        np.save(os.path.join(temporal, nombre + '.npy'), arreglo)
+    with open(os.path.join(temporal, ARCHIVO_METADATOS), 'w', encoding='utf-8') as archivo:
+        json.dump(metadatos, archivo)
+    shutil.rmtree(carpeta, ignore_errors=True)
+    os.replace(temporal, carpeta)
+
+class ArreglosMapeados:
+    """
+    Acceso por nombre a los arreglos de una carpeta escrita con guardar_arreglos
+    
+    Los arreglos se abren mapeados en memoria con copia en escritura: varios
+    procesos que abren la misma carpeta comparten una sola copia física de
+    las páginas, y cada uno puede modificar las suyas sin tocar el archivo.
+    """
+    
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+    
+    def __contains__(self, nombre):
+        return os.path.exists(os.path.join(self.carpeta, nombre + '.npy'))
+    
+    def __getitem__(self, nombre):
+        return np.asarray(np.load(os.path.join(self.carpeta, nombre + '.npy'), mmap_mode='c'))
+
+def abrir_arreglos(carpeta):
+    """
+    Abrir una carpeta escrita con guardar_arreglos
+    
+    Returns:
+        tuple o None: (metadatos, ArreglosMapeados), o None si la carpeta no
+            existe o está incompleta
+    """
+    ruta_metadatos = os.path.join(carpeta, ARCHIVO_METADATOS)
+    if not os.path.exists(ruta_metadatos):
+        return None
+    with open(ruta_metadatos, encoding='utf-8') as archivo:
+        metadatos = json.load(archivo)
+    return metadatos, ArreglosMapeados(carpeta)
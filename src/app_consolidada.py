@@ -6,13 +6,16 @@ import folium
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QComboBox, QPushButton, 
                              QVBoxLayout, QHBoxLayout, QLabel, QWidget, QFileDialog,
                              QSplitter, QMessageBox, QGroupBox, QRadioButton, QCheckBox,
-                             QButtonGroup)
+                             QButtonGroup, QProgressDialog, QSpinBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtWebEngineWidgets import QWebEngineView
 from PyQt5.QtGui import QIcon, QPixmap
 
 # Importar módulos propios
-from .grafo_peru import cargar_datos, encontrar_ruta_mas_corta, obtener_detalles_ruta, verificar_integridad_grafo
+from .cache_rutas import CacheRutas
+from .grafo_peru import (cargar_datos, encontrar_rutas_alternativas, metricas_grafo,
+                         verificar_integridad_grafo)
+from .metricas import METRICA_DISTANCIA
 from .visualizacion_consolidada import (
     generar_mapa_base, generar_mapa_con_ruta, convertir_pillow_a_qpixmap
 )
@@ -24,6 +27,10 @@ class GraphsPeruMapApp(QMainWindow):
         # Configuración
         self.usar_matplotlib = True  # Por defecto usar Matplotlib (más compatible)
         self.solo_adyacentes = True  # Por defecto considerar solo regiones adyacentes
+        self.metodo_busqueda = 'tabla'  # Distancias precalculadas (la red de regiones es pequeña)
+        self.metrica = None  # Métrica que se minimiza (None = distancia en km)
+        self.cache_rutas = CacheRutas(maxsize=256)  # Rutas ya consultadas
+        self.alternativas = []  # Rutas alternativas de la última consulta
         
         # Cargar datos
         self.cargar_datos()
@@ -32,16 +39,27 @@ class GraphsPeruMapApp(QMainWindow):
         self.init_ui()
         
     def cargar_datos(self):
-        """Cargar datos de regiones y distancias"""
+        """Cargar datos de regiones y distancias mostrando el avance de la lectura"""
+        dialogo = QProgressDialog("Cargando regiones y distancias...", None, 0, 100, self)
+        dialogo.setWindowTitle("Cargando datos")
+        dialogo.setWindowModality(Qt.WindowModal)
+        dialogo.setMinimumDuration(500)  # Solo aparece si la carga tarda
+        
+        def actualizar_progreso(leidos, total):
+            dialogo.setValue(int(100 * leidos / total) if total else 100)
+            QApplication.processEvents()
+        
         try:
-            self.df_regiones, self.df_distancias, self.grafo = cargar_datos()
+            self.df_regiones, self.df_distancias, self.grafo = cargar_datos(progreso=actualizar_progreso)
             
             # Lista de regiones para los combobox
             self.regiones_list = list(self.df_regiones['region'])
             
         except Exception as e:
+            dialogo.close()
             QMessageBox.critical(self, "Error al cargar datos", f"No se pudieron cargar los datos: {str(e)}")
             sys.exit(1)
+        dialogo.close()
     
     def init_ui(self):
         """Inicializar la interfaz gráfica"""
@@ -122,6 +140,14 @@ class GraphsPeruMapApp(QMainWindow):
         visualizacion_layout.addWidget(self.rb_folium)
         visualizacion_layout.addWidget(self.cb_solo_adyacentes)
         
+        # Métrica que se minimiza (solo si los datos traen otras además de la distancia)
+        self.metrica_combo = QComboBox()
+        self.metrica_combo.addItems(metricas_grafo(self.grafo))
+        self.metrica_combo.setToolTip("Valor de los tramos que se minimiza al calcular la ruta")
+        self.metrica_combo.setVisible(self.metrica_combo.count() > 1)
+        self.metrica_combo.currentTextChanged.connect(self.cambiar_metrica)
+        visualizacion_layout.addWidget(self.metrica_combo)
+        
         # Conectar señales
         self.rb_matplotlib.toggled.connect(self.cambiar_modo_visualizacion)
         self.rb_folium.toggled.connect(self.cambiar_modo_visualizacion)
@@ -151,6 +177,22 @@ class GraphsPeruMapApp(QMainWindow):
         seleccion_layout.addWidget(self.origen_combo)
         seleccion_layout.addWidget(destino_label)
         seleccion_layout.addWidget(self.destino_combo)
+        
+        # Número de rutas a calcular (1 = solo la más corta)
+        rutas_label = QLabel("Número de rutas:")
+        self.num_rutas_spin = QSpinBox()
+        self.num_rutas_spin.setRange(1, 10)
+        self.num_rutas_spin.setValue(1)
+        self.num_rutas_spin.setToolTip("Calcular también rutas alternativas, de menor a mayor distancia")
+        
+        # Alternativa que se muestra en el mapa
+        self.alternativa_combo = QComboBox()
+        self.alternativa_combo.setEnabled(False)
+        self.alternativa_combo.currentIndexChanged.connect(self.mostrar_alternativa)
+        
+        seleccion_layout.addWidget(rutas_label)
+        seleccion_layout.addWidget(self.num_rutas_spin)
+        seleccion_layout.addWidget(self.alternativa_combo)
         seleccion_group.setLayout(seleccion_layout)
         left_layout.addWidget(seleccion_group)
         
@@ -253,6 +295,19 @@ class GraphsPeruMapApp(QMainWindow):
         """Cambiar entre modos del algoritmo"""
         self.solo_adyacentes = self.cb_solo_adyacentes.isChecked()
     
+    def cambiar_metrica(self, nombre):
+        """Cambiar la métrica que se minimiza (el grafo no se reconstruye)"""
+        self.metrica = None if nombre == METRICA_DISTANCIA else nombre
+        # Las alternativas calculadas con la métrica anterior ya no valen
+        self.limpiar_alternativas()
+    
+    def texto_costo(self, distancia, detalles):
+        """Línea de resumen con la distancia y, si se usa otra métrica, su coste"""
+        if self.metrica is None:
+            return f"Distancia total: {distancia} km"
+        kilometros = detalles.distancia
+        return f"{self.metrica} total: {distancia:g} ({kilometros} km)"
+    
     def generar_mapa_base(self):
         """Generar el mapa base de Perú"""
         try:
@@ -287,11 +342,21 @@ class GraphsPeruMapApp(QMainWindow):
             QMessageBox.warning(self, "Error", "El origen y destino deben ser diferentes")
             return
         
+        if self.num_rutas_spin.value() > 1:
+            self.calcular_alternativas(origen, destino)
+            return
+        self.limpiar_alternativas()
+        
         try:
-            # Usar algoritmo de Dijkstra para encontrar el camino más corto
-            ruta, distancia = encontrar_ruta_mas_corta(
+            # Consultar la tabla de distancias precalculada: la ruta se
+            # reconstruye con los predecesores, sin volver a buscar en el grafo.
+            # Las consultas repetidas se responden desde la caché
+            ruta, distancia, detalles = self.cache_rutas.ruta_con_detalles(
                 self.grafo, origen, destino, 
-                solo_adyacentes=self.solo_adyacentes
+                solo_adyacentes=self.solo_adyacentes,
+                # La tabla precalculada solo sirve para la distancia
+                metodo=self.metodo_busqueda if self.metrica is None else 'dijkstra',
+                metrica=self.metrica
             )
             
             if not ruta:
@@ -302,28 +367,79 @@ class GraphsPeruMapApp(QMainWindow):
                 QMessageBox.warning(self, "Error", mensaje)
                 return
             
-            # Obtener detalles de cada segmento de la ruta
-            detalles = obtener_detalles_ruta(self.grafo, ruta)
+            # Detalles de cada segmento de la ruta
             detalles_ruta = []
             for d in detalles['detalles']:
                 detalles_ruta.append(f"{d['origen']} → {d['destino']}: {d['distancia_km']} km")
             
             # Mostrar información de la ruta
-            info_texto = f"Distancia total: {distancia} km\n\n"
+            info_texto = self.texto_costo(distancia, detalles) + "\n\n"
             info_texto += f"Ruta: {' → '.join(ruta)}\n\n"
             info_texto += "Detalles del recorrido:\n"
             info_texto += "\n".join(detalles_ruta)
             
             self.info_resultado.setText(info_texto)
             
-            # Actualizar el mapa con la ruta
-            self.mostrar_ruta_en_mapa(ruta, detalles['distancias_segmentos'])
+            # Actualizar el mapa con la ruta (los tramos salen del propio resultado)
+            self.mostrar_ruta_en_mapa(detalles)
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al calcular la ruta: {str(e)}")
     
+    def calcular_alternativas(self, origen, destino):
+        """Calcular las k rutas más cortas y mostrar la primera en el mapa"""
+        try:
+            self.alternativas = encontrar_rutas_alternativas(
+                self.grafo, origen, destino, k=self.num_rutas_spin.value(),
+                solo_adyacentes=self.solo_adyacentes, metrica=self.metrica
+            )
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error al calcular las rutas alternativas: {str(e)}")
+            return
+        
+        if not self.alternativas:
+            self.limpiar_alternativas()
+            QMessageBox.warning(self, "Error", "No existe un camino entre las regiones seleccionadas")
+            return
+        
+        # Rellenar el selector sin disparar su señal por cada elemento
+        self.alternativa_combo.blockSignals(True)
+        self.alternativa_combo.clear()
+        for numero, (_, distancia, detalles) in enumerate(self.alternativas, start=1):
+            self.alternativa_combo.addItem(f"Ruta {numero}: {self.texto_costo(distancia, detalles)}")
+        self.alternativa_combo.setEnabled(True)
+        self.alternativa_combo.blockSignals(False)
+        self.alternativa_combo.setCurrentIndex(0)
+        self.mostrar_alternativa(0)
+    
+    def limpiar_alternativas(self):
+        """Vaciar el selector de rutas alternativas"""
+        self.alternativas = []
+        self.alternativa_combo.blockSignals(True)
+        self.alternativa_combo.clear()
+        self.alternativa_combo.setEnabled(False)
+        self.alternativa_combo.blockSignals(False)
+    
+    def mostrar_alternativa(self, indice):
+        """Mostrar en el mapa la alternativa elegida y el resumen de todas"""
+        if not 0 <= indice < len(self.alternativas):
+            return
+        ruta, distancia, detalles = self.alternativas[indice]
+        
+        info_texto = f"Rutas encontradas: {len(self.alternativas)}\n"
+        for numero, (otra, distancia_otra, detalles_otra) in enumerate(self.alternativas, start=1):
+            marca = "▶" if numero - 1 == indice else " "
+            info_texto += (f"{marca} {numero}. {self.texto_costo(distancia_otra, detalles_otra)}: "
+                           f"{' → '.join(otra)}\n")
+        info_texto += f"\nDetalles de la ruta {indice + 1} ({self.texto_costo(distancia, detalles)}):\n"
+        info_texto += "\n".join(f"{d['origen']} → {d['destino']}: {d['distancia_km']} km"
+                                 for d in detalles['detalles'])
+        self.info_resultado.setText(info_texto)
+        
+        self.mostrar_ruta_en_mapa(detalles)
+    
     def mostrar_ruta_en_mapa(self, ruta, distancias_segmentos=None):
-        """Mostrar la ruta en el mapa utilizando el módulo de visualización"""
+        """Mostrar la ruta (lista de regiones o ResultadoRuta) en el mapa utilizando el módulo de visualización"""
         try:
             if self.usar_matplotlib:
                 # Usar Matplotlib (estático)
@@ -41,16 +41,18 @@ class GraphsPeruMapApp(QMainWindow):
             # Crear el grafo
             self.grafo = nx.Graph()
             
-            # Añadir nodos (regiones)
-            for idx, region in self.df_regiones.iterrows():
-                self.grafo.add_node(region['region'], 
-                                    lat=region['latitude'], 
-                                    lon=region['longitude'])
+            # Añadir nodos (regiones) en bloque a partir de las columnas
+            self.grafo.add_nodes_from(
+                (region, {'lat': lat, 'lon': lon})
+                for region, lat, lon in zip(self.df_regiones['region'].tolist(),
+                                            self.df_regiones['latitude'].tolist(),
+                                            self.df_regiones['longitude'].tolist())
+            )
             
-            # Añadir aristas (conexiones entre regiones)
-            for idx, ruta in self.df_distancias.iterrows():
-                self.grafo.add_edge(ruta['origen'], ruta['destino'], 
-                                    weight=ruta['distancia_km'])
+            # Añadir aristas (conexiones entre regiones) en bloque
+            self.grafo.add_weighted_edges_from(zip(self.df_distancias['origen'].tolist(),
+                                                   self.df_distancias['destino'].tolist(),
+                                                   self.df_distancias['distancia_km'].tolist()))
             
             # Lista de regiones para los combobox
             self.regiones_list = list(self.df_regiones['region'])
@@ -296,8 +298,7 @@ class GraphsPeruMapApp(QMainWindow):
         
         try:
             # Usar algoritmo de Dijkstra para encontrar el camino más corto
-            ruta = nx.dijkstra_path(self.grafo, origen, destino, weight='weight')
-            distancia = nx.dijkstra_path_length(self.grafo, origen, destino, weight='weight')
+            distancia, ruta = nx.single_source_dijkstra(self.grafo, origen, destino, weight='weight')
             
             # Obtener detalles de cada segmento de la ruta
             detalles_ruta = []
@@ -0,0 +1,69 @@
+"""
+Coste de las k rutas alternativas frente a búsquedas independientes
+
+En una red vial sintética se comparan, para pares de nodos a unos 300 km:
+    - encontrar_rutas_alternativas (Yen con árbol hacia el destino y Lawler)
+    - el Yen de NetworkX (shortest_simple_paths), que busca cada desvío
+      desde cero
+    - k búsquedas de Dijkstra independientes, como referencia del coste de k
+      consultas sueltas
+
+Uso:
+    python -m src.benchmark_alternativas [num_nodos] [k]
+"""
+import sys
+import time
+from itertools import islice
+
+import networkx as nx
+
+from .benchmark_astar import pares_cercanos
+from .datos_sinteticos import generar_red_vial
+from .grafo_peru import buscar_ruta, crear_grafo, encontrar_rutas_alternativas
+
+NUM_CONSULTAS = 10
+
+def main(num_nodos=100_000, k=10):
+    df_regiones, df_distancias = generar_red_vial(num_nodos)
+    grafo = crear_grafo(df_regiones, df_distancias, motor='csr')
+    grafo_nx = crear_grafo(df_regiones, df_distancias)
+    pares = pares_cercanos(df_regiones, NUM_CONSULTAS)
+    print(f"Red: {grafo.number_of_nodes()} nodos, {grafo.number_of_edges()} aristas; k={k}, "
+          f"{NUM_CONSULTAS} consultas")
+
+    inicio = time.perf_counter()
+    asentados = 0
+    alternativas = []
+    for origen, destino in pares:
+        estadisticas = {}
+        rutas = encontrar_rutas_alternativas(grafo, origen, destino, k, estadisticas=estadisticas)
+        alternativas.append([distancia for _, distancia, _ in rutas])
+        asentados += estadisticas['nodos_asentados']
+    yen = (time.perf_counter() - inicio) * 1000 / len(pares)
+
+    inicio = time.perf_counter()
+    referencia = []
+    for origen, destino in pares:
+        rutas = islice(nx.shortest_simple_paths(grafo_nx, origen, destino, weight='weight'), k)
+        referencia.append([nx.path_weight(grafo_nx, ruta, 'weight') for ruta in rutas])
+    yen_nx = (time.perf_counter() - inicio) * 1000 / len(pares)
+
+    inicio = time.perf_counter()
+    asentados_dijkstra = 0
+    for origen, destino in pares:
+        for _ in range(k):
+            estadisticas = {}
+            buscar_ruta(grafo, origen, destino, estadisticas=estadisticas)
+            asentados_dijkstra += estadisticas['nodos_asentados']
+    independientes = (time.perf_counter() - inicio) * 1000 / len(pares)
+
+    coinciden = alternativas == referencia
+    print(f"{'Yen con árbol y Lawler':>28}: {yen:>9.1f}ms {asentados / len(pares):>10.0f} nodos asentados")
+    print(f"{'Yen de NetworkX':>28}: {yen_nx:>9.1f}ms (mismas distancias: {'sí' if coinciden else 'NO'})")
+    print(f"{f'{k} Dijkstra independientes':>28}: {independientes:>9.1f}ms "
+          f"{asentados_dijkstra / len(pares):>10.0f} nodos asentados")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if argumentos else 100_000,
+         int(argumentos[1]) if len(argumentos) > 1 else 10)
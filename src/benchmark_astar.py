@@ -0,0 +1,85 @@
+"""
+Comparación de Dijkstra, A* y A* bidireccional en una red vial sintética
+
+Para cada método se mide la latencia media y el número medio de nodos
+asentados en dos tipos de consulta: entre extremos opuestos del país
+(como Tacna -> Tumbes) y entre nodos a unos 300 km en línea recta.
+
+Uso:
+    python -m src.benchmark_astar [num_nodos] [motor]
+"""
+import sys
+import time
+
+import numpy as np
+
+from .datos_sinteticos import generar_red_vial
+from .geodesia import distancia_haversine
+from .grafo_peru import METODOS_BUSQUEDA, buscar_ruta, crear_grafo, obtener_cota_haversine
+from .tabla_distancias import MAX_NODOS_TABLA
+
+def pares_sur_norte(df_regiones, num_consultas, semilla=0):
+    """Pares de nodos del extremo sur al extremo norte de la red"""
+    rng = np.random.default_rng(semilla)
+    orden = df_regiones.sort_values('latitude')['region'].to_numpy()
+    decil = max(1, len(orden) // 10)
+    return list(zip(rng.choice(orden[:decil], num_consultas),
+                    rng.choice(orden[-decil:], num_consultas)))
+
+def pares_cercanos(df_regiones, num_consultas, distancia_km=300, semilla=0):
+    """Pares de nodos separados aproximadamente por distancia_km"""
+    rng = np.random.default_rng(semilla)
+    latitudes = df_regiones['latitude'].to_numpy()
+    longitudes = df_regiones['longitude'].to_numpy()
+    nombres = df_regiones['region'].to_numpy()
+    pares = []
+    for origen in rng.choice(len(nombres), num_consultas):
+        separacion = distancia_haversine(latitudes[origen], longitudes[origen], latitudes, longitudes)
+        destino = int(np.argmin(np.abs(separacion - distancia_km)))
+        pares.append((nombres[origen], nombres[destino]))
+    return pares
+
+def medir(grafo, pares):
+    """Imprimir latencia y nodos asentados de cada método para los pares dados"""
+    referencia = None
+    for metodo in METODOS_BUSQUEDA:
+        if metodo == 'tabla' and grafo.number_of_nodes() > MAX_NODOS_TABLA:
+            continue
+        distancias = []
+        asentados = []
+        inicio = time.perf_counter()
+        for origen, destino in pares:
+            estadisticas = {}
+            _, distancia, _ = buscar_ruta(grafo, origen, destino, metodo=metodo,
+                                          estadisticas=estadisticas)
+            distancias.append(distancia)
+            asentados.append(estadisticas['nodos_asentados'])
+        latencia = (time.perf_counter() - inicio) * 1000 / len(pares)
+
+        if referencia is None:
+            referencia = distancias
+        elif distancias != referencia:
+            print(f"¡Advertencia! {metodo} no coincide con Dijkstra")
+
+        media = np.mean(asentados)
+        print(f"{metodo:>20} {latencia:>8.1f}ms {media:>10.0f} "
+              f"{media / grafo.number_of_nodes():>8.1%}")
+
+def main(num_nodos=100_000, motor='csr', num_consultas=10):
+    df_regiones, df_distancias = generar_red_vial(num_nodos)
+    grafo = crear_grafo(df_regiones, df_distancias, motor=motor)
+    cota = obtener_cota_haversine(grafo)
+    print(f"Red: {grafo.number_of_nodes()} nodos, {grafo.number_of_edges()} aristas ({motor})")
+    print(f"Factor de la cota haversine: {cota['factor']:.3f} "
+          f"({len(cota['aristas_por_debajo'])} aristas por debajo)")
+    for titulo, pares in (("Extremo sur -> extremo norte", pares_sur_norte(df_regiones, num_consultas)),
+                          ("Nodos a ~300 km", pares_cercanos(df_regiones, num_consultas))):
+        print(f"\n{titulo}")
+        print(f"{'método':>20} {'latencia':>10} {'asentados':>10} {'fracción':>9}")
+        print("=" * 52)
+        medir(grafo, pares)
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if argumentos else 100_000,
+         argumentos[1] if len(argumentos) > 1 else 'csr')
@@ -0,0 +1,73 @@
+"""
+Pico de memoria y tiempo al cargar un CSV de distancias grande
+
+Escribe una red sintética en una carpeta temporal y la carga en un proceso
+nuevo por cada variante, para que el pico de memoria (RSS máximo) de una no
+afecte a la otra:
+    - completa: cargar_datos, que reúne todas las filas en un DataFrame
+    - bloques: cargar_grafo_por_bloques con distintos tamaños de bloque
+
+Uso:
+    python -m src.benchmark_carga [num_nodos] [motor] (solo Linux)
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from .carga_bloques import cargar_grafo_por_bloques
+from .datos_sinteticos import generar_red_vial
+from .grafo_peru import cargar_datos
+from .memoria import uso_memoria
+
+TAMANOS_BLOQUE = (10_000, 100_000, 1_000_000)
+
+
+def _cargar(directorio, motor, tamano_bloque, cola):
+    """Cargar los datos y enviar los segundos empleados y el pico de memoria"""
+    antes = uso_memoria()['rss']
+    inicio = time.perf_counter()
+    if tamano_bloque is None:
+        cargar_datos(motor=motor, directorio=directorio, usar_instantanea=False)
+    else:
+        cargar_grafo_por_bloques(directorio, motor=motor, tamano_bloque=tamano_bloque)
+    cola.put((time.perf_counter() - inicio, uso_memoria()['pico'] - antes))
+
+
+def medir(directorio, motor, tamano_bloque=None):
+    """Segundos y memoria máxima añadida (bytes) de una carga en un proceso nuevo"""
+    contexto = multiprocessing.get_context('spawn')
+    cola = contexto.Queue()
+    proceso = contexto.Process(target=_cargar, args=(directorio, motor, tamano_bloque, cola))
+    proceso.start()
+    resultado = cola.get()
+    proceso.join()
+    return resultado
+
+
+def main(num_nodos=1_000_000, motor='csr'):
+    if uso_memoria() is None:
+        print("Este benchmark necesita /proc (Linux)")
+        return
+
+    df_regiones, df_distancias = generar_red_vial(num_nodos)
+    with tempfile.TemporaryDirectory() as directorio:
+        df_regiones.to_csv(os.path.join(directorio, 'regiones.csv'), index=False)
+        df_distancias.to_csv(os.path.join(directorio, 'distancias.csv'), index=False)
+        tamano = os.path.getsize(os.path.join(directorio, 'distancias.csv'))
+        print(f"Red: {len(df_regiones)} nodos, {len(df_distancias)} aristas "
+              f"(distancias.csv: {tamano / 2**20:.1f} MB, {motor})")
+        del df_regiones, df_distancias
+
+        print(f"{'variante':>18} {'tiempo':>9} {'pico de memoria':>16}")
+        variantes = [('completa', None)] + [(f'bloques de {tamano_bloque}', tamano_bloque)
+                                            for tamano_bloque in TAMANOS_BLOQUE]
+        for nombre, tamano_bloque in variantes:
+            segundos, pico = medir(directorio, motor, tamano_bloque)
+            print(f"{nombre:>18} {segundos * 1000:>7.0f}ms {pico / 2**20:>13.1f} MB")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if argumentos else 1_000_000,
+         argumentos[1] if len(argumentos) > 1 else 'csr')
@@ -0,0 +1,61 @@
+"""
+Latencia de los cierres y reaperturas de tramos con la tabla de distancias
+
+Para una red sintética con su tabla de distancias precalculada, cierra y
+vuelve a abrir tramos al azar y mide el tiempo de cada actualización (con
+la reparación incremental de la tabla), las filas recalculadas y la
+latencia de la consulta siguiente, comparados con reconstruir la tabla.
+
+Uso:
+    python -m src.benchmark_cierres [num_nodos] [num_cambios]
+"""
+import sys
+import time
+
+import numpy as np
+
+from .cierres_viales import cerrar_tramo, reabrir_tramo
+from .datos_sinteticos import generar_red_vial
+from .grafo_peru import buscar_ruta, crear_grafo, obtener_tabla
+from .tabla_distancias import construir_tabla
+
+def main(num_nodos=2_000, num_cambios=20):
+    df_regiones, df_distancias = generar_red_vial(num_nodos)
+    grafo = crear_grafo(df_regiones, df_distancias, motor='csr')
+
+    inicio = time.perf_counter()
+    obtener_tabla(grafo)
+    construccion = time.perf_counter() - inicio
+    print(f"Red: {grafo.number_of_nodes()} nodos, {grafo.number_of_edges()} aristas")
+    print(f"Construcción completa de la tabla: {construccion * 1000:.0f}ms\n")
+
+    rng = np.random.default_rng(0)
+    tramos = rng.choice(len(df_distancias), num_cambios, replace=False)
+    nombres = df_regiones['region'].to_numpy()
+
+    print(f"{'cambio':>10} {'actualización':>14} {'filas':>7} {'consulta':>10}")
+    print("=" * 44)
+    for operacion in (cerrar_tramo, reabrir_tramo):
+        tiempos, filas, consultas = [], [], []
+        for fila in tramos:
+            origen, destino = df_distancias['origen'].iat[fila], df_distancias['destino'].iat[fila]
+            resultado = operacion(grafo, origen, destino)
+            tiempos.append(resultado['segundos'])
+            filas.append(resultado['filas_reparadas'])
+
+            consulta_origen, consulta_destino = rng.choice(nombres, 2)
+            inicio = time.perf_counter()
+            buscar_ruta(grafo, consulta_origen, consulta_destino, metodo='tabla')
+            consultas.append(time.perf_counter() - inicio)
+
+        print(f"{operacion.__name__.split('_')[0]:>10} {np.mean(tiempos) * 1000:>12.1f}ms "
+              f"{np.mean(filas):>7.0f} {np.mean(consultas) * 1000:>8.3f}ms")
+
+    referencia = construir_tabla(grafo)
+    if not np.array_equal(referencia.distancias, obtener_tabla(grafo).distancias):
+        print("¡Advertencia! La tabla reparada no coincide con la reconstruida")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if argumentos else 2_000,
+         int(argumentos[1]) if len(argumentos) > 1 else 20)
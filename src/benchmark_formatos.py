@@ -0,0 +1,45 @@
+"""
+Tiempo de carga de las tablas en CSV frente a Parquet y Arrow IPC
+
+Escribe una red sintética en CSV en una carpeta temporal, la convierte a los
+formatos columnares con convertir_tablas y mide cargar_datos leyendo cada
+formato (sin instantánea, para medir solo la lectura y la construcción).
+
+Uso:
+    python -m src.benchmark_formatos [num_nodos] [motor] (requiere pyarrow)
+"""
+import os
+import sys
+import tempfile
+import time
+
+from .almacenamiento import FORMATOS_TABLAS
+from .datos_sinteticos import generar_red_vial
+from .grafo_peru import cargar_datos
+from .tablas import convertir_tablas
+
+def medir(motor, directorio, formato):
+    """Segundos que tarda cargar_datos leyendo las tablas del formato dado"""
+    inicio = time.perf_counter()
+    cargar_datos(motor=motor, directorio=directorio, usar_instantanea=False, formato=formato)
+    return time.perf_counter() - inicio
+
+def main(num_nodos=1_000_000, motor='csr'):
+    df_regiones, df_distancias = generar_red_vial(num_nodos)
+    with tempfile.TemporaryDirectory() as directorio:
+        df_regiones.to_csv(os.path.join(directorio, 'regiones.csv'), index=False)
+        df_distancias.to_csv(os.path.join(directorio, 'distancias.csv'), index=False)
+        print(f"Red: {len(df_regiones)} nodos, {len(df_distancias)} aristas ({motor})")
+        del df_regiones, df_distancias
+
+        for formato in ('parquet', 'arrow'):
+            convertir_tablas(directorio, formato)
+        for formato, extension in FORMATOS_TABLAS.items():
+            tamano = os.path.getsize(os.path.join(directorio, 'distancias' + extension))
+            segundos = min(medir(motor, directorio, formato) for _ in range(3))
+            print(f"{formato:>8}: {segundos * 1000:>8.0f}ms (distancias{extension}: {tamano / 2**20:.1f} MB)")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if argumentos else 1_000_000,
+         argumentos[1] if len(argumentos) > 1 else 'csr')
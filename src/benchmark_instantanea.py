@@ -0,0 +1,46 @@
+"""
+Tiempo de arranque leyendo los CSV frente a la instantánea binaria
+
+Escribe una red sintética en una carpeta temporal con el formato de
+regiones.csv y distancias.csv, y mide cargar_datos leyendo los CSV, la
+primera carga (que además compila la instantánea) y las cargas siguientes.
+
+Uso:
+    python -m src.benchmark_instantanea [num_nodos] [motor]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from .datos_sinteticos import generar_red_vial
+from .grafo_peru import cargar_datos
+from .instantanea import ARCHIVO_INSTANTANEA
+
+def medir(motor, directorio, usar_instantanea=True):
+    """Segundos que tarda cargar_datos"""
+    inicio = time.perf_counter()
+    cargar_datos(motor=motor, directorio=directorio, usar_instantanea=usar_instantanea)
+    return time.perf_counter() - inicio
+
+def main(num_nodos=200_000, motor='csr'):
+    df_regiones, df_distancias = generar_red_vial(num_nodos)
+    with tempfile.TemporaryDirectory() as directorio:
+        df_regiones.to_csv(os.path.join(directorio, 'regiones.csv'), index=False)
+        df_distancias.to_csv(os.path.join(directorio, 'distancias.csv'), index=False)
+        print(f"Red: {len(df_regiones)} nodos, {len(df_distancias)} aristas ({motor})")
+
+        csv = medir(motor, directorio, usar_instantanea=False)
+        compilacion = medir(motor, directorio)
+        carpeta = os.path.join(directorio, ARCHIVO_INSTANTANEA)
+        tamano = sum(os.path.getsize(os.path.join(carpeta, archivo)) for archivo in os.listdir(carpeta))
+        instantanea = min(medir(motor, directorio) for _ in range(3))
+
+    print(f"{'CSV':>28}: {csv * 1000:>8.0f}ms")
+    print(f"{'primera carga (compilación)':>28}: {compilacion * 1000:>8.0f}ms")
+    print(f"{'instantánea':>28}: {instantanea * 1000:>8.0f}ms ({tamano / 2**20:.1f} MB)")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if argumentos else 200_000,
+         argumentos[1] if len(argumentos) > 1 else 'csr')
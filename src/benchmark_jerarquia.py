@@ -0,0 +1,73 @@
+"""
+Preprocesamiento y consultas con jerarquías de contracción frente a Dijkstra
+
+Mide el tiempo de preprocesamiento, el tamaño del índice (en memoria y en
+disco) y la latencia media de las consultas de ruta y de solo distancia.
+
+Uso:
+    python -m src.benchmark_jerarquia [num_nodos ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from .busqueda import dijkstra_ruta, vecinos_de
+from .datos_sinteticos import generar_red_vial
+from .grafo_peru import crear_grafo
+from .jerarquia_contraccion import cargar_jerarquia, construir_jerarquia, guardar_jerarquia
+
+def main(tamanos=(1_000, 10_000, 50_000), num_consultas=200):
+    print(f"{'nodos':>7} {'aristas':>8} {'prep.':>8} {'atajos':>8} {'índice':>8} {'archivo':>8} "
+          f"{'carga':>8} {'dijkstra':>9} {'ch ruta':>8} {'ch dist.':>8}")
+    print("=" * 94)
+
+    for num_nodos in tamanos:
+        df_regiones, df_distancias = generar_red_vial(num_nodos)
+        grafo = crear_grafo(df_regiones, df_distancias, motor='csr')
+
+        inicio = time.perf_counter()
+        jerarquia = construir_jerarquia(grafo)
+        preprocesamiento = time.perf_counter() - inicio
+
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'jerarquia.npz')
+            guardar_jerarquia(jerarquia, ruta)
+            tamano_archivo = os.path.getsize(ruta)
+            inicio = time.perf_counter()
+            jerarquia = cargar_jerarquia(ruta)
+            carga = time.perf_counter() - inicio
+
+        rng = np.random.default_rng(1)
+        pares = rng.integers(0, grafo.number_of_nodes(), size=(num_consultas, 2)).tolist()
+        vecinos = vecinos_de(grafo)
+
+        inicio = time.perf_counter()
+        referencia = [dijkstra_ruta(vecinos, origen, destino)[1] for origen, destino in pares]
+        latencia_dijkstra = (time.perf_counter() - inicio) * 1000 / num_consultas
+
+        # La primera consulta prepara las listas de adyacencia; no se cuenta
+        jerarquia.consultar(*pares[0])
+        inicio = time.perf_counter()
+        rutas = [jerarquia.consultar(origen, destino)[1] for origen, destino in pares]
+        latencia_ruta = (time.perf_counter() - inicio) * 1000 / num_consultas
+
+        inicio = time.perf_counter()
+        distancias = [jerarquia.distancia(origen, destino) for origen, destino in pares]
+        latencia_distancia = (time.perf_counter() - inicio) * 1000 / num_consultas
+
+        if rutas != referencia or [d if d is not None else 0 for d in distancias] != referencia:
+            print("¡Advertencia! La jerarquía no coincide con Dijkstra")
+
+        print(f"{grafo.number_of_nodes():>7} {grafo.number_of_edges():>8} {preprocesamiento:>7.1f}s "
+              f"{jerarquia.num_atajos():>8} {jerarquia.nbytes() / 2**20:>6.1f}MB "
+              f"{tamano_archivo / 2**20:>6.1f}MB {carga * 1000:>6.1f}ms {latencia_dijkstra:>7.2f}ms "
+              f"{latencia_ruta:>6.2f}ms {latencia_distancia:>6.2f}ms")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(tuple(int(valor) for valor in sys.argv[1:]))
+    else:
+        main()
@@ -0,0 +1,121 @@
+"""
+Rendimiento de la localización de puntos por polígonos de departamento
+
+Se asigna un departamento a muchos puntos aleatorios sobre el Perú y se
+comparan, en puntos por segundo:
+    - bucle: cada punto se prueba contra los polígonos uno a uno (sobre una
+      muestra, por su lentitud)
+    - por_poligono: shapely.contains_xy vectorizado, una pasada por polígono
+    - strtree: LocalizadorRegiones, una consulta al STRtree con las celdas
+      de una cuadrícula por bloque
+
+Sin archivo de límites se usa una cuadrícula de 5 x 5 departamentos
+sintéticos cuyos lados se subdividen para tener tantos vértices como unos
+límites reales.
+
+Uso:
+    python -m src.benchmark_localizacion [num_puntos] [archivo_limites]
+"""
+import sys
+import time
+
+import numpy as np
+
+from .limites_regiones import LocalizadorRegiones
+
+# Extensión aproximada del Perú (latitud y longitud)
+LATITUDES = (-18.4, -0.04)
+LONGITUDES = (-81.4, -68.7)
+LADO_CUADRICULA = 5
+VERTICES_POR_POLIGONO = 2_000
+MUESTRA_BUCLE = 10_000
+
+
+def poligonos_sinteticos(lado=LADO_CUADRICULA, vertices=VERTICES_POR_POLIGONO):
+    """
+    Cuadrícula de polígonos que cubre la extensión del Perú
+
+    Returns:
+        tuple: (nombres, geometrias)
+    """
+    import shapely
+
+    latitudes = np.linspace(*LATITUDES, lado + 1)
+    longitudes = np.linspace(*LONGITUDES, lado + 1)
+    nombres, cajas = [], []
+    for i in range(lado):
+        for j in range(lado):
+            nombres.append(f"Departamento_{i}_{j}")
+            cajas.append(shapely.box(longitudes[j], latitudes[i], longitudes[j + 1], latitudes[i + 1]))
+    cajas = np.asarray(cajas)
+    # Subdividir los lados para que el test exacto cueste como en un límite real
+    perimetro = shapely.length(cajas[0])
+    return nombres, shapely.segmentize(cajas, perimetro / vertices)
+
+
+def _bucle(geometrias, latitudes, longitudes):
+    """Departamento de cada punto probando los polígonos uno a uno"""
+    import shapely
+
+    ids = np.full(len(latitudes), -1, dtype=np.int64)
+    for k, (latitud, longitud) in enumerate(zip(latitudes.tolist(), longitudes.tolist())):
+        punto = shapely.Point(longitud, latitud)
+        for i, geometria in enumerate(geometrias):
+            if geometria.intersects(punto):
+                ids[k] = i
+                break
+    return ids
+
+
+def _por_poligono(geometrias, latitudes, longitudes):
+    """Departamento de cada punto con una pasada vectorizada por polígono"""
+    import shapely
+
+    ids = np.full(len(latitudes), -1, dtype=np.int64)
+    for i, geometria in enumerate(geometrias):
+        shapely.prepare(geometria)
+        dentro = (ids < 0) & shapely.intersects_xy(geometria, longitudes, latitudes)
+        ids[dentro] = i
+    return ids
+
+
+def main(num_puntos=1_000_000, archivo=None):
+    if archivo is None:
+        nombres, geometrias = poligonos_sinteticos()
+        print(f"Polígonos: cuadrícula sintética de {len(nombres)} departamentos")
+    else:
+        localizador = LocalizadorRegiones.desde_archivo(archivo)
+        nombres, geometrias = localizador.nombres, localizador.geometrias
+        print(f"Polígonos: {len(nombres)} departamentos de {archivo}")
+    rng = np.random.default_rng(1)
+    latitudes = rng.uniform(*LATITUDES, num_puntos)
+    longitudes = rng.uniform(*LONGITUDES, num_puntos)
+    muestra = min(MUESTRA_BUCLE, num_puntos)
+
+    inicio = time.perf_counter()
+    localizador = LocalizadorRegiones(nombres, geometrias)
+    print(f"STRtree construido en {time.perf_counter() - inicio:.3f}s; {num_puntos} puntos aleatorios")
+
+    print(f"{'método':>14} {'puntos':>10} {'tiempo':>10} {'puntos/s':>12}")
+    variantes = (
+        ('bucle', lambda: _bucle(geometrias, latitudes[:muestra], longitudes[:muestra]), muestra),
+        ('por_poligono', lambda: _por_poligono(geometrias, latitudes, longitudes), num_puntos),
+        ('strtree', lambda: localizador.localizar(latitudes, longitudes), num_puntos),
+    )
+    resultados = {}
+    for nombre, funcion, cantidad in variantes:
+        inicio = time.perf_counter()
+        resultados[nombre] = funcion()
+        segundos = time.perf_counter() - inicio
+        print(f"{nombre:>14} {cantidad:>10} {segundos:>9.3f}s {cantidad / segundos:>12,.0f}")
+
+    # Las tres variantes deben asignar los mismos departamentos
+    coinciden = (np.array_equal(resultados['bucle'], resultados['strtree'][:muestra]) and
+                 np.array_equal(resultados['por_poligono'], resultados['strtree']))
+    fuera = np.count_nonzero(resultados['strtree'] < 0)
+    print(f"Resultados iguales: {'sí' if coinciden else 'no'}; puntos fuera de los polígonos: {fuera}")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if argumentos else 1_000_000,
+         argumentos[1] if len(argumentos) > 1 else None)
@@ -0,0 +1,105 @@
+"""
+Memoria por proceso con copias privadas frente a datos compartidos
+
+Escribe una red sintética en una carpeta temporal, compila una vez la
+instantánea y la tabla de distancias, y lanza varios procesos que cargan el
+grafo y la tabla y responden consultas. Cada proceso informa su memoria antes
+y después de cargar los datos, en dos modos:
+    - privado: lee los CSV, construye el grafo de NetworkX y copia la tabla
+      en su propia memoria
+    - compartido: abre la instantánea (GrafoCSR) y la tabla mapeadas en
+      memoria, de modo que todos los procesos usan las mismas páginas
+
+Uso:
+    python -m src.benchmark_memoria [num_nodos] [procesos] (solo Linux)
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+from .datos_sinteticos import generar_red_vial
+from .grafo_peru import cargar_datos, obtener_tabla
+from .memoria import uso_memoria
+
+MODOS = ('privado', 'compartido')
+NUM_CONSULTAS = 1000
+
+
+def _cargar(modo, directorio):
+    """Cargar el grafo y la tabla de distancias como lo haría un proceso del modo dado"""
+    if modo == 'privado':
+        _, _, grafo = cargar_datos(motor='networkx', directorio=directorio, usar_instantanea=False)
+        tabla = obtener_tabla(grafo)
+        tabla.distancias = np.array(tabla.distancias)
+        tabla.predecesores = np.array(tabla.predecesores)
+    else:
+        _, _, grafo = cargar_datos(motor='csr', directorio=directorio)
+        tabla = obtener_tabla(grafo)
+    return grafo, tabla
+
+
+def _trabajador(modo, directorio, cola):
+    """Cargar los datos, recorrer la tabla completa y responder consultas al azar"""
+    antes = uso_memoria()
+    grafo, tabla = _cargar(modo, directorio)
+    # Leer todas las páginas de la tabla para no medir solo las consultadas
+    np.max(tabla.distancias)
+    np.max(tabla.predecesores)
+    generador = random.Random(os.getpid())
+    num_nodos = tabla.number_of_nodes()
+    for _ in range(NUM_CONSULTAS):
+        tabla.consultar(generador.randrange(num_nodos), generador.randrange(num_nodos))
+    cola.put((modo, antes, uso_memoria()))
+
+
+def _mb(bytes_):
+    return f"{bytes_ / 2**20:>8.1f}"
+
+
+def main(num_nodos=3000, procesos=4):
+    if uso_memoria() is None:
+        print("Este benchmark necesita /proc (Linux)")
+        return
+
+    df_regiones, df_distancias = generar_red_vial(num_nodos)
+    # Procesos nuevos, sin heredar las páginas del proceso principal
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directorio:
+        df_regiones.to_csv(os.path.join(directorio, 'regiones.csv'), index=False)
+        df_distancias.to_csv(os.path.join(directorio, 'distancias.csv'), index=False)
+        # Compilar la instantánea y la tabla una sola vez
+        _, _, grafo = cargar_datos(motor='csr', directorio=directorio)
+        tabla = obtener_tabla(grafo)
+        print(f"Red: {len(df_regiones)} nodos, {len(df_distancias)} aristas; "
+              f"tabla de {tabla.nbytes() / 2**20:.1f} MB; {procesos} procesos")
+        del grafo, tabla
+
+        # privada: memoria propia del proceso añadida al cargar los datos
+        print(f"{'modo':>10} {'RSS antes':>10} {'RSS después':>12} {'privada':>9} {'mapeada':>9}  (MB)")
+        for modo in MODOS:
+            cola = contexto.Queue()
+            trabajadores = [contexto.Process(target=_trabajador, args=(modo, directorio, cola))
+                            for _ in range(procesos)]
+            for trabajador in trabajadores:
+                trabajador.start()
+            resultados = [cola.get() for _ in trabajadores]
+            for trabajador in trabajadores:
+                trabajador.join()
+
+            total = 0
+            for _, antes, despues in resultados:
+                privada = despues['privada'] - antes['privada']
+                mapeada = despues['archivos'] + despues['compartida']
+                total += privada
+                print(f"{modo:>10} {_mb(antes['rss']):>10} {_mb(despues['rss']):>12} "
+                      f"{_mb(privada):>9} {_mb(mapeada):>9}")
+            print(f"{'':>10} memoria privada añadida en total: {total / 2**20:.1f} MB")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if argumentos else 3000,
+         int(argumentos[1]) if len(argumentos) > 1 else 4)
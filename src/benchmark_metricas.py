@@ -0,0 +1,75 @@
+"""
+Coste de cambiar la métrica de las búsquedas frente a reconstruir el grafo
+
+En una red sintética con tiempo, peajes y desnivel por tramo se compara,
+para cada métrica:
+    - reconstruir: crear el GrafoCSR con esa columna como peso, lo que
+      habría que hacer si las aristas solo tuvieran un peso
+    - cambiar: preparar los pesos de la métrica en el grafo ya cargado (la
+      primera consulta que la usa); las siguientes no pagan nada
+    - consulta: latencia media de una búsqueda con la métrica ya preparada
+También se compara la memoria de las métricas: arreglos por arista en el
+GrafoCSR frente a los diccionarios de atributos de NetworkX.
+
+Uso:
+    python -m src.benchmark_metricas [num_nodos]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from .datos_sinteticos import generar_red_vial
+from .grafo_peru import buscar_ruta, crear_grafo
+from .metricas import COLUMNAS_METRICAS, METRICA_DISTANCIA
+
+NUM_CONSULTAS = 20
+
+
+def _memoria(funcion):
+    """Memoria reservada (en bytes) por el resultado de una función"""
+    tracemalloc.start()
+    resultado = funcion()
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, memoria
+
+
+def main(num_nodos=200_000):
+    df_regiones, df_distancias = generar_red_vial(num_nodos, metricas=True)
+    grafo = crear_grafo(df_regiones, df_distancias, motor='csr')
+    rng = np.random.default_rng(1)
+    pares = [tuple(par) for par in rng.choice(df_regiones['region'].to_numpy(), size=(NUM_CONSULTAS, 2))]
+    print(f"Red: {grafo.number_of_nodes()} nodos, {grafo.number_of_edges()} aristas")
+
+    metricas = [METRICA_DISTANCIA] + COLUMNAS_METRICAS + [{'distancia_km': 1, 'tiempo_min': 2, 'peaje_soles': 10}]
+    print(f"{'métrica':>40} {'reconstruir':>12} {'cambiar':>10} {'consulta':>10}")
+    for metrica in metricas:
+        if isinstance(metrica, str) and metrica != METRICA_DISTANCIA:
+            inicio = time.perf_counter()
+            crear_grafo(df_regiones, df_distancias.assign(distancia_km=df_distancias[metrica]), motor='csr')
+            reconstruir = f"{(time.perf_counter() - inicio) * 1000:>10.1f}ms"
+        else:
+            reconstruir = f"{'-':>12}"
+
+        inicio = time.perf_counter()
+        grafo.pesos_metrica(metrica)
+        cambiar = (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        for origen, destino in pares:
+            buscar_ruta(grafo, origen, destino, metodo='astar', metrica=metrica)
+        consulta = (time.perf_counter() - inicio) * 1000 / len(pares)
+        print(f"{str(metrica):>40} {reconstruir} {cambiar:>8.1f}ms {consulta:>8.1f}ms")
+
+    columnas = ['origen', 'destino', 'distancia_km']
+    _, sin_metricas = _memoria(lambda: crear_grafo(df_regiones, df_distancias[columnas]))
+    _, con_metricas = _memoria(lambda: crear_grafo(df_regiones, df_distancias))
+    csr_metricas = sum(valores.nbytes for valores in grafo.metricas_aristas.values())
+    print(f"Memoria de {len(COLUMNAS_METRICAS)} métricas: NetworkX "
+          f"{(con_metricas - sin_metricas) / 2**20:.1f} MB, GrafoCSR {csr_metricas / 2**20:.1f} MB")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if argumentos else 200_000)
@@ -0,0 +1,61 @@
+"""
+Comparación de memoria y latencia entre el grafo de NetworkX y el GrafoCSR
+
+Uso:
+    python -m src.benchmark_motores [num_nodos ...]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from .datos_sinteticos import generar_red_vial
+from .grafo_peru import crear_grafo, encontrar_ruta_mas_corta
+
+def medir_construccion(df_regiones, df_distancias, motor):
+    """
+    Construir el grafo midiendo tiempo y memoria reservada
+
+    Returns:
+        tuple: (grafo, segundos, bytes_reservados)
+    """
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    grafo = crear_grafo(df_regiones, df_distancias, motor=motor)
+    segundos = time.perf_counter() - inicio
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return grafo, segundos, memoria
+
+def medir_consultas(grafo, pares):
+    """
+    Latencia media (en milisegundos) de encontrar_ruta_mas_corta
+    """
+    inicio = time.perf_counter()
+    for origen, destino in pares:
+        encontrar_ruta_mas_corta(grafo, origen, destino)
+    return (time.perf_counter() - inicio) * 1000 / len(pares)
+
+def main(tamanos=(1_000, 10_000, 100_000), num_consultas=20):
+    print(f"{'nodos':>8} {'aristas':>8} {'motor':>9} {'construcción':>13} "
+          f"{'memoria':>10} {'consulta':>10}")
+    print("=" * 64)
+
+    for num_nodos in tamanos:
+        df_regiones, df_distancias = generar_red_vial(num_nodos)
+        rng = np.random.default_rng(1)
+        nombres = df_regiones['region'].to_numpy()
+        pares = [tuple(par) for par in rng.choice(nombres, size=(num_consultas, 2))]
+
+        for motor in ('networkx', 'csr'):
+            grafo, segundos, memoria = medir_construccion(df_regiones, df_distancias, motor)
+            latencia = medir_consultas(grafo, pares)
+            print(f"{grafo.number_of_nodes():>8} {grafo.number_of_edges():>8} {motor:>9} "
+                  f"{segundos:>12.3f}s {memoria / 2**20:>8.1f}MB {latencia:>8.2f}ms")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(tuple(int(valor) for valor in sys.argv[1:]))
+    else:
+        main()
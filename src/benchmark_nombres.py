@@ -0,0 +1,92 @@
+"""
+Memoria y coste de los nombres de las regiones: textos frente a tabla común
+
+En una red sintética grande se compara:
+    - columnas: memoria de region, origen y destino como texto frente a
+      categóricas sobre una sola tabla de nombres (ver codificar_nombres)
+    - índices: diccionarios nombre -> ID de cada estructura (grafo, tabla de
+      distancias, jerarquía e índice de adyacencia) frente a la TablaNombres
+      compartida por todas
+    - comparación: filtrar las aristas que salen de una región comparando
+      textos o códigos enteros
+    - carga: crear el GrafoCSR desde las columnas de texto o ya codificadas
+
+Uso:
+    python -m src.benchmark_nombres [num_nodos]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from .datos_sinteticos import generar_red_vial
+from .grafo_peru import codificar_nombres, crear_grafo_csr
+from .nombres import TablaNombres
+
+NUM_CONSULTAS = 20
+# Estructuras que guardaban su propio diccionario de nombres
+NUM_ESTRUCTURAS = 4
+
+
+def _memoria(funcion):
+    """Memoria reservada (en bytes) por el resultado de una función"""
+    tracemalloc.start()
+    resultado = funcion()
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, memoria
+
+
+def _memoria_columnas(df_regiones, df_distancias):
+    """Memoria de las columnas de nombres, contando una vez las categorías compartidas"""
+    columnas = [df_regiones['region'], df_distancias['origen'], df_distancias['destino']]
+    if not isinstance(columnas[0].dtype, pd.CategoricalDtype):
+        return sum(columna.memory_usage(deep=True, index=False) for columna in columnas)
+    codigos = sum(columna.cat.codes.nbytes for columna in columnas)
+    return codigos + columnas[0].cat.categories.memory_usage(deep=True)
+
+
+def _tiempo(funcion, repeticiones=1):
+    """Tiempo medio de una función (en ms)"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) * 1000 / repeticiones
+
+
+def main(num_nodos=300_000):
+    df_regiones, df_distancias = generar_red_vial(num_nodos)
+    # Columnas de objetos de Python, como las lee pandas 2 de un CSV
+    df_regiones = df_regiones.astype({'region': object})
+    df_distancias = df_distancias.astype({'origen': object, 'destino': object})
+    print(f"Red: {len(df_regiones)} regiones, {len(df_distancias)} aristas")
+
+    inicio = time.perf_counter()
+    regiones_codificadas, distancias_codificadas = codificar_nombres(df_regiones, df_distancias)
+    codificar = (time.perf_counter() - inicio) * 1000
+    texto = _memoria_columnas(df_regiones, df_distancias)
+    categorias = _memoria_columnas(regiones_codificadas, distancias_codificadas)
+    print(f"Columnas de nombres: texto {texto / 2**20:.1f} MB, categóricas {categorias / 2**20:.1f} MB "
+          f"(codificar: {codificar:.0f} ms)")
+
+    grafo = crear_grafo_csr(regiones_codificadas, distancias_codificadas)
+    _, diccionario = _memoria(lambda: TablaNombres(grafo.nombres).indices)
+    print(f"Índices nombre -> ID: {NUM_ESTRUCTURAS} diccionarios {NUM_ESTRUCTURAS * diccionario / 2**20:.1f} MB, "
+          f"tabla compartida {diccionario / 2**20:.1f} MB")
+
+    rng = np.random.default_rng(1)
+    nombres = rng.choice(grafo.nombres, size=NUM_CONSULTAS).tolist()
+    for etiqueta, columna in (('texto', df_distancias['origen']), ('categórica', distancias_codificadas['origen'])):
+        milisegundos = _tiempo(lambda: [(columna == nombre).sum() for nombre in nombres]) / len(nombres)
+        print(f"Filtrar aristas por origen ({etiqueta}): {milisegundos:.2f} ms por región")
+
+    for etiqueta, (regiones, distancias) in (('texto', (df_regiones, df_distancias)),
+                                            ('categóricas', (regiones_codificadas, distancias_codificadas))):
+        print(f"Crear GrafoCSR desde columnas {etiqueta}: "
+              f"{_tiempo(lambda: crear_grafo_csr(regiones, distancias)):.0f} ms")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if argumentos else 300_000)
@@ -0,0 +1,73 @@
+"""
+Memoria de los resultados de rutas: diccionarios por tramo frente a ResultadoRuta
+
+En una red sintética se calculan rutas por lotes entre pares aleatorios y se
+compara la memoria que ocupan los resultados guardados:
+    - listas: la ruta como lista de nombres (encontrar_rutas_lote)
+    - diccionarios: además, los detalles de cada tramo en el formato de
+      diccionarios de obtener_detalles_ruta
+    - compactos: ResultadoRuta con los IDs y la distancia de cada tramo
+      (compactas=True), cuyos detalles se construyen al pedirlos
+y el tiempo de cálculo del lote en cada caso.
+
+Uso:
+    python -m src.benchmark_resultados [num_nodos] [num_pares]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from .datos_sinteticos import generar_red_vial
+from .grafo_peru import crear_grafo
+from .rutas_lote import encontrar_rutas_lote
+
+NUM_ORIGENES = 10
+
+
+def _medir(funcion):
+    """Tiempo (s) y memoria reservada (bytes) por el resultado de una función"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, segundos, memoria
+
+
+def main(num_nodos=50_000, num_pares=5_000):
+    df_regiones, df_distancias = generar_red_vial(num_nodos)
+    grafo = crear_grafo(df_regiones, df_distancias, motor='csr')
+    rng = np.random.default_rng(1)
+    nombres = df_regiones['region'].to_numpy()
+    # Lote típico de una matriz origen-destino: pocos orígenes y muchos destinos
+    origenes = rng.choice(nombres, size=NUM_ORIGENES)
+    pares = list(zip(rng.choice(origenes, size=num_pares).tolist(), rng.choice(nombres, size=num_pares).tolist()))
+    print(f"Red: {grafo.number_of_nodes()} nodos; {num_pares} rutas desde {NUM_ORIGENES} orígenes, en un proceso")
+
+    def listas():
+        return list(encontrar_rutas_lote(grafo, pares, procesos=1))
+
+    def diccionarios():
+        resultados = []
+        for origen, destino, ruta, distancia in encontrar_rutas_lote(grafo, pares, procesos=1, compactas=True):
+            detalles = ruta.a_diccionario() if ruta is not None else None
+            resultados.append((origen, destino, ruta.ruta if ruta is not None else None, distancia, detalles))
+        return resultados
+
+    def compactos():
+        return list(encontrar_rutas_lote(grafo, pares, procesos=1, compactas=True))
+
+    print(f"{'resultado':>14} {'tiempo':>10} {'memoria':>10} {'por ruta':>10}")
+    for nombre, funcion in (('listas', listas), ('diccionarios', diccionarios), ('compactos', compactos)):
+        resultados, segundos, memoria = _medir(funcion)
+        print(f"{nombre:>14} {segundos:>9.2f}s {memoria / 2**20:>8.1f}MB {memoria / len(resultados):>8.0f} B")
+    nodos = np.mean([len(ruta) for _, _, ruta, _ in resultados if ruta is not None])
+    print(f"Nodos por ruta: {nodos:.0f}")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if argumentos else 50_000,
+         int(argumentos[1]) if len(argumentos) > 1 else 5_000)
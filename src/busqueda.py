@@ -0,0 +1,544 @@
+import heapq
+import math
+
+import numpy as np
+
+from .geodesia import distancia_haversine, haversine_escalar
+from .grafo_csr import GrafoCSR
+from .metricas import atributo_arista, normalizar_metrica
+
+
+def vecinos_de(grafo, metrica=None):
+    """
+    Obtener una función que enumera los vecinos de un nodo
+
+    Para un grafo de NetworkX los nodos son sus nombres; para un GrafoCSR
+    son los IDs enteros.
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        metrica: Métrica usada como peso: None (la distancia), nombre de una
+            métrica o combinación lineal {nombre: coeficiente}
+
+    Returns:
+        function: vecinos(u) que devuelve pares (v, peso)
+
+    Raises:
+        KeyError: Si alguna métrica no existe en un GrafoCSR (en NetworkX
+            el error aparece al recorrer la primera arista sin ella)
+    """
+    if isinstance(grafo, GrafoCSR):
+        offsets = grafo.offsets
+        destinos = grafo.destinos
+        pesos = grafo.pesos_metrica(metrica)
+
+        def vecinos(u):
+            inicio, fin = offsets[u], offsets[u + 1]
+            return zip(destinos[inicio:fin].tolist(), pesos[inicio:fin].tolist())
+        return vecinos
+
+    # Diccionario de adyacencia interno de NetworkX: evita el coste de
+    # las vistas de solo lectura en el bucle principal de la búsqueda
+    adyacencia = grafo._adj
+    combinacion = [(atributo_arista(nombre), coeficiente)
+                   for nombre, coeficiente in normalizar_metrica(metrica)]
+    if len(combinacion) == 1 and combinacion[0][1] == 1:
+        peso = combinacion[0][0]
+
+        def vecinos(u):
+            return [(v, datos[peso]) for v, datos in adyacencia[u].items()]
+    else:
+        def vecinos(u):
+            return [(v, sum(coeficiente * datos[atributo] for atributo, coeficiente in combinacion))
+                    for v, datos in adyacencia[u].items()]
+
+    return vecinos
+
+
+def dijkstra_ruta(vecinos, origen, destino, estadisticas=None):
+    """
+    Algoritmo de Dijkstra en una sola pasada
+
+    Además de la ruta y la distancia total, guarda el peso de la arista por
+    la que se llegó a cada nodo, de modo que las distancias de cada tramo
+    se obtienen sin volver a consultar el grafo.
+
+    Args:
+        vecinos: Función vecinos(u) que devuelve pares (v, peso)
+        origen: Nodo de origen
+        destino: Nodo de destino
+        estadisticas: Diccionario opcional donde se guarda 'nodos_asentados'
+
+    Returns:
+        tuple: (ruta, distancia, segmentos) donde segmentos es la lista de
+            distancias de cada tramo, o (None, 0, []) si no existe camino
+    """
+    # Distancias definitivas y provisionales; previos guarda (nodo, peso)
+    visitados = {}
+    distancias = {origen: 0}
+    previos = {origen: None}
+    cola = [(0, 0, origen)]
+    # Contador de desempate para no comparar nodos de tipos distintos
+    contador = 1
+    extraer = heapq.heappop
+    insertar = heapq.heappush
+
+    while cola:
+        distancia, _, u = extraer(cola)
+        if u in visitados:
+            continue
+        visitados[u] = distancia
+        if u == destino:
+            break
+
+        for v, peso in vecinos(u):
+            if v in visitados:
+                continue
+            nueva = distancia + peso
+            if v not in distancias or nueva < distancias[v]:
+                distancias[v] = nueva
+                previos[v] = (u, peso)
+                insertar(cola, (nueva, contador, v))
+                contador += 1
+
+    if estadisticas is not None:
+        estadisticas['nodos_asentados'] = len(visitados)
+
+    if destino not in visitados:
+        return None, 0, []
+
+    ruta, segmentos = _reconstruir(previos, destino)
+    return ruta, visitados[destino], segmentos
+
+
+def arbol_caminos_minimos(vecinos, origen, num_nodos, objetivos=None, limite=None, con_tramos=False):
+    """
+    Dijkstra completo desde un origen sobre nodos con IDs enteros
+
+    Args:
+        vecinos: Función vecinos(u) que devuelve pares (v, peso)
+        origen: ID del nodo de origen
+        num_nodos: Número de nodos del grafo
+        objetivos: IDs opcionales de los nodos que interesan; la búsqueda se
+            detiene en cuanto todos están asentados, así que solo sus
+            distancias (y las de los nodos ya asentados) son definitivas
+        limite: Distancia máxima opcional; los nodos más lejanos se tratan
+            como inalcanzables
+        con_tramos: Si es True se guarda también el peso de la arista por la
+            que se llega a cada nodo, de modo que los tramos de cualquier ruta
+            del árbol se leen sin volver a consultar el grafo
+
+    Returns:
+        tuple: (distancias, predecesores) como arreglos de NumPy; la
+            distancia de los nodos inalcanzables es inf y su predecesor -1.
+            Con con_tramos, (distancias, predecesores, tramos), con tramo 0
+            en la raíz y en los nodos inalcanzables
+    """
+    distancias = [math.inf] * num_nodos
+    predecesores = [-1] * num_nodos
+    tramos = [0] * num_nodos if con_tramos else None
+    cerrados = [False] * num_nodos
+    pendientes = set(objetivos) if objetivos is not None else None
+    limite = math.inf if limite is None else limite
+    distancias[origen] = 0
+    cola = [(0, origen)]
+    extraer = heapq.heappop
+    insertar = heapq.heappush
+
+    while cola:
+        distancia, u = extraer(cola)
+        if cerrados[u]:
+            continue
+        if distancia > limite:
+            break
+        cerrados[u] = True
+        if pendientes is not None:
+            pendientes.discard(u)
+            if not pendientes:
+                break
+        for v, peso in vecinos(u):
+            nueva = distancia + peso
+            if nueva < distancias[v]:
+                distancias[v] = nueva
+                predecesores[v] = u
+                if tramos is not None:
+                    tramos[v] = peso
+                insertar(cola, (nueva, v))
+
+    distancias = np.array(distancias, dtype=np.float64)
+    predecesores = np.array(predecesores, dtype=np.int64)
+    if limite < math.inf:
+        # Descartar las distancias provisionales que superan el límite
+        lejanos = distancias > limite
+        distancias[lejanos] = math.inf
+        predecesores[lejanos] = -1
+    if tramos is None:
+        return distancias, predecesores
+    tramos = np.array(tramos)
+    if limite < math.inf:
+        tramos[lejanos] = 0
+    return distancias, predecesores, tramos
+
+
+def alcance_acotado(vecinos, origenes, limite, estadisticas=None):
+    """
+    Dijkstra desde varios orígenes a la vez, detenido en una distancia máxima
+
+    Todos los orígenes entran en la cola con distancia 0, así que cada nodo
+    se asienta una sola vez con la distancia a su origen más cercano. Solo
+    se guardan los nodos alcanzados, de modo que el coste depende del
+    tamaño de la zona y no del grafo.
+
+    Args:
+        vecinos: Función vecinos(u) que devuelve pares (v, peso)
+        origenes: Lista de nodos de origen
+        limite: Distancia máxima (incluida)
+        estadisticas: Diccionario opcional donde se guarda 'nodos_asentados'
+
+    Returns:
+        tuple: (nodos, distancias, fuentes) en orden de distancia creciente,
+            donde fuentes es la posición en origenes del origen más cercano
+            a cada nodo
+    """
+    distancias = {}
+    fuentes = {}
+    cola = [(0, i, origen, i) for i, origen in enumerate(origenes)]
+    heapq.heapify(cola)
+    # Contador de desempate para no comparar nodos de tipos distintos
+    contador = len(cola)
+    extraer = heapq.heappop
+    insertar = heapq.heappush
+    nodos = []
+    asentadas = []
+    origen_de = []
+
+    while cola:
+        distancia, _, u, fuente = extraer(cola)
+        if distancia > limite:
+            break
+        if u in fuentes:
+            continue
+        fuentes[u] = fuente
+        nodos.append(u)
+        asentadas.append(distancia)
+        origen_de.append(fuente)
+
+        for v, peso in vecinos(u):
+            if v in fuentes:
+                continue
+            nueva = distancia + peso
+            if nueva <= limite and (v not in distancias or nueva < distancias[v]):
+                distancias[v] = nueva
+                insertar(cola, (nueva, contador, v, fuente))
+                contador += 1
+
+    if estadisticas is not None:
+        estadisticas['nodos_asentados'] = len(nodos)
+    return nodos, asentadas, origen_de
+
+
+def ruta_desde_predecesores(predecesores, origen, destino):
+    """
+    Reconstruir una ruta recorriendo un árbol de predecesores
+
+    Args:
+        predecesores: Arreglo de predecesores de un árbol con raíz en origen
+            (-1 para la raíz y los nodos inalcanzables)
+        origen: ID del nodo raíz
+        destino: ID del nodo final
+
+    Returns:
+        list o None: IDs de la ruta de origen a destino, o None si el
+            destino no está en el árbol
+    """
+    ruta = [destino]
+    while ruta[-1] != origen:
+        anterior = predecesores[ruta[-1]].item()
+        if anterior < 0:
+            return None
+        ruta.append(anterior)
+    ruta.reverse()
+    return ruta
+
+
+def astar_ruta(vecinos, origen, destino, heuristica, estadisticas=None):
+    """
+    Algoritmo A* guiado por una cota inferior de la distancia al destino
+
+    Un nodo puede volver a expandirse si se encuentra un camino más corto
+    hacia él, por lo que el resultado es exacto con cualquier heurística
+    admisible aunque no sea consistente (por ejemplo, cuando algunos nodos
+    no tienen coordenadas y su cota es 0).
+
+    Args:
+        vecinos: Función vecinos(u) que devuelve pares (v, peso)
+        origen: Nodo de origen
+        destino: Nodo de destino
+        heuristica: Función h(u) con una cota inferior de la distancia u -> destino
+        estadisticas: Diccionario opcional donde se guarda 'nodos_asentados'
+
+    Returns:
+        tuple: (ruta, distancia, segmentos), o (None, 0, []) si no existe camino
+    """
+    distancias = {origen: 0}
+    previos = {origen: None}
+    cola = [(heuristica(origen), 0, 0, origen)]
+    contador = 1
+    asentados = 0
+    encontrado = False
+    extraer = heapq.heappop
+    insertar = heapq.heappush
+
+    while cola:
+        _, _, distancia, u = extraer(cola)
+        # Entrada obsoleta: ya se llegó a u por un camino más corto
+        if distancia > distancias[u]:
+            continue
+        asentados += 1
+        if u == destino:
+            encontrado = True
+            break
+
+        for v, peso in vecinos(u):
+            nueva = distancia + peso
+            if v not in distancias or nueva < distancias[v]:
+                distancias[v] = nueva
+                previos[v] = (u, peso)
+                insertar(cola, (nueva + heuristica(v), contador, nueva, v))
+                contador += 1
+
+    if estadisticas is not None:
+        estadisticas['nodos_asentados'] = asentados
+
+    if not encontrado:
+        return None, 0, []
+
+    ruta, segmentos = _reconstruir(previos, destino)
+    return ruta, distancias[destino], segmentos
+
+
+def astar_bidireccional_ruta(vecinos, origen, destino, potencial=None, estadisticas=None):
+    """
+    A* bidireccional con potenciales promediados
+
+    Se avanza a la vez desde el origen y desde el destino. Con el potencial
+    p(v) = (h_destino(v) - h_origen(v)) / 2 ambas búsquedas usan costes
+    reducidos no negativos y la búsqueda termina cuando la suma de las
+    claves mínimas de ambas colas alcanza la mejor distancia encontrada.
+    Sin potencial se comporta como un Dijkstra bidireccional.
+
+    El grafo debe ser no dirigido y el potencial consistente.
+
+    Args:
+        vecinos: Función vecinos(u) que devuelve pares (v, peso)
+        origen: Nodo de origen
+        destino: Nodo de destino
+        potencial: Función p(v) o None
+        estadisticas: Diccionario opcional donde se guarda 'nodos_asentados'
+
+    Returns:
+        tuple: (ruta, distancia, segmentos), o (None, 0, []) si no existe camino
+    """
+    if origen == destino:
+        if estadisticas is not None:
+            estadisticas['nodos_asentados'] = 1
+        return [origen], 0, []
+
+    if potencial is None:
+        potencial = lambda v: 0
+    signos = (1, -1)
+    distancias = ({origen: 0}, {destino: 0})
+    previos = ({origen: None}, {destino: None})
+    cerrados = (set(), set())
+    colas = ([(potencial(origen), 0, origen)], [(-potencial(destino), 0, destino)])
+    contador = 1
+    mejor = math.inf
+    encuentro = None
+    extraer = heapq.heappop
+    insertar = heapq.heappush
+
+    while colas[0] and colas[1]:
+        if colas[0][0][0] + colas[1][0][0] >= mejor:
+            break
+
+        # Avanzar por el lado con la menor clave
+        lado = 0 if colas[0][0][0] <= colas[1][0][0] else 1
+        otro = 1 - lado
+        _, _, u = extraer(colas[lado])
+        if u in cerrados[lado]:
+            continue
+        cerrados[lado].add(u)
+        distancia = distancias[lado][u]
+
+        for v, peso in vecinos(u):
+            nueva = distancia + peso
+            if v not in distancias[lado] or nueva < distancias[lado][v]:
+                distancias[lado][v] = nueva
+                previos[lado][v] = (u, peso)
+                insertar(colas[lado], (nueva + signos[lado] * potencial(v), contador, v))
+                contador += 1
+            if v in distancias[otro]:
+                total = distancias[lado][v] + distancias[otro][v]
+                if total < mejor:
+                    mejor = total
+                    encuentro = v
+
+    if estadisticas is not None:
+        estadisticas['nodos_asentados'] = len(cerrados[0]) + len(cerrados[1])
+
+    if encuentro is None:
+        return None, 0, []
+
+    ruta, segmentos = _reconstruir(previos[0], encuentro)
+    ruta_final, segmentos_finales = _reconstruir(previos[1], encuentro)
+    ruta += ruta_final[::-1][1:]
+    segmentos += segmentos_finales[::-1]
+    return ruta, mejor, segmentos
+
+
+def _reconstruir(previos, destino):
+    """Reconstruir la ruta y sus tramos a partir del diccionario de previos"""
+    ruta = [destino]
+    segmentos = []
+    while previos[ruta[-1]] is not None:
+        anterior, peso = previos[ruta[-1]]
+        segmentos.append(peso)
+        ruta.append(anterior)
+    ruta.reverse()
+    segmentos.reverse()
+    return ruta, segmentos
+
+
+def coordenadas_de(grafo):
+    """
+    Obtener una función que devuelve (lat, lon) de un nodo, o None si no tiene
+    """
+    if isinstance(grafo, GrafoCSR):
+        latitudes = grafo.lat.tolist()
+        longitudes = grafo.lon.tolist()
+
+        def coordenadas(u):
+            lat, lon = latitudes[u], longitudes[u]
+            if lat != lat or lon != lon:  # NaN
+                return None
+            return lat, lon
+    else:
+        nodos = grafo._node
+
+        def coordenadas(u):
+            datos = nodos[u]
+            lat, lon = datos.get('lat'), datos.get('lon')
+            if lat is None or lon is None or lat != lat or lon != lon:
+                return None
+            return lat, lon
+
+    return coordenadas
+
+
+def heuristica_haversine(grafo, objetivo, factor=1.0):
+    """
+    Construir la heurística de distancia de círculo máximo hacia un nodo
+
+    Con un GrafoCSR la cota se calcula de una vez para todos los nodos con
+    NumPy; con NetworkX se calcula bajo demanda y se guarda en caché.
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        objetivo: Nodo hacia el que se estima la distancia
+        factor: Factor de escala (<= 1) que garantiza que ninguna arista
+            sea más corta que la cota, ver verificar_cota_haversine
+
+    Returns:
+        function: h(u) con la cota inferior en km (0 si faltan coordenadas)
+    """
+    coordenadas = coordenadas_de(grafo)
+    punto_objetivo = coordenadas(objetivo)
+    if punto_objetivo is None:
+        return lambda u: 0
+    lat_objetivo, lon_objetivo = punto_objetivo
+
+    if isinstance(grafo, GrafoCSR):
+        return cotas_haversine(grafo, objetivo, factor).tolist().__getitem__
+
+    cache = {}
+
+    def heuristica(u):
+        valor = cache.get(u)
+        if valor is None:
+            punto = coordenadas(u)
+            valor = 0 if punto is None else factor * haversine_escalar(
+                punto[0], punto[1], lat_objetivo, lon_objetivo)
+            cache[u] = valor
+        return valor
+
+    return heuristica
+
+
+def cotas_haversine(grafo, objetivo, factor=1.0):
+    """
+    Cota de círculo máximo de todos los nodos de un GrafoCSR hacia un nodo
+
+    Args:
+        grafo: GrafoCSR
+        objetivo: ID del nodo hacia el que se estima la distancia
+        factor: Factor de escala de la cota
+
+    Returns:
+        np.ndarray: Cota en km por nodo (0 donde faltan coordenadas)
+    """
+    cotas = factor * distancia_haversine(grafo.lat, grafo.lon,
+                                         grafo.lat[objetivo], grafo.lon[objetivo])
+    return np.nan_to_num(cotas, nan=0.0)
+
+
+def verificar_cota_haversine(grafo):
+    """
+    Comprobar que ninguna arista es más corta que la distancia en línea recta
+
+    La heurística de A* solo es admisible si el peso de cada arista es mayor
+    o igual que la distancia de círculo máximo entre sus extremos. Si alguna
+    arista la incumple (coordenadas aproximadas, túneles, errores de datos)
+    se calcula el factor por el que hay que escalar la heurística para que
+    vuelva a ser una cota inferior.
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+
+    Returns:
+        dict: 'factor' de escala (<= 1), 'aristas_por_debajo' con las aristas
+            que incumplen la cota y 'nodos_sin_coordenadas' con su cantidad
+    """
+    if isinstance(grafo, GrafoCSR):
+        u, v = grafo.extremos[:, 0], grafo.extremos[:, 1]
+        lat1, lon1, lat2, lon2 = grafo.lat[u], grafo.lon[u], grafo.lat[v], grafo.lon[v]
+        pesos = grafo.pesos_aristas.astype(np.float64)
+        nombres_u, nombres_v = grafo.nombres[u], grafo.nombres[v]
+        sin_coordenadas = int(np.count_nonzero(np.isnan(grafo.lat) | np.isnan(grafo.lon)))
+    else:
+        coordenadas = coordenadas_de(grafo)
+        aristas = [(a, b, datos['weight'], coordenadas(a), coordenadas(b))
+                   for a, b, datos in grafo.edges(data=True)]
+        aristas = [arista for arista in aristas if arista[3] and arista[4]]
+        lat1 = np.array([arista[3][0] for arista in aristas], dtype=np.float64)
+        lon1 = np.array([arista[3][1] for arista in aristas], dtype=np.float64)
+        lat2 = np.array([arista[4][0] for arista in aristas], dtype=np.float64)
+        lon2 = np.array([arista[4][1] for arista in aristas], dtype=np.float64)
+        pesos = np.array([arista[2] for arista in aristas], dtype=np.float64)
+        nombres_u = np.array([arista[0] for arista in aristas], dtype=object)
+        nombres_v = np.array([arista[1] for arista in aristas], dtype=object)
+        sin_coordenadas = sum(1 for nodo in grafo if coordenadas(nodo) is None)
+
+    linea_recta = distancia_haversine(lat1, lon1, lat2, lon2)
+    validas = ~np.isnan(linea_recta) & (linea_recta > 0)
+    por_debajo = validas & (pesos < linea_recta)
+
+    factor = 1.0
+    if por_debajo.any():
+        factor = float(np.min(pesos[por_debajo] / linea_recta[por_debajo]))
+
+    return {
+        'factor': factor,
+        'aristas_por_debajo': list(zip(nombres_u[por_debajo].tolist(),
+                                       nombres_v[por_debajo].tolist())),
+        'nodos_sin_coordenadas': sin_coordenadas
+    }
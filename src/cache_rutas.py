@@ -0,0 +1,128 @@
+"""
+Caché LRU de rutas calculadas
+
+Las consultas se repiten mucho en la aplicación (Lima -> Cusco es el par por
+defecto), así que se guardan la ruta, la distancia y los detalles de cada
+consulta. La caché queda ligada a la versión del grafo: cualquier cambio en
+las aristas (ver marcar_grafo_modificado) la vacía en la siguiente consulta.
+"""
+from collections import OrderedDict
+
+from .grafo_peru import encontrar_ruta_con_detalles, version_grafo
+from .metricas import normalizar_metrica
+
+
+class CacheRutas:
+    """
+    Caché LRU delante de encontrar_ruta_mas_corta y obtener_detalles_ruta
+
+    Las entradas se indexan por (origen, destino, solo_adyacentes, método,
+    métrica), con la métrica en forma canónica (ver normalizar_metrica), de
+    modo que cambiar de métrica no devuelve rutas calculadas con otra. El
+    método forma parte de la clave: no todos admiten cualquier métrica y,
+    entre rutas empatadas, cada uno puede devolver una distinta.
+
+    Los resultados se devuelven sin copiar; no deben modificarse.
+    """
+
+    def __init__(self, maxsize=128):
+        """
+        Args:
+            maxsize: Número máximo de rutas guardadas
+
+        Raises:
+            ValueError: Si maxsize es menor que 1
+        """
+        if maxsize < 1:
+            raise ValueError(f"El tamaño de la caché debe ser al menos 1 (recibido {maxsize})")
+        self.maxsize = maxsize
+        self._entradas = OrderedDict()
+        self._grafo = None
+        self._version = None
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.invalidaciones = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def limpiar(self):
+        """Vaciar la caché (los contadores se conservan)"""
+        self._entradas.clear()
+
+    def _sincronizar(self, grafo):
+        """Vaciar la caché si cambió el grafo o su versión"""
+        version = version_grafo(grafo)
+        if grafo is not self._grafo or version != self._version:
+            if self._entradas:
+                self.invalidaciones += 1
+                self._entradas.clear()
+            self._grafo = grafo
+            self._version = version
+
+    def ruta_con_detalles(self, grafo, origen, destino, solo_adyacentes=False, metodo='dijkstra',
+                          metrica=None):
+        """
+        Versión con caché de encontrar_ruta_con_detalles
+
+        Returns:
+            tuple: (ruta, distancia, detalles), o (None, 0, None) si no
+                existe camino
+        """
+        self._sincronizar(grafo)
+        clave = (origen, destino, solo_adyacentes, metodo, normalizar_metrica(metrica))
+        resultado = self._entradas.get(clave)
+        if resultado is not None:
+            self.aciertos += 1
+            self._entradas.move_to_end(clave)
+            return resultado
+
+        self.fallos += 1
+        resultado = encontrar_ruta_con_detalles(grafo, origen, destino, solo_adyacentes, metodo, metrica)
+        self._entradas[clave] = resultado
+        if len(self._entradas) > self.maxsize:
+            self._entradas.popitem(last=False)
+            self.desalojos += 1
+        return resultado
+
+    def ruta_mas_corta(self, grafo, origen, destino, solo_adyacentes=False, metodo='dijkstra',
+                       metrica=None):
+        """
+        Versión con caché de encontrar_ruta_mas_corta
+
+        Returns:
+            tuple: (ruta, distancia)
+        """
+        ruta, distancia, _ = self.ruta_con_detalles(grafo, origen, destino, solo_adyacentes, metodo,
+                                                    metrica)
+        return ruta, distancia
+
+    def detalles_ruta(self, grafo, origen, destino, solo_adyacentes=False, metodo='dijkstra',
+                      metrica=None):
+        """
+        Detalles de la ruta entre dos regiones (formato de obtener_detalles_ruta)
+
+        Returns:
+            dict o None: Detalles de la ruta, o None si no existe camino
+        """
+        return self.ruta_con_detalles(grafo, origen, destino, solo_adyacentes, metodo, metrica)[2]
+
+    def estadisticas(self):
+        """
+        Contadores de uso de la caché
+
+        Returns:
+            dict: aciertos, fallos, desalojos, invalidaciones, tamaño actual,
+                tamaño máximo y tasa de aciertos
+        """
+        consultas = self.aciertos + self.fallos
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'desalojos': self.desalojos,
+            'invalidaciones': self.invalidaciones,
+            'tamano': len(self._entradas),
+            'maxsize': self.maxsize,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+        }
@@ -0,0 +1,321 @@
+"""
+Lectura por bloques de archivos de distancias muy grandes
+
+La tabla de distancias (CSV, Parquet o Arrow IPC) se lee en bloques de
+filas de tamaño fijo. Cada bloque se valida (extremos presentes, distancia
+numérica positiva, otras métricas numéricas no negativas, sin lazos) y sus aristas se añaden al grafo o a arreglos
+que crecen de forma incremental, sin tener nunca el archivo completo ni un
+DataFrame con todas las aristas en memoria: el pico de memoria queda acotado por el tamaño del bloque más el
+propio grafo. Una función de progreso recibe los bytes leídos tras cada
+bloque, para mostrar el avance de la carga.
+"""
+import os
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from .almacenamiento import rutas_tablas
+from .grafo_csr import GrafoCSR
+from .metricas import COLUMNAS_METRICAS
+from .nombres import TablaNombres
+from .tablas import COLUMNAS_REGIONES, columnas_tabla, leer_tabla, leer_tabla_por_bloques
+
+# Filas de la tabla de distancias leídas en cada bloque
+TAMANO_BLOQUE = 100_000
+
+COLUMNAS_DISTANCIAS = ['origen', 'destino', 'distancia_km']
+COLUMNAS_ENRIQUECIDAS = ['region_origen', 'region_destino']
+
+
+def nuevo_informe():
+    """
+    Contadores de una lectura por bloques
+
+    Returns:
+        dict: 'filas' leídas, 'validas' y filas descartadas por
+            'sin_extremo' (origen o destino vacío), 'distancia_invalida'
+            (no numérica o no positiva), 'metrica_invalida' (otra métrica
+            no numérica o negativa) y 'lazos' (origen igual al destino)
+    """
+    return {'filas': 0, 'validas': 0, 'sin_extremo': 0, 'distancia_invalida': 0,
+            'metrica_invalida': 0, 'lazos': 0}
+
+
+def columnas_metricas(ruta):
+    """Columnas de COLUMNAS_METRICAS presentes en una tabla de distancias"""
+    disponibles = columnas_tabla(ruta)
+    return [columna for columna in COLUMNAS_METRICAS if columna in disponibles]
+
+
+def _numerica(valores):
+    """Sin las filas no numéricas, los valores enteros vuelven a ser enteros"""
+    if valores.dtype.kind == 'f' and np.array_equal(valores, np.floor(valores)):
+        return valores.astype(np.int64)
+    return valores
+
+
+def _validar_bloque(bloque, informe):
+    """Descartar las filas no válidas de un bloque y anotarlas en el informe"""
+    distancias = pd.to_numeric(bloque['distancia_km'], errors='coerce')
+    metricas = {columna: pd.to_numeric(bloque[columna], errors='coerce')
+                for columna in COLUMNAS_METRICAS if columna in bloque.columns}
+    sin_extremo = (bloque['origen'].isna() | bloque['destino'].isna()).to_numpy()
+    distancia_invalida = ~sin_extremo & ~(distancias > 0).to_numpy()
+    metrica_invalida = np.zeros(len(bloque), dtype=bool)
+    for valores in metricas.values():
+        metrica_invalida |= ~(valores >= 0).to_numpy()
+    metrica_invalida &= ~sin_extremo & ~distancia_invalida
+    lazo = (~sin_extremo & ~distancia_invalida & ~metrica_invalida &
+            (bloque['origen'] == bloque['destino']).to_numpy())
+    validas = ~(sin_extremo | distancia_invalida | metrica_invalida | lazo)
+
+    informe['filas'] += len(bloque)
+    informe['validas'] += int(validas.sum())
+    informe['sin_extremo'] += int(sin_extremo.sum())
+    informe['distancia_invalida'] += int(distancia_invalida.sum())
+    informe['metrica_invalida'] += int(metrica_invalida.sum())
+    informe['lazos'] += int(lazo.sum())
+
+    if validas.all():
+        return bloque.assign(distancia_km=distancias, **metricas)
+    return bloque[validas].assign(
+        distancia_km=_numerica(distancias[validas]),
+        **{columna: _numerica(valores[validas]) for columna, valores in metricas.items()}
+    )
+
+
+def leer_distancias_por_bloques(ruta, columnas=None, tamano_bloque=TAMANO_BLOQUE, progreso=None,
+                                informe=None):
+    """
+    Leer y validar una tabla de distancias bloque a bloque
+
+    Args:
+        ruta: Ruta de la tabla de distancias (.csv, .parquet o .arrow)
+        columnas: Columnas que se leen; por defecto todas
+        tamano_bloque: Filas por bloque
+        progreso: Función opcional progreso(bytes_leidos, bytes_totales),
+            llamada tras cada bloque
+        informe: Diccionario de nuevo_informe() que se actualiza con las
+            filas leídas y descartadas
+
+    Yields:
+        pd.DataFrame: Bloques con solo las filas válidas y distancia_km numérica
+
+    Raises:
+        ValueError: Si a la tabla le falta alguna columna necesaria
+    """
+    if informe is None:
+        informe = nuevo_informe()
+    disponibles = columnas_tabla(ruta)
+    faltantes = [columna for columna in COLUMNAS_DISTANCIAS + list(columnas or [])
+                 if columna not in disponibles]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en {os.path.basename(ruta)}: {', '.join(faltantes)}")
+
+    total = os.path.getsize(ruta)
+    for bloque, leidos in leer_tabla_por_bloques(ruta, columnas, tamano_bloque):
+        yield _validar_bloque(bloque, informe)
+        if progreso is not None:
+            progreso(leidos, total)
+    if progreso is not None:
+        progreso(total, total)
+
+
+def leer_distancias(ruta, columnas=None, tamano_bloque=TAMANO_BLOQUE, progreso=None, informe=None):
+    """
+    Leer una tabla de distancias completa, validada, en un solo DataFrame
+
+    Es la lectura de cargar_datos: como leer_distancias_por_bloques, pero
+    reuniendo los bloques.
+
+    Returns:
+        pd.DataFrame: Filas válidas de la tabla con las columnas pedidas
+    """
+    bloques = list(leer_distancias_por_bloques(ruta, columnas, tamano_bloque, progreso, informe))
+    if not bloques:
+        return leer_tabla(ruta, columnas).iloc[:0]
+    return pd.concat(bloques, ignore_index=True)
+
+
+class ArregloCreciente:
+    """Arreglo de NumPy al que se añaden valores por bloques (capacidad duplicada al llenarse)"""
+
+    def __init__(self, tipo, capacidad=1024):
+        self._datos = np.empty(capacidad, dtype=tipo)
+        self._longitud = 0
+
+    def __len__(self):
+        return self._longitud
+
+    def agregar(self, valores):
+        """Añadir valores al final, ampliando el tipo si hace falta (p. ej. enteros a reales)"""
+        valores = np.asarray(valores)
+        tipo = np.promote_types(self._datos.dtype, valores.dtype)
+        if tipo != self._datos.dtype:
+            self._datos = self._datos.astype(tipo)
+        fin = self._longitud + len(valores)
+        if fin > len(self._datos):
+            self._datos.resize(max(fin, 2 * len(self._datos)), refcheck=False)
+        self._datos[self._longitud:fin] = valores
+        self._longitud = fin
+
+    def finalizar(self):
+        """Recortar la capacidad sobrante y devolver el arreglo (ya no se puede ampliar)"""
+        self._datos.resize(self._longitud, refcheck=False)
+        return self._datos
+
+
+class AcumuladorAristas:
+    """
+    Nodos y aristas de un grafo leídos por bloques
+
+    Los nombres se convierten en IDs enteros a medida que aparecen, en el
+    mismo orden en que NetworkX insertaría los nodos (regiones y después los
+    extremos de cada arista), y las aristas se guardan en arreglos crecientes.
+    """
+
+    def __init__(self, nombres=(), atributos=(), metricas=()):
+        """
+        Args:
+            nombres: Nombres de los primeros nodos (las regiones)
+            atributos: Columnas categóricas que se guardan por arista
+            metricas: Columnas numéricas que se guardan como métricas
+        """
+        self.indices = {}
+        for nombre in nombres:
+            self.indices.setdefault(nombre, len(self.indices))
+        self.origenes = ArregloCreciente(np.int64)
+        self.destinos = ArregloCreciente(np.int64)
+        self.pesos = ArregloCreciente(np.int64)
+        self.atributos = {columna: ({}, ArregloCreciente(np.int64)) for columna in atributos}
+        self.metricas = {columna: ArregloCreciente(np.int64) for columna in metricas}
+
+    @staticmethod
+    def _codificar(indices, valores):
+        """
+        IDs de unos valores, asignando el siguiente ID a los que no se conocían
+
+        Los valores nulos reciben -1, como los códigos de pd.factorize en
+        extraer_arreglos.
+        """
+        codigos, unicos = pd.factorize(valores)
+        ids = np.fromiter((indices.setdefault(valor, len(indices)) for valor in unicos),
+                          dtype=np.int64, count=len(unicos))
+        return np.append(ids, -1)[codigos]
+
+    def agregar(self, bloque):
+        """
+        Añadir las aristas de un bloque validado
+
+        Args:
+            bloque: DataFrame con origen, destino, distancia_km y las columnas
+                de atributos y métricas
+        """
+        # Extremos intercalados (origen, destino) por arista, como add_edges_from
+        extremos = np.column_stack([bloque['origen'].to_numpy(dtype=object),
+                                    bloque['destino'].to_numpy(dtype=object)]).ravel()
+        ids = self._codificar(self.indices, extremos).reshape(-1, 2)
+        self.origenes.agregar(ids[:, 0])
+        self.destinos.agregar(ids[:, 1])
+        self.pesos.agregar(bloque['distancia_km'].to_numpy())
+        for columna, (categorias, codigos) in self.atributos.items():
+            codigos.agregar(self._codificar(categorias, bloque[columna].to_numpy(dtype=object)))
+        for columna, valores in self.metricas.items():
+            valores.agregar(bloque[columna].to_numpy())
+
+    def nombres(self):
+        """Arreglo con el nombre de cada ID de nodo"""
+        nombres = np.empty(len(self.indices), dtype=object)
+        nombres[:] = list(self.indices)
+        return nombres
+
+    def crear_grafo(self, df_regiones):
+        """
+        Construir el GrafoCSR con las aristas acumuladas
+
+        Args:
+            df_regiones: DataFrame de regiones con las coordenadas
+
+        Returns:
+            GrafoCSR: Grafo con los nodos y aristas leídos
+        """
+        nombres = TablaNombres(self.nombres(), self.indices)
+        ids_regiones = np.fromiter((self.indices[region] for region in df_regiones['region'].tolist()),
+                                   dtype=np.int64, count=len(df_regiones))
+        lat = np.full(len(nombres), np.nan)
+        lon = np.full(len(nombres), np.nan)
+        lat[ids_regiones] = df_regiones['latitude'].to_numpy(dtype=np.float64)
+        lon[ids_regiones] = df_regiones['longitude'].to_numpy(dtype=np.float64)
+
+        atributos = {columna: (codigos.finalizar(), pd.Index(list(categorias)))
+                     for columna, (categorias, codigos) in self.atributos.items()}
+        metricas = {columna: valores.finalizar() for columna, valores in self.metricas.items()}
+        return GrafoCSR.desde_arreglos(nombres, lat, lon, self.origenes.finalizar(),
+                                       self.destinos.finalizar(), self.pesos.finalizar(),
+                                       atributos_aristas=atributos, metricas_aristas=metricas)
+
+
+def cargar_grafo_por_bloques(directorio=None, motor='csr', tamano_bloque=TAMANO_BLOQUE, progreso=None,
+                             formato=None):
+    """
+    Cargar el grafo leyendo la tabla de distancias por bloques
+
+    A diferencia de cargar_datos no se devuelve el DataFrame de distancias
+    ni se usa la instantánea: las aristas pasan directamente de cada bloque
+    al grafo.
+
+    Args:
+        directorio: Carpeta con las tablas; por defecto la carpeta data del proyecto
+        motor: 'csr' (por defecto) o 'networkx'
+        tamano_bloque: Filas de la tabla de distancias leídas en cada bloque
+        progreso: Función opcional progreso(bytes_leidos, bytes_totales)
+        formato: 'parquet', 'arrow' o 'csv'; por defecto el primero disponible
+            (ver rutas_tablas)
+
+    Returns:
+        tuple: (df_regiones, grafo, informe) con el informe de filas leídas
+            y descartadas (ver nuevo_informe)
+
+    Raises:
+        ValueError: Si el motor o el formato no existen o falta alguna columna
+    """
+    if motor not in ('networkx', 'csr'):
+        raise ValueError(f"Motor de grafo desconocido: {motor}. Opciones: networkx, csr")
+
+    regiones_path, distancias_path, usar_enriquecido = rutas_tablas(directorio, formato)
+    df_regiones = leer_tabla(regiones_path, COLUMNAS_REGIONES)
+    atributos = COLUMNAS_ENRIQUECIDAS if usar_enriquecido else []
+    metricas = columnas_metricas(distancias_path)
+    informe = nuevo_informe()
+    bloques = leer_distancias_por_bloques(distancias_path, COLUMNAS_DISTANCIAS + atributos + metricas,
+                                          tamano_bloque, progreso, informe)
+
+    if motor == 'csr':
+        acumulador = AcumuladorAristas(df_regiones['region'].tolist(), atributos, metricas)
+        for bloque in bloques:
+            acumulador.agregar(bloque)
+        grafo = acumulador.crear_grafo(df_regiones)
+        # Los nombres de las regiones, codificados con la tabla de nombres del grafo
+        df_regiones = df_regiones.assign(region=grafo.tabla_nombres.codificar(df_regiones['region']))
+    else:
+        grafo = nx.Graph()
+        grafo.add_nodes_from(
+            (region, {'lat': lat, 'lon': lon})
+            for region, lat, lon in zip(df_regiones['region'].tolist(),
+                                        df_regiones['latitude'].tolist(),
+                                        df_regiones['longitude'].tolist())
+        )
+        atributos = atributos + metricas
+        for bloque in bloques:
+            columnas = [bloque[columna].tolist() for columna in atributos]
+            grafo.add_edges_from(
+                (origen, destino, {'weight': peso, **dict(zip(atributos, valores))})
+                for origen, destino, peso, *valores in zip(bloque['origen'].tolist(),
+                                                           bloque['destino'].tolist(),
+                                                           bloque['distancia_km'].tolist(),
+                                                           *columnas)
+            )
+
+    grafo.graph['fuentes'] = [regiones_path, distancias_path]
+    return df_regiones, grafo, informe
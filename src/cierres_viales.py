@@ -0,0 +1,226 @@
+"""
+Cierres, reaperturas y cambios de distancia de tramos sobre el grafo en uso
+
+Reflejan, sin editar los CSV ni recargar los datos, los cortes de carretera
+(huaicos, derrumbes) y los desvíos. La tabla de distancias precalculada se
+repara de forma incremental: solo se recalculan los orígenes afectados por
+el cambio. La jerarquía de contracción y la cota haversine se descartan y se
+vuelven a preparar en la siguiente consulta que las use, y las cachés de
+rutas se invalidan con el sello de versión del grafo.
+"""
+import time
+
+import numpy as np
+
+from .busqueda import vecinos_de
+from .grafo_csr import GrafoCSR
+from .grafo_peru import marcar_grafo_modificado, version_grafo
+
+
+def _tramos(grafo):
+    """Diccionario de tramos cerrados del grafo {frozenset(extremos): (peso, atributos)}"""
+    return grafo.graph.setdefault('tramos_cerrados', {})
+
+
+def tramos_cerrados(grafo):
+    """
+    Listar los tramos cerrados del grafo
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+
+    Returns:
+        list: Tuplas (origen, destino, distancia) de los tramos cerrados
+    """
+    return [(*sorted(extremos), peso) for extremos, (peso, _) in _tramos(grafo).items()]
+
+
+def _registrar_conectividad(grafo, origen, destino, abierto):
+    """Actualizar el seguimiento de conectividad del grafo, si existe"""
+    conectividad = grafo.graph.get('conectividad')
+    if conectividad is None:
+        return
+    if abierto:
+        conectividad.agregar_arista(origen, destino)
+    else:
+        conectividad.eliminar_arista(origen, destino)
+
+
+def _vecinos_en_tabla(grafo, tabla):
+    """
+    Función de vecinos del grafo numerada con los IDs de la tabla de distancias
+
+    La tabla puede numerar los nodos en otro orden que el grafo (por ejemplo,
+    si se construyó con el otro motor y se cargó de la carpeta de datos): los
+    vecinos se traducen por nombre. En NetworkX se recorre directamente su
+    adyacencia, sin convertir el grafo.
+
+    Returns:
+        function o None: vecinos(u) con IDs de la tabla, o None si la tabla
+            no tiene los mismos nodos que el grafo
+    """
+    tabla_nombres = tabla.tabla_nombres
+    if isinstance(grafo, GrafoCSR):
+        if tabla_nombres.compartir(grafo.tabla_nombres) is grafo.tabla_nombres:
+            return vecinos_de(grafo)
+        a_tabla = tabla_nombres.ids(grafo.nombres)
+        if len(tabla_nombres) != grafo.number_of_nodes() or (a_tabla < 0).any():
+            return None
+        # a_grafo[ID de la tabla] = ID del grafo
+        a_grafo = np.empty(len(a_tabla), dtype=np.int64)
+        a_grafo[a_tabla] = np.arange(len(a_tabla))
+        a_tabla, a_grafo = a_tabla.tolist(), a_grafo.tolist()
+        vecinos_grafo = vecinos_de(grafo)
+
+        def vecinos(u):
+            return [(a_tabla[v], peso) for v, peso in vecinos_grafo(a_grafo[u])]
+        return vecinos
+
+    if len(tabla_nombres) != grafo.number_of_nodes() or any(nodo not in tabla_nombres for nodo in grafo):
+        return None
+    nombres = tabla_nombres.nombres
+    indices = tabla_nombres.indices
+    adyacencia = grafo._adj
+
+    def vecinos(u):
+        return [(indices[v], datos['weight']) for v, datos in adyacencia[nombres[u]].items()]
+    return vecinos
+
+
+def _aplicar_cambio(grafo, origen, destino, peso_anterior, peso_nuevo, inicio, conservar=()):
+    """
+    Registrar el cambio de una arista ya aplicado y reparar la tabla de distancias
+
+    Returns:
+        dict: Versión del grafo, filas de la tabla recalculadas y segundos
+            empleados desde inicio (incluye la modificación del grafo)
+    """
+    tabla = grafo.graph.get('tabla_distancias')
+    version = marcar_grafo_modificado(grafo, conservar)
+
+    filas_reparadas = 0
+    vecinos = None if tabla is None else _vecinos_en_tabla(grafo, tabla)
+    # Sin los mismos nodos la tabla no se repara: se reconstruirá al usarla
+    if vecinos is not None:
+        # La tabla ya no corresponde a los CSV: no debe guardarse con su huella
+        tabla.huella = None
+        if isinstance(grafo, GrafoCSR):
+            tabla.pesos_enteros = grafo.pesos_aristas.dtype.kind in 'iu'
+        else:
+            tabla.pesos_enteros = tabla.pesos_enteros and (peso_nuevo is None or float(peso_nuevo).is_integer())
+        filas_reparadas = len(tabla.reparar_arista(
+            vecinos, tabla.id_nodo(origen), tabla.id_nodo(destino), peso_anterior, peso_nuevo
+        ))
+        grafo.graph['tabla_distancias'] = tabla
+
+    return {
+        'version': version,
+        'filas_reparadas': filas_reparadas,
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+def cerrar_tramo(grafo, origen, destino):
+    """
+    Cerrar el tramo entre dos regiones
+
+    El tramo se quita del grafo y se recuerda (con su distancia y atributos)
+    para poder reabrirlo.
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        origen: Región de un extremo del tramo
+        destino: Región del otro extremo
+
+    Returns:
+        dict: 'version', 'filas_reparadas' y 'segundos' de la actualización
+
+    Raises:
+        ValueError: Si no existe un tramo abierto entre las dos regiones
+    """
+    if not grafo.has_edge(origen, destino):
+        raise ValueError(f"No existe un tramo abierto entre {origen} y {destino}")
+
+    inicio = time.perf_counter()
+    if isinstance(grafo, GrafoCSR):
+        peso, atributos = grafo.eliminar_arista(origen, destino)
+    else:
+        atributos = dict(grafo[origen][destino])
+        peso = atributos.pop('weight')
+        grafo.remove_edge(origen, destino)
+    _tramos(grafo)[frozenset((origen, destino))] = (peso, atributos)
+    _registrar_conectividad(grafo, origen, destino, abierto=False)
+
+    return _aplicar_cambio(grafo, origen, destino, peso, None, inicio, conservar=('conectividad',))
+
+
+def reabrir_tramo(grafo, origen, destino):
+    """
+    Reabrir un tramo cerrado con cerrar_tramo
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        origen: Región de un extremo del tramo
+        destino: Región del otro extremo
+
+    Returns:
+        dict: 'version', 'filas_reparadas' y 'segundos' de la actualización
+
+    Raises:
+        ValueError: Si el tramo no está cerrado
+    """
+    clave = frozenset((origen, destino))
+    if clave not in _tramos(grafo):
+        raise ValueError(f"El tramo entre {origen} y {destino} no está cerrado")
+
+    inicio = time.perf_counter()
+    peso, atributos = _tramos(grafo).pop(clave)
+    if isinstance(grafo, GrafoCSR):
+        grafo.agregar_arista(origen, destino, peso, atributos)
+    else:
+        grafo.add_edge(origen, destino, weight=peso, **atributos)
+    _registrar_conectividad(grafo, origen, destino, abierto=True)
+
+    return _aplicar_cambio(grafo, origen, destino, None, peso, inicio, conservar=('conectividad',))
+
+
+def cambiar_distancia_tramo(grafo, origen, destino, distancia):
+    """
+    Cambiar la distancia de un tramo (por ejemplo, por un desvío)
+
+    Si el tramo está cerrado, la nueva distancia se aplicará al reabrirlo.
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        origen: Región de un extremo del tramo
+        destino: Región del otro extremo
+        distancia: Nueva distancia en km (positiva)
+
+    Returns:
+        dict: 'version', 'filas_reparadas' y 'segundos' de la actualización
+
+    Raises:
+        ValueError: Si la distancia no es positiva o el tramo no existe
+    """
+    if not distancia > 0:
+        raise ValueError(f"La distancia de un tramo debe ser positiva (recibido {distancia})")
+
+    clave = frozenset((origen, destino))
+    if clave in _tramos(grafo):
+        _, atributos = _tramos(grafo)[clave]
+        _tramos(grafo)[clave] = (distancia, atributos)
+        return {'version': version_grafo(grafo), 'filas_reparadas': 0, 'segundos': 0.0}
+
+    if not grafo.has_edge(origen, destino):
+        raise ValueError(f"No existe un tramo entre {origen} y {destino}")
+
+    inicio = time.perf_counter()
+    if isinstance(grafo, GrafoCSR):
+        anterior = grafo.cambiar_peso(origen, destino, distancia)
+    else:
+        anterior = grafo[origen][destino]['weight']
+        grafo[origen][destino]['weight'] = distancia
+
+    # Los tramos siguen siendo los mismos: adyacencia y conectividad siguen valiendo
+    return _aplicar_cambio(grafo, origen, destino, anterior, distancia, inicio,
+                           conservar=('adyacencia', 'conectividad'))
@@ -0,0 +1,147 @@
+"""
+Seguimiento incremental de la conectividad del grafo
+
+Un conjunto disjunto (union-find) con compresión de caminos y unión por
+tamaño mantiene las componentes conexas al añadir aristas en tiempo casi
+constante. Las eliminaciones no se pueden deshacer en un union-find, así que
+solo marcan el seguimiento como desactualizado y las componentes se vuelven
+a derivar del grafo en la siguiente consulta.
+"""
+import numpy as np
+
+from .grafo_csr import GrafoCSR
+
+
+class ConectividadIncremental:
+    """Componentes conexas y grados de un grafo, actualizados arista a arista"""
+
+    def __init__(self, grafo):
+        """
+        Args:
+            grafo: Grafo de NetworkX o GrafoCSR (se conserva una referencia
+                para volver a derivar las componentes tras eliminaciones)
+        """
+        self._grafo = grafo
+        self._reconstruir()
+
+    def _reconstruir(self):
+        """Derivar componentes y grados recorriendo una sola vez las aristas"""
+        grafo = self._grafo
+        if isinstance(grafo, GrafoCSR):
+            self.nombres = grafo.nombres.tolist()
+            self.indices = grafo.indices
+            extremos = grafo.extremos.tolist()
+        else:
+            self.nombres = list(grafo.nodes)
+            self.indices = {nombre: i for i, nombre in enumerate(self.nombres)}
+            extremos = [(self.indices[u], self.indices[v]) for u, v in grafo.edges]
+
+        num_nodos = len(self.nombres)
+        self._padres = list(range(num_nodos))
+        self._tamanos = [1] * num_nodos
+        self.grados = [0] * num_nodos
+        self.num_componentes = num_nodos
+        self.num_aristas = 0
+        self.desactualizado = False
+        for u, v in extremos:
+            self._agregar(u, v)
+
+    def _raiz(self, nodo):
+        """Representante de la componente de un nodo (con división de caminos)"""
+        padres = self._padres
+        while padres[nodo] != nodo:
+            padres[nodo] = padres[padres[nodo]]
+            nodo = padres[nodo]
+        return nodo
+
+    def _agregar(self, u, v):
+        """Registrar una arista entre dos IDs de nodo"""
+        self.grados[u] += 1
+        self.grados[v] += 1
+        self.num_aristas += 1
+        raiz_u, raiz_v = self._raiz(u), self._raiz(v)
+        if raiz_u == raiz_v:
+            return
+        if self._tamanos[raiz_u] < self._tamanos[raiz_v]:
+            raiz_u, raiz_v = raiz_v, raiz_u
+        self._padres[raiz_v] = raiz_u
+        self._tamanos[raiz_u] += self._tamanos[raiz_v]
+        self.num_componentes -= 1
+
+    def _actualizar(self):
+        """Volver a derivar las componentes si hubo eliminaciones"""
+        if self.desactualizado:
+            self._reconstruir()
+
+    def agregar_arista(self, origen, destino):
+        """
+        Registrar una arista añadida al grafo (por nombre)
+
+        Args:
+            origen: Nombre del primer nodo
+            destino: Nombre del segundo nodo
+        """
+        if not self.desactualizado:
+            self._agregar(self.indices[origen], self.indices[destino])
+
+    def eliminar_arista(self, origen, destino):
+        """
+        Registrar una arista eliminada del grafo (por nombre)
+
+        Las componentes se recalculan de forma perezosa en la siguiente consulta.
+        """
+        self.desactualizado = True
+
+    def corresponde_a(self, grafo):
+        """
+        Verificar que el seguimiento describe el estado actual de un grafo
+
+        Las ediciones directas del grafo (add_edge o remove_node de NetworkX)
+        no pasan por agregar_arista ni eliminar_arista: se notan en que el
+        número de nodos o de aristas ya no coincide con el del grafo. Con
+        eliminaciones pendientes se reconstruye de todos modos al consultar.
+
+        Args:
+            grafo: Grafo de NetworkX o GrafoCSR
+
+        Returns:
+            bool: True si el seguimiento es de ese grafo y sigue al día
+        """
+        if self._grafo is not grafo:
+            return False
+        if self.desactualizado:
+            return True
+        return (len(self.nombres), self.num_aristas) == (grafo.number_of_nodes(), grafo.number_of_edges())
+
+    def conectados(self, origen, destino):
+        """
+        Verificar si dos nodos están en la misma componente
+
+        Returns:
+            bool: True si existe un camino entre ambos nodos
+        """
+        self._actualizar()
+        return self._raiz(self.indices[origen]) == self._raiz(self.indices[destino])
+
+    def reporte(self):
+        """
+        Informe de integridad en el formato de verificar_integridad_grafo
+
+        Returns:
+            dict: es_conexo, num_nodos, num_aristas, nodos_aislados y
+                componentes_conexas (listas de nombres, en el orden en que
+                aparece su primer nodo)
+        """
+        self._actualizar()
+        componentes = {}
+        for nodo, nombre in enumerate(self.nombres):
+            componentes.setdefault(self._raiz(nodo), []).append(nombre)
+
+        grados = np.array(self.grados, dtype=np.int64)
+        return {
+            'es_conexo': self.num_componentes == 1,
+            'num_nodos': len(self.nombres),
+            'num_aristas': self.num_aristas,
+            'nodos_aislados': [self.nombres[nodo] for nodo in np.flatnonzero(grados == 0).tolist()],
+            'componentes_conexas': list(componentes.values())
+        }
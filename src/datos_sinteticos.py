@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from .geodesia import distancia_haversine
+
+# Límites aproximados del territorio peruano (mismos que usan los mapas)
+MIN_LAT, MAX_LAT = -18.5, -0.0
+MIN_LON, MAX_LON = -82.0, -68.0
+
+def generar_red_vial(num_nodos, proporcion_aristas=0.8, semilla=0, metricas=False):
+    """
+    Generar una red vial sintética con el mismo formato que los CSV de datos
+
+    Los nodos se distribuyen en una cuadrícula sobre el territorio peruano y
+    se conectan con sus vecinos horizontales, verticales y con una diagonal
+    por celda (se descarta una fracción de ellos al azar). La distancia de cada tramo es la distancia
+    en línea recta multiplicada por un factor de sinuosidad mayor que 1,
+    como ocurre con las carreteras reales. Con metricas se añaden el tiempo
+    de viaje (velocidad de 30 a 90 km/h), los peajes (en uno de cada diez
+    tramos) y el desnivel acumulado de cada tramo.
+
+    Args:
+        num_nodos: Número aproximado de nodos de la red
+        proporcion_aristas: Fracción de tramos de la cuadrícula que se conservan
+        semilla: Semilla del generador aleatorio
+        metricas: Si es True, añadir las columnas tiempo_min, peaje_soles y
+            desnivel_m a las distancias
+
+    Returns:
+        tuple: (df_regiones, df_distancias) con las columnas de regiones.csv
+            y distancias.csv
+    """
+    rng = np.random.default_rng(semilla)
+    lado = max(2, int(np.ceil(np.sqrt(num_nodos))))
+    filas, columnas = np.divmod(np.arange(lado * lado), lado)
+
+    latitudes = MIN_LAT + (MAX_LAT - MIN_LAT) * (filas + rng.uniform(0.1, 0.9, lado * lado)) / lado
+    longitudes = MIN_LON + (MAX_LON - MIN_LON) * (columnas + rng.uniform(0.1, 0.9, lado * lado)) / lado
+    nombres = np.char.add('N', np.arange(lado * lado).astype(str)).astype(object)
+
+    df_regiones = pd.DataFrame({
+        'region': nombres,
+        'latitude': latitudes,
+        'longitude': longitudes
+    })
+
+    ids = np.arange(lado * lado)
+    horizontales = ids[columnas < lado - 1]
+    verticales = ids[filas < lado - 1]
+    celdas = ids[(columnas < lado - 1) & (filas < lado - 1)]
+    # Diagonal de cada celda en una orientación elegida al azar
+    invertida = rng.random(len(celdas)) < 0.5
+    diagonales_origen = np.where(invertida, celdas + 1, celdas)
+    diagonales_destino = np.where(invertida, celdas + lado, celdas + lado + 1)
+
+    origenes = np.concatenate([horizontales, verticales, diagonales_origen])
+    destinos = np.concatenate([horizontales + 1, verticales + lado, diagonales_destino])
+
+    conservar = rng.random(len(origenes)) < proporcion_aristas
+    origenes = origenes[conservar]
+    destinos = destinos[conservar]
+
+    linea_recta = distancia_haversine(latitudes[origenes], longitudes[origenes],
+                                      latitudes[destinos], longitudes[destinos])
+    sinuosidad = rng.uniform(1.1, 1.6, len(origenes))
+
+    df_distancias = pd.DataFrame({
+        'origen': nombres[origenes],
+        'destino': nombres[destinos],
+        'distancia_km': np.round(linea_recta * sinuosidad).astype(np.int64) + 1
+    })
+
+    if metricas:
+        num_aristas = len(df_distancias)
+        velocidades = rng.uniform(30, 90, num_aristas)
+        con_peaje = rng.random(num_aristas) < 0.1
+        df_distancias['tiempo_min'] = np.round(60 * df_distancias['distancia_km'] / velocidades, 1)
+        df_distancias['peaje_soles'] = np.where(con_peaje, rng.integers(5, 30, num_aristas), 0)
+        df_distancias['desnivel_m'] = rng.integers(0, 1500, num_aristas)
+
+    return df_regiones, df_distancias
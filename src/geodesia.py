@@ -0,0 +1,24 @@
+import math
+
+import numpy as np
+
+RADIO_TIERRA_KM = 6371.0
+
+def distancia_haversine(lat1, lon1, lat2, lon2):
+    """
+    Distancia de círculo máximo en km (admite escalares o arreglos)
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def haversine_escalar(lat1, lon1, lat2, lon2):
+    """
+    Distancia de círculo máximo en km para un único par de puntos
+
+    Versión con el módulo math, mucho más rápida que NumPy para valores
+    sueltos dentro del bucle de una búsqueda.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(math.sqrt(min(a, 1.0)))
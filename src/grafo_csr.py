@@ -0,0 +1,485 @@
+import numpy as np
+
+from .metricas import METRICA_DISTANCIA, atributo_arista, normalizar_metrica
+from .nombres import TablaNombres
+
+# Arreglos numéricos que definen un GrafoCSR (además de nombres y atributos)
+ARREGLOS_CSR = ('lat', 'lon', 'offsets', 'destinos', 'pesos', 'aristas', 'extremos', 'pesos_aristas')
+
+class GrafoCSR:
+    """
+    Grafo no dirigido compacto basado en arreglos CSR de NumPy
+
+    Los nodos se identifican internamente con enteros consecutivos y la
+    adyacencia se guarda en tres arreglos:
+        - offsets: para el nodo i, sus vecinos están en el rango
+          offsets[i]:offsets[i + 1]
+        - destinos: identificador del nodo vecino en cada posición
+        - pesos: peso (distancia en km) de la arista en cada posición
+
+    Cada arista no dirigida ocupa dos posiciones (una por sentido) y
+    conserva su identificador en el arreglo `aristas`, de modo que los
+    atributos por arista se guardan una sola vez. Las métricas distintas de
+    la distancia (tiempo, peajes...) son arreglos por arista paralelos a
+    `pesos_aristas`; sus pesos por posición se preparan en la primera
+    búsqueda que las usa (ver pesos_metrica). Los nombres de los nodos se
+    guardan en una TablaNombres que pueden compartir los precálculos del grafo.
+    """
+
+    def __init__(self, nombres, lat, lon, offsets, destinos, pesos, aristas,
+                 extremos, pesos_aristas, atributos_aristas=None, metricas_aristas=None):
+        self.tabla_nombres = TablaNombres.crear(nombres)
+        self.lat = lat
+        self.lon = lon
+        self.offsets = offsets
+        self.destinos = destinos
+        self.pesos = pesos
+        self.aristas = aristas
+        self.extremos = extremos
+        self.pesos_aristas = pesos_aristas
+        self.atributos_aristas = atributos_aristas or {}
+        self.metricas_aristas = metricas_aristas or {}
+        # Pesos por posición CSR de cada métrica ya consultada
+        self._pesos_metricas = {}
+        # Metadatos del grafo, igual que el atributo `graph` de NetworkX
+        self.graph = {}
+
+    @classmethod
+    def desde_arreglos(cls, nombres, lat, lon, origenes, destinos, pesos,
+                       atributos_aristas=None, metricas_aristas=None):
+        """
+        Construir el grafo a partir de arreglos de aristas
+
+        Args:
+            nombres: Arreglo con el nombre de cada nodo (su posición es su ID)
+                o TablaNombres ya construida
+            lat: Arreglo de latitudes por nodo (NaN si no se conoce)
+            lon: Arreglo de longitudes por nodo (NaN si no se conoce)
+            origenes: Arreglo con el ID del nodo de origen de cada arista
+            destinos: Arreglo con el ID del nodo de destino de cada arista
+            pesos: Arreglo con el peso de cada arista
+            atributos_aristas: Diccionario opcional {nombre: (codigos, categorias)}
+                con atributos categóricos alineados con las aristas
+            metricas_aristas: Diccionario opcional {nombre: valores} con otras
+                métricas numéricas alineadas con las aristas
+
+        Returns:
+            GrafoCSR: Grafo construido
+        """
+        num_nodos = len(nombres)
+        origenes = np.asarray(origenes, dtype=np.int64)
+        destinos = np.asarray(destinos, dtype=np.int64)
+        # Se conserva el tipo de los pesos (enteros en los CSV de distancias)
+        pesos = np.asarray(pesos)
+        if pesos.dtype.kind not in 'iuf':
+            pesos = pesos.astype(np.float64)
+
+        # Eliminar aristas repetidas (en cualquier sentido) conservando la
+        # última aparición, igual que hace NetworkX con add_edge
+        menor = np.minimum(origenes, destinos)
+        mayor = np.maximum(origenes, destinos)
+        claves = menor * num_nodos + mayor
+        _, ultimas = np.unique(claves[::-1], return_index=True)
+        conservar = np.sort(len(claves) - 1 - ultimas)
+
+        origenes = origenes[conservar]
+        destinos = destinos[conservar]
+        pesos = pesos[conservar]
+        atributos = {}
+        for nombre, (codigos, categorias) in (atributos_aristas or {}).items():
+            atributos[nombre] = (np.asarray(codigos)[conservar], categorias)
+        metricas = {nombre: np.asarray(valores)[conservar]
+                    for nombre, valores in (metricas_aristas or {}).items()}
+
+        num_aristas = len(origenes)
+        indice_tipo = np.int32 if num_nodos < 2**31 else np.int64
+
+        # Cada arista aparece en ambos sentidos dentro de la estructura CSR
+        fuentes = np.concatenate([origenes, destinos])
+        vecinos = np.concatenate([destinos, origenes])
+        ids_aristas = np.concatenate([np.arange(num_aristas), np.arange(num_aristas)])
+
+        orden = np.argsort(fuentes, kind='stable')
+        offsets = np.zeros(num_nodos + 1, dtype=np.int64)
+        np.cumsum(np.bincount(fuentes, minlength=num_nodos), out=offsets[1:])
+
+        return cls(
+            nombres=TablaNombres.crear(nombres),
+            lat=np.asarray(lat, dtype=np.float64),
+            lon=np.asarray(lon, dtype=np.float64),
+            offsets=offsets,
+            destinos=vecinos[orden].astype(indice_tipo),
+            pesos=np.concatenate([pesos, pesos])[orden],
+            aristas=ids_aristas[orden].astype(indice_tipo),
+            extremos=np.stack([origenes, destinos], axis=1).astype(indice_tipo),
+            pesos_aristas=pesos,
+            atributos_aristas=atributos,
+            metricas_aristas=metricas,
+        )
+
+    @classmethod
+    def desde_networkx(cls, grafo, peso='weight', metricas=()):
+        """
+        Convertir un grafo de NetworkX en un GrafoCSR
+
+        Args:
+            grafo: networkx.Graph con atributos 'lat' y 'lon' opcionales en los nodos
+            peso: Atributo de las aristas usado como peso
+            metricas: Nombres de otras métricas de las aristas que se conservan
+
+        Returns:
+            GrafoCSR: Grafo equivalente (los IDs siguen el orden de grafo.nodes)
+        """
+        nombres = np.empty(grafo.number_of_nodes(), dtype=object)
+        nombres[:] = list(grafo.nodes)
+        indices = {nombre: i for i, nombre in enumerate(nombres.tolist())}
+        lat = np.array([datos.get('lat', np.nan) for _, datos in grafo.nodes(data=True)], dtype=np.float64)
+        lon = np.array([datos.get('lon', np.nan) for _, datos in grafo.nodes(data=True)], dtype=np.float64)
+
+        metricas = [nombre for nombre in metricas if nombre != METRICA_DISTANCIA]
+        origenes, destinos, pesos = [], [], []
+        valores = {nombre: [] for nombre in metricas}
+        for u, v, datos in grafo.edges(data=True):
+            origenes.append(indices[u])
+            destinos.append(indices[v])
+            pesos.append(datos[peso])
+            for nombre in metricas:
+                valores[nombre].append(datos[atributo_arista(nombre)])
+
+        nuevo = cls.desde_arreglos(TablaNombres(nombres, indices), lat, lon, origenes, destinos, pesos,
+                                   metricas_aristas={nombre: np.array(lista) for nombre, lista in valores.items()})
+        nuevo.graph = dict(grafo.graph)
+        return nuevo
+
+    @property
+    def nombres(self):
+        """Arreglo con el nombre de cada ID de nodo"""
+        return self.tabla_nombres.nombres
+
+    @property
+    def indices(self):
+        """Diccionario nombre -> ID, construido en el primer acceso"""
+        return self.tabla_nombres.indices
+
+    def number_of_nodes(self):
+        """Número de nodos del grafo"""
+        return len(self.nombres)
+
+    def number_of_edges(self):
+        """Número de aristas no dirigidas del grafo"""
+        return len(self.pesos_aristas)
+
+    def __contains__(self, nombre):
+        return nombre in self.indices
+
+    def __len__(self):
+        return self.number_of_nodes()
+
+    def id_nodo(self, nombre):
+        """
+        Obtener el identificador entero de un nodo
+
+        Raises:
+            KeyError: Si el nodo no existe en el grafo
+        """
+        return self.tabla_nombres.id_nodo(nombre)
+
+    def vecinos(self, nodo_id):
+        """Devolver (destinos, pesos) de los vecinos del nodo indicado"""
+        inicio, fin = self.offsets[nodo_id], self.offsets[nodo_id + 1]
+        return self.destinos[inicio:fin], self.pesos[inicio:fin]
+
+    def grados(self):
+        """Arreglo con el grado de cada nodo"""
+        return np.diff(self.offsets)
+
+    def posicion_arista(self, u, v):
+        """
+        Posición CSR de la arista u -> v, o -1 si no existe
+        """
+        inicio, fin = self.offsets[u], self.offsets[u + 1]
+        coincidencias = np.flatnonzero(self.destinos[inicio:fin] == v)
+        if len(coincidencias) == 0:
+            return -1
+        return inicio + coincidencias[0]
+
+    def posiciones_aristas(self, origenes, destinos):
+        """
+        Posiciones CSR de muchas aristas a la vez (por ejemplo, los tramos de una ruta)
+
+        Se comparan de una vez los vecinos de todos los orígenes, con coste
+        proporcional a la suma de sus grados.
+
+        Args:
+            origenes: Arreglo de IDs de origen
+            destinos: Arreglo de IDs de destino
+
+        Returns:
+            np.ndarray: Posición de cada arista origen -> destino, o -1 si no existe
+        """
+        origenes = np.asarray(origenes, dtype=np.int64)
+        destinos = np.asarray(destinos, dtype=np.int64)
+        inicios = self.offsets[origenes]
+        grados = self.offsets[origenes + 1] - inicios
+        # Posiciones de los vecinos de cada origen, una tras otra
+        arista = np.repeat(np.arange(len(origenes)), grados)
+        candidatas = np.arange(grados.sum()) + np.repeat(inicios - (np.cumsum(grados) - grados), grados)
+        coincide = self.destinos[candidatas] == destinos[arista]
+        posiciones = np.full(len(origenes), -1, dtype=np.int64)
+        posiciones[arista[coincide]] = candidatas[coincide]
+        return posiciones
+
+    def has_edge(self, origen, destino):
+        """Verificar si existe una arista entre dos nodos (por nombre)"""
+        if origen not in self.indices or destino not in self.indices:
+            return False
+        return self.posicion_arista(self.indices[origen], self.indices[destino]) >= 0
+
+    def peso_arista(self, origen, destino, metrica=None):
+        """
+        Obtener el peso de la arista entre dos nodos (por nombre)
+
+        Args:
+            metrica: Métrica del peso; por defecto la distancia (ver pesos_metrica)
+
+        Raises:
+            KeyError: Si la arista o la métrica no existen
+        """
+        return self.pesos_metrica(metrica)[self._posicion_por_nombre(origen, destino)].item()
+
+    def metricas(self):
+        """Nombres de las métricas de las aristas, empezando por la distancia"""
+        return [METRICA_DISTANCIA] + list(self.metricas_aristas)
+
+    def valores_metrica(self, metrica=None):
+        """
+        Valor de una métrica para cada arista (en el orden de `extremos`)
+
+        Args:
+            metrica: None (la distancia), nombre de una métrica o combinación
+                lineal {nombre: coeficiente} (ver normalizar_metrica)
+
+        Returns:
+            np.ndarray: Valores por arista; para una sola métrica sin escalar
+                es el arreglo del grafo, sin copiar
+
+        Raises:
+            KeyError: Si alguna métrica no existe en el grafo
+        """
+        combinacion = normalizar_metrica(metrica)
+        columnas = []
+        for nombre, _ in combinacion:
+            if nombre == METRICA_DISTANCIA:
+                columnas.append(self.pesos_aristas)
+            elif nombre in self.metricas_aristas:
+                columnas.append(self.metricas_aristas[nombre])
+            else:
+                raise KeyError(f"Métrica desconocida: {nombre}. Opciones: {', '.join(self.metricas())}")
+        if len(combinacion) == 1 and combinacion[0][1] == 1:
+            return columnas[0]
+        total = np.zeros(self.number_of_edges(), dtype=np.float64)
+        for (_, coeficiente), valores in zip(combinacion, columnas):
+            total += coeficiente * valores
+        return total
+
+    def pesos_metrica(self, metrica=None):
+        """
+        Pesos de una métrica en cada posición CSR (paralelos a `destinos`)
+
+        La distancia usa directamente `pesos`; para las demás métricas el
+        arreglo se prepara en la primera consulta, en O(aristas), y se
+        reutiliza hasta que cambien las aristas.
+
+        Raises:
+            KeyError: Si alguna métrica no existe en el grafo
+        """
+        clave = normalizar_metrica(metrica)
+        if clave == ((METRICA_DISTANCIA, 1.0),):
+            return self.pesos
+        if clave not in self._pesos_metricas:
+            self._pesos_metricas[clave] = self.valores_metrica(clave)[self.aristas]
+        return self._pesos_metricas[clave]
+
+    def agregar_metrica(self, nombre, valores):
+        """
+        Añadir o sustituir una métrica de las aristas
+
+        Args:
+            nombre: Nombre de la métrica (distinto de la distancia)
+            valores: Valor no negativo de cada arista, en el orden de `extremos`
+
+        Raises:
+            ValueError: Si la métrica es la distancia, el número de valores
+                no coincide con el de aristas o hay valores negativos o NaN
+        """
+        if nombre == METRICA_DISTANCIA:
+            raise ValueError("La distancia se modifica con cambiar_peso")
+        valores = np.asarray(valores)
+        if valores.shape != (self.number_of_edges(),):
+            raise ValueError(f"La métrica {nombre} debe tener un valor por arista "
+                             f"({self.number_of_edges()}, recibidos {len(valores)})")
+        if valores.dtype.kind not in 'iuf' or not (valores >= 0).all():
+            raise ValueError(f"Los valores de la métrica {nombre} deben ser números no negativos")
+        self.metricas_aristas[nombre] = valores
+        self._pesos_metricas = {clave: pesos for clave, pesos in self._pesos_metricas.items()
+                                if nombre not in dict(clave)}
+
+    def _posicion_por_nombre(self, origen, destino):
+        """Posición CSR de la arista origen -> destino (por nombre)"""
+        posicion = -1
+        if origen in self.indices and destino in self.indices:
+            posicion = self.posicion_arista(self.indices[origen], self.indices[destino])
+        if posicion < 0:
+            raise KeyError(f"No existe la arista {origen} - {destino}")
+        return posicion
+
+    def _reemplazar_aristas(self, extremos, pesos_aristas, atributos_aristas, metricas_aristas):
+        """Reconstruir los arreglos CSR con otro conjunto de aristas (mismos nodos)"""
+        nuevo = GrafoCSR.desde_arreglos(self.tabla_nombres, self.lat, self.lon, extremos[:, 0],
+                                        extremos[:, 1], pesos_aristas, atributos_aristas,
+                                        metricas_aristas)
+        for atributo in ('offsets', 'destinos', 'pesos', 'aristas', 'extremos',
+                         'pesos_aristas', 'atributos_aristas', 'metricas_aristas'):
+            setattr(self, atributo, getattr(nuevo, atributo))
+        self._pesos_metricas = {}
+
+    def eliminar_arista(self, origen, destino):
+        """
+        Eliminar la arista entre dos nodos (por nombre)
+
+        Los IDs de los nodos no cambian; los arreglos de aristas se
+        reconstruyen, con coste O(aristas).
+
+        Returns:
+            tuple: (peso, atributos) de la arista eliminada, con los
+                atributos categóricos y las demás métricas como diccionario
+                {nombre: valor}
+
+        Raises:
+            KeyError: Si la arista no existe
+        """
+        arista = self.aristas[self._posicion_por_nombre(origen, destino)]
+        peso = self.pesos_aristas[arista].item()
+        atributos = {nombre: categorias[codigos[arista]]
+                     for nombre, (codigos, categorias) in self.atributos_aristas.items()}
+        atributos.update((nombre, valores[arista].item()) for nombre, valores in self.metricas_aristas.items())
+
+        conservar = np.arange(self.number_of_edges()) != arista
+        self._reemplazar_aristas(
+            self.extremos[conservar], self.pesos_aristas[conservar],
+            {nombre: (codigos[conservar], categorias)
+             for nombre, (codigos, categorias) in self.atributos_aristas.items()},
+            {nombre: valores[conservar] for nombre, valores in self.metricas_aristas.items()}
+        )
+        return peso, atributos
+
+    def agregar_arista(self, origen, destino, peso, atributos=None):
+        """
+        Añadir una arista entre dos nodos existentes (por nombre)
+
+        Los arreglos de aristas se reconstruyen, con coste O(aristas). Si la
+        arista ya existe se sustituye.
+
+        Args:
+            origen: Nombre del primer nodo
+            destino: Nombre del segundo nodo
+            peso: Peso de la arista
+            atributos: Diccionario opcional {nombre: valor} con los atributos
+                categóricos y las demás métricas de la arista
+
+        Raises:
+            KeyError: Si algún nodo no existe en el grafo
+            ValueError: Si falta el valor de alguna métrica del grafo
+        """
+        u, v = self.id_nodo(origen), self.id_nodo(destino)
+        atributos = atributos or {}
+        faltantes = [nombre for nombre in self.metricas_aristas if nombre not in atributos]
+        if faltantes:
+            raise ValueError(f"Faltan métricas de la arista {origen} - {destino}: {', '.join(faltantes)}")
+        nuevas_metricas = {nombre: np.append(valores, atributos[nombre])
+                           for nombre, valores in self.metricas_aristas.items()}
+        nuevos_atributos = {}
+        for nombre, (codigos, categorias) in self.atributos_aristas.items():
+            valor = atributos.get(nombre)
+            categorias = list(categorias)
+            if valor not in categorias:
+                categorias.append(valor)
+            codigo = categorias.index(valor)
+            nuevas_categorias = np.empty(len(categorias), dtype=object)
+            nuevas_categorias[:] = categorias
+            nuevos_atributos[nombre] = (np.append(codigos, codigo).astype(codigos.dtype), nuevas_categorias)
+
+        pesos = np.append(self.pesos_aristas, peso)
+        if self.pesos_aristas.dtype.kind in 'iu' and pesos.dtype.kind == 'f':
+            pesos = pesos.astype(np.float64)
+        self._reemplazar_aristas(
+            np.concatenate([self.extremos, np.array([[u, v]], dtype=self.extremos.dtype)]),
+            pesos, nuevos_atributos, nuevas_metricas
+        )
+
+    def cambiar_peso(self, origen, destino, peso):
+        """
+        Cambiar el peso de la arista entre dos nodos (por nombre) en O(grado)
+
+        Si el nuevo peso no es entero y los pesos lo eran, los arreglos de
+        pesos pasan a float64. Los arreglos de solo lectura (los de un grafo
+        abierto desde memoria compartida, ver GrafoCompartido) se copian
+        antes de escribir en ellos.
+
+        Returns:
+            int o float: Peso anterior de la arista
+
+        Raises:
+            KeyError: Si la arista no existe
+        """
+        posicion = self._posicion_por_nombre(origen, destino)
+        arista = self.aristas[posicion]
+        anterior = self.pesos_aristas[arista].item()
+        if self.pesos.dtype.kind in 'iu' and not float(peso).is_integer():
+            self.pesos = self.pesos.astype(np.float64)
+            self.pesos_aristas = self.pesos_aristas.astype(np.float64)
+        if not self.pesos.flags.writeable:
+            self.pesos = self.pesos.copy()
+        if not self.pesos_aristas.flags.writeable:
+            self.pesos_aristas = self.pesos_aristas.copy()
+
+        u, v = self.indices[origen], self.indices[destino]
+        self.pesos[posicion] = peso
+        self.pesos[self.posicion_arista(v, u)] = peso
+        self.pesos_aristas[arista] = peso
+        # Las combinaciones que incluyen la distancia quedan obsoletas
+        self._pesos_metricas = {clave: pesos for clave, pesos in self._pesos_metricas.items()
+                                if METRICA_DISTANCIA not in dict(clave)}
+        return anterior
+
+    def componentes_conexas(self):
+        """
+        Calcular las componentes conexas mediante búsqueda en profundidad
+
+        Returns:
+            np.ndarray: Etiqueta de componente para cada nodo
+        """
+        etiquetas = np.full(self.number_of_nodes(), -1, dtype=np.int64)
+        siguiente_etiqueta = 0
+        for inicio in range(self.number_of_nodes()):
+            if etiquetas[inicio] >= 0:
+                continue
+            etiquetas[inicio] = siguiente_etiqueta
+            pendientes = [inicio]
+            while pendientes:
+                u = pendientes.pop()
+                for v in self.destinos[self.offsets[u]:self.offsets[u + 1]].tolist():
+                    if etiquetas[v] < 0:
+                        etiquetas[v] = siguiente_etiqueta
+                        pendientes.append(v)
+            siguiente_etiqueta += 1
+        return etiquetas
+
+    def nbytes(self):
+        """Memoria ocupada por los arreglos numéricos del grafo (en bytes)"""
+        arreglos = [self.lat, self.lon, self.offsets, self.destinos, self.pesos,
+                    self.aristas, self.extremos, self.pesos_aristas]
+        arreglos += [codigos for codigos, _ in self.atributos_aristas.values()]
+        arreglos += list(self.metricas_aristas.values())
+        return sum(arreglo.nbytes for arreglo in arreglos)
+
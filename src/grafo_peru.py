@@ -1,105 +1,970 @@
 import networkx as nx
+import numpy as np
 import pandas as pd
 import os
 
-def cargar_datos():
+from .almacenamiento import DIRECTORIO_DATOS, huella_archivos, rutas_tablas
+from .busqueda import (
+    alcance_acotado, astar_bidireccional_ruta, astar_ruta, cotas_haversine, dijkstra_ruta,
+    heuristica_haversine, vecinos_de, verificar_cota_haversine
+)
+from .carga_bloques import (  # cargar_grafo_por_bloques se reexporta junto a cargar_datos
+    COLUMNAS_DISTANCIAS, COLUMNAS_ENRIQUECIDAS, cargar_grafo_por_bloques, columnas_metricas,
+    leer_distancias
+)
+from .grafo_csr import GrafoCSR
+from .conectividad import ConectividadIncremental
+from .indice_adyacencia import IndiceAdyacencia
+from .indice_espacial import IndiceEspacial
+from .instantanea import ARCHIVO_INSTANTANEA, cargar_instantanea, guardar_instantanea
+from .jerarquia_contraccion import cargar_o_construir_jerarquia
+from .limites_regiones import (
+    ARCHIVO_LIMITROFES, ARCHIVO_POLIGONOS, LocalizadorRegiones, aristas_limitrofes, cargar_limitrofes,
+    normalizar_nombre,
+)
+from .metricas import (
+    COLUMNAS_METRICAS, METRICA_DISTANCIA, atributo_arista, coeficiente_distancia, es_distancia,
+    normalizar_metrica
+)
+from .nombres import TablaNombres
+from .resultado_ruta import ResultadoRuta
+from .rutas_alternativas import k_rutas_mas_cortas
+from .rutas_lote import matriz_distancias  # Reexportada junto a encontrar_ruta_mas_corta
+from .tabla_distancias import cargar_o_construir_tabla
+from .tablas import COLUMNAS_REGIONES, leer_tabla
+
+MOTORES = ('networkx', 'csr')
+METODOS_BUSQUEDA = ('dijkstra', 'astar', 'astar_bidireccional', 'ch', 'tabla')
+# Datos derivados del grafo que dejan de ser válidos cuando cambian sus aristas
+# (el índice espacial y los departamentos vecinos no dependen de ellas y se conservan)
+PRECALCULOS = ('adyacencia', 'conectividad', 'jerarquia', 'tabla_distancias', 'cota_haversine',
+               'subgrafo_limitrofe', 'grafo_csr')
+
+def cargar_datos(motor='networkx', directorio=None, usar_instantanea=True, progreso=None,
+                 formato=None):
     """
-    Cargar datos de regiones y distancias desde los archivos CSV
+    Cargar datos de regiones y distancias desde los archivos de datos
+    
+    Las tablas pueden ser CSV o, para cargas más rápidas, Parquet o Arrow
+    IPC con columnas tipadas (ver src/tablas.py), de las que solo se leen
+    las columnas necesarias. Las columnas de COLUMNAS_METRICAS (tiempo,
+    peajes, desnivel) se cargan, si existen, como métricas de las aristas
+    que las búsquedas pueden usar en lugar de la distancia. La primera carga compila las tablas en una
+    instantánea binaria (carpeta grafo_instantanea, junto a ellas); las
+    siguientes la leen directamente mientras su contenido no cambie. La
+    tabla de distancias se lee por bloques y se descartan las filas no
+    válidas (ver leer_distancias); para archivos que no caben en memoria,
+    ver cargar_grafo_por_bloques.
+    
+    Args:
+        motor: Motor del grafo: 'networkx' (por defecto) o 'csr' para el
+            grafo compacto basado en arreglos de NumPy
+        directorio: Carpeta con las tablas; por defecto la carpeta data del proyecto
+        usar_instantanea: Si es False se leen siempre las tablas
+        progreso: Función opcional progreso(bytes_leidos, bytes_totales),
+            llamada mientras se lee la tabla de distancias (con la
+            instantánea se llama una sola vez, al terminar)
+        formato: 'parquet', 'arrow' o 'csv'; por defecto el primero
+            disponible (ver rutas_tablas)
     
     Returns:
         tuple: (df_regiones, df_distancias, grafo) donde:
             - df_regiones: DataFrame con información de las regiones
             - df_distancias: DataFrame con las distancias entre regiones
-            - grafo: Grafo de NetworkX con las regiones y distancias
+            - grafo: Grafo (NetworkX o GrafoCSR) con las regiones y distancias
     """
     try:
-        # Rutas de los archivos de datos
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(script_dir)
+        if motor not in MOTORES:
+            raise ValueError(f"Motor de grafo desconocido: {motor}. Opciones: {', '.join(MOTORES)}")
         
-        regiones_path = os.path.join(parent_dir, 'data', 'regiones.csv')
+        # Rutas de los archivos de datos (el enriquecido si existe, si no el básico)
+        if directorio is None:
+            directorio = DIRECTORIO_DATOS
+        regiones_path, distancias_path, usar_enriquecido = rutas_tablas(directorio, formato)
+        fuentes = [regiones_path, distancias_path]
         
-        # Intentar usar el archivo enriquecido si existe, si no usar el básico
-        distancias_enriquecido_path = os.path.join(parent_dir, 'data', 'distancias_regionales_peru_enriquecido.csv')
-        distancias_path = os.path.join(parent_dir, 'data', 'distancias.csv')
+        # Intentar leer la instantánea compilada de estas mismas tablas
+        datos = None
+        if usar_instantanea:
+            huella = huella_archivos(fuentes)
+            ruta_instantanea = os.path.join(directorio, ARCHIVO_INSTANTANEA)
+            datos = cargar_instantanea(ruta_instantanea, huella)
         
-        # Cargar datos de regiones
-        df_regiones = pd.read_csv(regiones_path)
-        
-        # Determinar qué archivo de distancias usar
-        if os.path.exists(distancias_enriquecido_path):
-            df_distancias = pd.read_csv(distancias_enriquecido_path)
-            usar_enriquecido = True
+        if datos is not None:
+            df_regiones, df_distancias, grafo_csr, usar_enriquecido = datos
+            if progreso is not None:
+                tamano = os.path.getsize(distancias_path)
+                progreso(tamano, tamano)
+            if motor == 'csr':
+                grafo = grafo_csr
+            else:
+                grafo = crear_grafo(df_regiones, df_distancias, usar_enriquecido)
         else:
-            df_distancias = pd.read_csv(distancias_path)
-            usar_enriquecido = False
+            # Cargar datos de regiones y distancias
+            columnas = (COLUMNAS_DISTANCIAS + (COLUMNAS_ENRIQUECIDAS if usar_enriquecido else []) +
+                        columnas_metricas(distancias_path))
+            df_regiones = leer_tabla(regiones_path, COLUMNAS_REGIONES)
+            df_distancias = leer_distancias(distancias_path, columnas, progreso=progreso)
+            df_regiones, df_distancias = codificar_nombres(df_regiones, df_distancias)
+            
+            # Crear el grafo
+            grafo = crear_grafo(df_regiones, df_distancias, usar_enriquecido, motor=motor)
             
-        # Crear el grafo
-        grafo = crear_grafo(df_regiones, df_distancias, usar_enriquecido)
+            if usar_instantanea:
+                grafo_csr = grafo if motor == 'csr' else crear_grafo_csr(df_regiones, df_distancias, usar_enriquecido)
+                obtener_indice_adyacencia(grafo_csr)
+                try:
+                    guardar_instantanea(ruta_instantanea, huella, df_regiones, df_distancias,
+                                        usar_enriquecido, grafo_csr)
+                except OSError:
+                    # Carpeta de solo lectura: se seguirán leyendo las tablas
+                    pass
+        
+        # Índice de coordenadas para ajustar puntos GPS a las regiones
+        obtener_indice_espacial(grafo)
+        
+        # Departamentos vecinos según sus polígonos, si ya se calcularon
+        # (python -m src.limites_regiones)
+        pares = cargar_limitrofes(os.path.join(directorio, ARCHIVO_LIMITROFES))
+        if pares is not None:
+            asignar_regiones_limitrofes(grafo, pares)
+        
+        # Polígonos para localizar puntos (el localizador se crea al usarlo)
+        ruta_poligonos = os.path.join(directorio, ARCHIVO_POLIGONOS)
+        if os.path.exists(ruta_poligonos):
+            grafo.graph['poligonos'] = ruta_poligonos
+        
+        # Guardar los archivos de origen para validar los datos precalculados
+        grafo.graph['fuentes'] = fuentes
+        if usar_instantanea:
+            grafo.graph['huella'] = huella
         
         return df_regiones, df_distancias, grafo
         
     except Exception as e:
         raise Exception(f"Error al cargar datos: {str(e)}")
 
-def crear_grafo(df_regiones, df_distancias, usar_enriquecido=False):
+def crear_grafo(df_regiones, df_distancias, usar_enriquecido=False, motor='networkx'):
     """
-    Crear un grafo de NetworkX con las regiones y distancias
+    Crear un grafo con las regiones y distancias
+    
+    Las columnas de COLUMNAS_METRICAS presentes en df_distancias se guardan
+    como métricas de las aristas (atributos con el nombre de la columna en
+    NetworkX, arreglos por arista en el GrafoCSR).
     
     Args:
         df_regiones: DataFrame con información de las regiones
         df_distancias: DataFrame con las distancias entre regiones
         usar_enriquecido: Si es True, usar columnas de región_origen y región_destino
+        motor: 'networkx' para un networkx.Graph o 'csr' para un GrafoCSR
     
     Returns:
-        networkx.Graph: Grafo con las regiones y distancias
+        networkx.Graph o GrafoCSR: Grafo con las regiones y distancias
     """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de grafo desconocido: {motor}. Opciones: {', '.join(MOTORES)}")
+    
+    if motor == 'csr':
+        grafo = crear_grafo_csr(df_regiones, df_distancias, usar_enriquecido)
+        obtener_indice_adyacencia(grafo)
+        return grafo
+    
     grafo = nx.Graph()
     
-    # Añadir nodos (regiones)
-    for idx, region in df_regiones.iterrows():
-        grafo.add_node(region['region'], 
-                      lat=region['latitude'], 
-                      lon=region['longitude'])
+    # Añadir nodos (regiones) en bloque a partir de las columnas
+    grafo.add_nodes_from(
+        (region, {'lat': lat, 'lon': lon})
+        for region, lat, lon in zip(df_regiones['region'].tolist(),
+                                    df_regiones['latitude'].tolist(),
+                                    df_regiones['longitude'].tolist())
+    )
     
-    # Añadir aristas (conexiones entre regiones)
-    for idx, ruta in df_distancias.iterrows():
-        origen = ruta['origen']
-        destino = ruta['destino']
-        
-        # Si estamos usando el dataset enriquecido, podemos verificar adyacencia
-        if usar_enriquecido:
-            region_origen = ruta['region_origen'] 
-            region_destino = ruta['region_destino']
-            grafo.add_edge(origen, destino, 
-                         weight=ruta['distancia_km'],
-                         region_origen=region_origen,
-                         region_destino=region_destino)
-        else:
-            grafo.add_edge(origen, destino, 
-                         weight=ruta['distancia_km'])
+    # Añadir aristas (conexiones entre regiones) en bloque
+    origenes = df_distancias['origen'].tolist()
+    destinos = df_distancias['destino'].tolist()
+    pesos = df_distancias['distancia_km'].tolist()
+    
+    # Con el dataset enriquecido se guardan las regiones de cada extremo
+    # (para verificar adyacencia), además de las otras métricas
+    atributos = COLUMNAS_ENRIQUECIDAS if usar_enriquecido else []
+    atributos = atributos + [columna for columna in COLUMNAS_METRICAS if columna in df_distancias]
+    if atributos:
+        columnas = [df_distancias[columna].tolist() for columna in atributos]
+        grafo.add_edges_from(
+            (origen, destino, {'weight': peso, **dict(zip(atributos, valores))})
+            for origen, destino, peso, *valores in zip(origenes, destinos, pesos, *columnas)
+        )
+    else:
+        grafo.add_weighted_edges_from(zip(origenes, destinos, pesos), weight='weight')
+    
+    # Índice de adyacencia para las verificaciones de solo_adyacentes
+    obtener_indice_adyacencia(grafo)
     
     return grafo
 
-def son_adyacentes(df_distancias, origen, destino):
+def extraer_arreglos(df_regiones, df_distancias, usar_enriquecido=False):
     """
-    Verificar si dos regiones son adyacentes geográficamente
+    Convertir las columnas de regiones y distancias en arreglos de nodos y aristas
+    
+    Los nombres se convierten en IDs enteros en el mismo orden en que
+    NetworkX insertaría los nodos: primero las regiones y después los
+    extremos de las aristas que no figuran en df_regiones, intercalando
+    origen y destino de cada arista como add_edges_from (el mismo orden que
+    carga_bloques.AcumuladorAristas). Si las columnas de nombres están
+    codificadas con codificar_nombres, se numeran sus códigos en lugar de
+    los textos.
+    
+    Args:
+        df_regiones: DataFrame con información de las regiones
+        df_distancias: DataFrame con las distancias entre regiones
+        usar_enriquecido: Si es True, incluir region_origen y region_destino
+    
+    Returns:
+        dict: Diccionario con los arreglos 'nombres', 'lat', 'lon', 'origenes',
+            'destinos', 'pesos', 'atributos_aristas' y 'metricas_aristas'
+    """
+    columnas = [df_regiones['region'], df_distancias['origen'], df_distancias['destino']]
+    tipo = columnas[0].dtype
+    if isinstance(tipo, pd.CategoricalDtype) and all(columna.dtype == tipo for columna in columnas[1:]):
+        # Nombres ya codificados (ver codificar_nombres): se numeran los códigos sin comparar textos
+        region, origen, destino = (columna.cat.codes.to_numpy() for columna in columnas)
+        todos = pd.Categorical.from_codes(_concatenar_extremos(region, origen, destino), dtype=tipo)
+    else:
+        todos = _concatenar_extremos(*(columna.to_numpy(dtype=object) for columna in columnas))
+    codigos, nombres = pd.factorize(todos)
+    
+    num_regiones = len(df_regiones)
+    codigos_regiones = codigos[:num_regiones]
+    
+    # Coordenadas por nodo; los nodos que solo aparecen en aristas quedan en NaN
+    lat = np.full(len(nombres), np.nan)
+    lon = np.full(len(nombres), np.nan)
+    lat[codigos_regiones] = df_regiones['latitude'].to_numpy(dtype=np.float64)
+    lon[codigos_regiones] = df_regiones['longitude'].to_numpy(dtype=np.float64)
+    
+    atributos = {}
+    if usar_enriquecido:
+        atributos = {
+            columna: pd.factorize(df_distancias[columna])
+            for columna in ('region_origen', 'region_destino')
+        }
+    
+    return {
+        'nombres': np.asarray(nombres, dtype=object),
+        'lat': lat,
+        'lon': lon,
+        'origenes': codigos[num_regiones::2],
+        'destinos': codigos[num_regiones + 1::2],
+        'pesos': df_distancias['distancia_km'].to_numpy(),
+        'atributos_aristas': atributos,
+        'metricas_aristas': {columna: df_distancias[columna].to_numpy()
+                             for columna in COLUMNAS_METRICAS if columna in df_distancias}
+    }
+
+def _concatenar_extremos(regiones, origenes, destinos):
+    """Regiones seguidas de los extremos de las aristas intercalados (origen, destino)"""
+    return np.concatenate((regiones, np.column_stack((origenes, destinos)).ravel()))
+
+def codificar_nombres(df_regiones, df_distancias):
+    """
+    Codificar los nombres de las regiones con una tabla de nombres común
+    
+    Las columnas region, origen y destino pasan a ser categóricas sobre los
+    mismos textos, en el orden de los IDs de los nodos (ver extraer_arreglos):
+    cada nombre se guarda una sola vez, las comparaciones con un nombre son
+    comparaciones de enteros y el grafo se construye a partir de los códigos.
+    
+    Args:
+        df_regiones: DataFrame con información de las regiones
+        df_distancias: DataFrame con las distancias entre regiones
+    
+    Returns:
+        tuple: (df_regiones, df_distancias) con las columnas codificadas
+    """
+    num_regiones = len(df_regiones)
+    todos = _concatenar_extremos(*(df[columna].to_numpy(dtype=object) for df, columna in
+                                   ((df_regiones, 'region'), (df_distancias, 'origen'),
+                                    (df_distancias, 'destino'))))
+    codigos, nombres = pd.factorize(todos)
+    tipo = TablaNombres(nombres).tipo
+    
+    def categorica(codigos):
+        return pd.Categorical.from_codes(codigos, dtype=tipo)
+    
+    df_regiones = df_regiones.assign(region=categorica(codigos[:num_regiones]))
+    df_distancias = df_distancias.assign(origen=categorica(codigos[num_regiones::2]),
+                                         destino=categorica(codigos[num_regiones + 1::2]))
+    return df_regiones, df_distancias
+
+def crear_grafo_csr(df_regiones, df_distancias, usar_enriquecido=False):
+    """
+    Crear un grafo compacto (GrafoCSR) con las regiones y distancias
     
     Args:
+        df_regiones: DataFrame con información de las regiones
         df_distancias: DataFrame con las distancias entre regiones
+        usar_enriquecido: Si es True, conservar region_origen y region_destino
+    
+    Returns:
+        GrafoCSR: Grafo con las regiones y distancias
+    """
+    return GrafoCSR.desde_arreglos(**extraer_arreglos(df_regiones, df_distancias, usar_enriquecido))
+
+def obtener_indice_adyacencia(grafo):
+    """
+    Índice de adyacencia del grafo, construido una vez por grafo
+    
+    crear_grafo lo construye al cargar los datos; si el grafo se modifica
+    (ver marcar_grafo_modificado) o cambian sus nodos o aristas de NetworkX
+    directamente, se reconstruye en el siguiente uso. Si
+    el grafo tiene los departamentos vecinos (ver asignar_regiones_limitrofes),
+    solo cuentan las aristas limítrofes.
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+    
+    Returns:
+        IndiceAdyacencia: Índice de los pares de regiones conectadas
+    """
+    if not _precalculo_vigente(grafo, 'adyacencia'):
+        subgrafo = obtener_subgrafo_limitrofe(grafo)
+        _guardar_precalculo(grafo, 'adyacencia',
+                            IndiceAdyacencia.desde_grafo(subgrafo if subgrafo is not None else grafo))
+    return grafo.graph['adyacencia']
+
+def _tamano_networkx(grafo):
+    """Número de nodos y aristas de un grafo de NetworkX (None para el GrafoCSR)"""
+    if isinstance(grafo, GrafoCSR):
+        return None
+    return grafo.number_of_nodes(), grafo.number_of_edges()
+
+def _precalculo_vigente(grafo, clave):
+    """
+    Si el precálculo grafo.graph[clave] corresponde a los tramos actuales
+    
+    Un grafo de NetworkX se puede editar directamente (add_edge,
+    remove_node...) sin pasar por marcar_grafo_modificado; esas ediciones
+    se notan en que el número de nodos o de aristas ya no es el que tenía
+    al calcularse el precálculo. Contar las aristas de NetworkX es O(N),
+    así que solo se comprueba en los precálculos de la estructura del grafo.
+    """
+    if clave not in grafo.graph:
+        return False
+    return grafo.graph.get('tamanos', {}).get(clave) == _tamano_networkx(grafo)
+
+def _guardar_precalculo(grafo, clave, valor):
+    """Guardar un precálculo con el tamaño del grafo (ver _precalculo_vigente)"""
+    grafo.graph[clave] = valor
+    # Un diccionario nuevo: grafo.copy() comparte los valores de grafo.graph
+    grafo.graph['tamanos'] = {**grafo.graph.get('tamanos', {}), clave: _tamano_networkx(grafo)}
+    return valor
+
+def asignar_regiones_limitrofes(grafo, pares):
+    """
+    Registrar qué departamentos comparten frontera
+    
+    cargar_datos lo hace con el archivo que genera src/limites_regiones.py.
+    Desde entonces son adyacentes las aristas que unen nodos del mismo
+    departamento o de departamentos vecinos, y solo_adyacentes busca en el
+    subgrafo de esas aristas (ver obtener_subgrafo_limitrofe).
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        pares: Pares (region_a, region_b) de departamentos vecinos
+    
+    Returns:
+        int: Nueva versión del grafo
+    """
+    grafo.graph['regiones_limitrofes'] = list(pares)
+    # Cambia lo que significa solo_adyacentes: nueva versión para las cachés
+    # de rutas. Las aristas no cambian, así que el resto de los precálculos
+    # (y su correspondencia con los CSV) siguen valiendo
+    marcar_grafo_modificado(grafo, conservar=('conectividad', 'jerarquia', 'tabla_distancias',
+                                              'cota_haversine', 'fuentes', 'huella'))
+    return version_grafo(grafo)
+
+def obtener_subgrafo_limitrofe(grafo):
+    """
+    Subgrafo con solo las aristas entre departamentos iguales o vecinos
+    
+    Se construye una vez por grafo (y de nuevo tras modificar sus aristas,
+    también con add_edge o remove_edge de NetworkX).
+    En NetworkX cada arista recibe el atributo 'limitrofe' y el subgrafo es
+    una vista filtrada; en el GrafoCSR es otro GrafoCSR con la misma tabla
+    de nombres, así que los IDs de los nodos coinciden.
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+    
+    Returns:
+        networkx.Graph, GrafoCSR o None: Subgrafo, o None si el grafo no
+            tiene los departamentos vecinos
+    """
+    pares = grafo.graph.get('regiones_limitrofes')
+    if pares is None:
+        return None
+    if not _precalculo_vigente(grafo, 'subgrafo_limitrofe'):
+        if isinstance(grafo, GrafoCSR):
+            limitrofe = aristas_limitrofes(*_regiones_extremos(grafo), pares)
+            extremos = grafo.extremos[limitrofe]
+            subgrafo = GrafoCSR.desde_arreglos(
+                grafo.tabla_nombres, grafo.lat, grafo.lon, extremos[:, 0], extremos[:, 1],
+                grafo.pesos_aristas[limitrofe],
+                {nombre: (codigos[limitrofe], categorias)
+                 for nombre, (codigos, categorias) in grafo.atributos_aristas.items()},
+                {nombre: valores[limitrofe] for nombre, valores in grafo.metricas_aristas.items()}
+            )
+        else:
+            limitrofe = aristas_limitrofes(*_regiones_extremos(grafo), pares)
+            nx.set_edge_attributes(grafo, dict(zip(grafo.edges, limitrofe.tolist())), 'limitrofe')
+            subgrafo = nx.subgraph_view(grafo, filter_edge=lambda u, v: grafo[u][v].get('limitrofe', False))
+        _guardar_precalculo(grafo, 'subgrafo_limitrofe', subgrafo)
+    return grafo.graph['subgrafo_limitrofe']
+
+def _regiones_extremos(grafo):
+    """
+    Departamento de los dos extremos de cada arista
+    
+    Con el dataset enriquecido son las columnas region_origen y
+    region_destino; si no, el nombre del nodo (las regiones del CSV).
+    """
+    if isinstance(grafo, GrafoCSR):
+        if all(columna in grafo.atributos_aristas for columna in COLUMNAS_ENRIQUECIDAS):
+            regiones = []
+            for columna in COLUMNAS_ENRIQUECIDAS:
+                codigos, categorias = grafo.atributos_aristas[columna]
+                categorias = np.append(np.asarray(categorias, dtype=object), None)
+                regiones.append(categorias[codigos])  # el código -1 (sin valor) da None
+            return regiones
+        return grafo.nombres[grafo.extremos[:, 0]], grafo.nombres[grafo.extremos[:, 1]]
+    
+    origenes, destinos = [], []
+    for u, v, datos in grafo.edges(data=True):
+        origenes.append(datos.get('region_origen', u))
+        destinos.append(datos.get('region_destino', v))
+    return origenes, destinos
+
+def obtener_indice_espacial(grafo):
+    """
+    Índice espacial de las coordenadas de los nodos, construido una vez por grafo
+    
+    cargar_datos lo construye al cargar los datos. Requiere scipy.
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+    
+    Returns:
+        IndiceEspacial: k-d tree de las regiones con coordenadas
+    """
+    if 'indice_espacial' not in grafo.graph:
+        grafo.graph['indice_espacial'] = IndiceEspacial.desde_grafo(grafo)
+    return grafo.graph['indice_espacial']
+
+def ajustar_coordenadas(grafo, latitudes, longitudes, k=1, distancia_maxima=None):
+    """
+    Regiones más cercanas a uno o muchos puntos (por ejemplo, posiciones GPS)
+    
+    Todos los puntos se resuelven en una sola consulta al índice espacial;
+    las regiones devueltas sirven de origen o destino de las búsquedas. Un
+    nodo sin aristas (en el dataset enriquecido, el de un departamento cuyas
+    aristas unen sus ciudades) se cambia por el nodo de entrada de su
+    departamento (ver nodos_departamentos); la distancia sigue siendo la
+    del nodo ajustado.
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        latitudes: Latitud de un punto o arreglo de latitudes
+        longitudes: Longitud de un punto o arreglo de longitudes
+        k: Número de regiones por punto
+        distancia_maxima: Distancia máxima opcional (km); si no hay ninguna
+            región más cerca la región es None y la distancia inf
+    
+    Returns:
+        tuple: (regiones, distancias) con los nombres de las regiones y su
+            distancia en km, un valor por punto (o k por punto); para un
+            punto suelto, el nombre y la distancia directamente con k=1
+    """
+    indice = obtener_indice_espacial(grafo)
+    ids, distancias = indice.cercanos(latitudes, longitudes, k, distancia_maxima)
+    nombres = np.append(indice.tabla_nombres.nombres, None)
+    # Cada nodo distinto se comprueba (y traduce) una sola vez
+    unicos, posiciones = np.unique(ids, return_inverse=True)
+    regiones = _nodos_de_entrada(grafo, nombres[unicos])[posiciones.reshape(np.shape(ids))]
+    if np.ndim(regiones) == 0:
+        return regiones, distancias.item()
+    return regiones, distancias
+
+def _nodos_de_entrada(grafo, nodos):
+    """
+    Cambiar los nodos sin aristas por el nodo de entrada de su departamento
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        nodos: Arreglo de nombres de nodos del grafo (None si no hay nodo)
+    
+    Returns:
+        np.ndarray: Los mismos nodos, con los aislados traducidos (ver
+            nodos_departamentos)
+    """
+    nodos = np.array(nodos, dtype=object)
+    existentes = np.flatnonzero(pd.notna(nodos))
+    if isinstance(grafo, GrafoCSR):
+        aislados = grafo.grados()[grafo.tabla_nombres.ids(nodos[existentes])] == 0
+    else:
+        aislados = np.array([grafo.degree(nodo) == 0 for nodo in nodos[existentes].tolist()], dtype=bool)
+    aislados = existentes[aislados]
+    if len(aislados):
+        entradas = nodos_departamentos(grafo)
+        nodos[aislados] = [entradas.get(normalizar_nombre(nodo), nodo) for nodo in nodos[aislados].tolist()]
+    return nodos
+
+def regiones_en_radio(grafo, latitudes, longitudes, radio_km):
+    """
+    Regiones a menos de cierta distancia (en línea recta) de cada punto
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        latitudes: Latitud de un punto o arreglo de latitudes
+        longitudes: Longitud de un punto o arreglo de longitudes
+        radio_km: Distancia máxima de círculo máximo (incluida)
+    
+    Returns:
+        list: Por cada punto, tupla (regiones, distancias) de arreglos
+            ordenados de la más cercana a la más lejana
+    """
+    indice = obtener_indice_espacial(grafo)
+    offsets, ids, distancias = indice.en_radio(latitudes, longitudes, radio_km)
+    regiones = indice.tabla_nombres.nombres[ids]
+    return [(regiones[inicio:fin], distancias[inicio:fin])
+            for inicio, fin in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+def obtener_localizador_regiones(grafo):
+    """
+    Localizador de puntos por polígonos de departamento, creado una vez por grafo
+    
+    Usa los polígonos que guarda python -m src.limites_regiones junto a las
+    tablas (cargar_datos anota su ruta). Requiere geopandas y shapely.
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+    
+    Returns:
+        LocalizadorRegiones: STRtree sobre los polígonos de los departamentos
+    
+    Raises:
+        FileNotFoundError: Si no hay polígonos para los datos del grafo
+    """
+    if 'localizador_regiones' not in grafo.graph:
+        ruta = grafo.graph.get('poligonos')
+        if ruta is None:
+            raise FileNotFoundError(
+                f"No se encontró {ARCHIVO_POLIGONOS}; generarlo con python -m src.limites_regiones"
+            )
+        grafo.graph['localizador_regiones'] = LocalizadorRegiones.desde_archivo(ruta, columna='region')
+    return grafo.graph['localizador_regiones']
+
+def localizar_regiones(grafo, latitudes, longitudes, ajustar_fuera=False, distancia_maxima=None):
+    """
+    Departamento que contiene cada punto de un arreglo de coordenadas
+    
+    Pensado para lotes grandes (por ejemplo, las coordenadas de entrega de
+    un día) antes de calcular sus rutas: todos los puntos se resuelven con
+    el STRtree de los polígonos, por bloques (ver LocalizadorRegiones).
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        latitudes: Arreglo de latitudes
+        longitudes: Arreglo de longitudes
+        ajustar_fuera: Si es True, los puntos fuera de todos los polígonos
+            (en el mar o con límites imprecisos) se asignan a la región más
+            cercana del índice espacial (como en ajustar_coordenadas, pero sin
+            cambiarla por su nodo de entrada)
+        distancia_maxima: Distancia máxima (km) para ese ajuste
+    
+    Returns:
+        np.ndarray: Nombre de la región de cada punto, None si no tiene
+    """
+    latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+    longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+    localizador = obtener_localizador_regiones(grafo)
+    regiones = localizador.nombres_de(localizador.localizar(latitudes, longitudes))
+    if ajustar_fuera:
+        fuera = np.flatnonzero(pd.isna(regiones))
+        if len(fuera):
+            # La región del nodo más cercano, sin traducirla a su nodo de entrada
+            indice = obtener_indice_espacial(grafo)
+            ids, _ = indice.cercanos(latitudes[fuera], longitudes[fuera], distancia_maxima=distancia_maxima)
+            regiones[fuera] = np.append(indice.tabla_nombres.nombres, None)[ids]
+    return regiones
+
+def pares_desde_coordenadas(grafo, latitudes_origen, longitudes_origen, latitudes_destino,
+                            longitudes_destino, ajustar_fuera=False, distancia_maxima=None):
+    """
+    Pares origen-destino de regiones a partir de coordenadas, para encontrar_rutas_lote
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        latitudes_origen, longitudes_origen: Coordenadas de los orígenes
+        latitudes_destino, longitudes_destino: Coordenadas de los destinos
+        ajustar_fuera, distancia_maxima: Como en localizar_regiones
+    
+    Returns:
+        tuple: (indices, pares) con las posiciones de los puntos cuyos dos
+            extremos tienen región y la lista de sus tuplas (origen, destino),
+            con cada departamento traducido a su nodo (ver nodos_departamentos)
+    """
+    nodos = nodos_departamentos(grafo)
+    
+    def nodos_de(regiones):
+        # Cada región distinta se traduce una sola vez
+        codigos, unicas = pd.factorize(regiones)
+        traducidas = np.empty(len(unicas) + 1, dtype=object)
+        traducidas[:-1] = [nodos.get(normalizar_nombre(region), region) for region in unicas.tolist()]
+        return traducidas[codigos]
+    
+    origenes = nodos_de(localizar_regiones(grafo, latitudes_origen, longitudes_origen, ajustar_fuera,
+                                           distancia_maxima))
+    destinos = nodos_de(localizar_regiones(grafo, latitudes_destino, longitudes_destino, ajustar_fuera,
+                                           distancia_maxima))
+    # Las regiones que no son nodos del grafo no tienen ruta
+    tabla_nombres = obtener_indice_espacial(grafo).tabla_nombres
+    validos = (tabla_nombres.ids(origenes) >= 0) & (tabla_nombres.ids(destinos) >= 0)
+    indices = np.flatnonzero(validos)
+    return indices, list(zip(origenes[indices].tolist(), destinos[indices].tolist()))
+
+def nodos_departamentos(grafo):
+    """
+    Nodo por el que se entra en la red de cada departamento
+    
+    Con el dataset enriquecido las aristas unen ciudades y el nodo de un
+    departamento puede no tener aristas; se elige el nodo con más aristas
+    cuyo extremo pertenece a ese departamento (su ciudad principal). Sin
+    él, cada departamento es su propio nodo.
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+    
+    Returns:
+        dict: Nombre normalizado del departamento (ver normalizar_nombre) -> nodo
+    """
+    regiones_origen, regiones_destino = _regiones_extremos(grafo)
+    if isinstance(grafo, GrafoCSR):
+        origenes, destinos = grafo.nombres[grafo.extremos[:, 0]], grafo.nombres[grafo.extremos[:, 1]]
+        columnas = [(origenes, regiones_origen), (destinos, regiones_destino)]
+    else:
+        origenes, destinos = zip(*grafo.edges) if grafo.number_of_edges() else ((), ())
+        # Una arista de NetworkX no recuerda qué extremo era el origen de la
+        # fila: cada extremo recibe los dos departamentos y se queda con el
+        # que aparece en todas sus aristas
+        columnas = [(nodos, regiones) for nodos in (origenes, destinos)
+                    for regiones in (regiones_origen, regiones_destino)]
+    aristas = np.arange(len(origenes))
+    extremos = pd.DataFrame({
+        'arista': np.tile(aristas, len(columnas)),
+        'nodo': np.concatenate([np.asarray(nodos, dtype=object) for nodos, _ in columnas]),
+        'departamento': np.concatenate([np.asarray(regiones, dtype=object) for _, regiones in columnas]),
+    }).dropna()
+    extremos['departamento'] = extremos['departamento'].map(normalizar_nombre)
+    conteos = extremos.drop_duplicates().groupby(['nodo', 'departamento'], sort=False).size()
+    conteos = conteos.rename('aristas').reset_index()
+    conteos['propio'] = conteos['nodo'].map(normalizar_nombre) == conteos['departamento']
+    # Departamento de cada nodo: el de más aristas (el de su nombre, ante un
+    # empate); el primer nodo de cada departamento es el de más aristas
+    conteos = conteos.sort_values(['aristas', 'propio'], ascending=False, kind='stable')
+    propios = conteos.drop_duplicates('nodo').drop_duplicates('departamento')
+    return dict(zip(propios['departamento'].tolist(), propios['nodo'].tolist()))
+
+def son_adyacentes(datos, origen, destino):
+    """
+    Verificar si dos regiones son adyacentes geográficamente
+    
+    Args:
+        datos: Grafo (NetworkX o GrafoCSR), cuyo índice de adyacencia
+            responde en O(1), o DataFrame con las distancias entre regiones
+            (el índice se construye en cada llamada)
         origen: Nombre de la región de origen
         destino: Nombre de la región de destino
     
     Returns:
         bool: True si son adyacentes, False en caso contrario
     """
-    # Implementación básica: Verificar si hay una entrada directa en el DataFrame
-    filtro = ((df_distancias['origen'] == origen) & (df_distancias['destino'] == destino)) | \
-             ((df_distancias['origen'] == destino) & (df_distancias['destino'] == origen))
+    if isinstance(datos, pd.DataFrame):
+        indice = IndiceAdyacencia.desde_distancias(datos)
+    elif isinstance(datos, GrafoCSR):
+        indice = obtener_indice_adyacencia(datos)
+    else:
+        # En NetworkX se consulta el grafo actual (sin contar sus aristas)
+        subgrafo = obtener_subgrafo_limitrofe(datos)
+        return (subgrafo if subgrafo is not None else datos).has_edge(origen, destino)
+    return indice.son_adyacentes(origen, destino)
+
+def son_adyacentes_lote(grafo, origenes, destinos):
+    """
+    Verificar la adyacencia de muchos pares de regiones a la vez
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        origenes: Secuencia de nombres de las regiones de origen
+        destinos: Secuencia de nombres de las regiones de destino
+    
+    Returns:
+        np.ndarray: Arreglo booleano, True para los pares adyacentes
+    """
+    return obtener_indice_adyacencia(grafo).son_adyacentes_lote(origenes, destinos)
+
+def buscar_ruta(grafo, origen, destino, solo_adyacentes=False, metodo='dijkstra',
+                estadisticas=None, metrica=None):
+    """
+    Buscar la ruta más corta con una sola búsqueda
+    
+    Devuelve a la vez la ruta, la distancia total y la distancia de cada
+    tramo, sin recorrer de nuevo el grafo. Con otra métrica (tiempo,
+    peajes o una combinación) la ruta es la de menor coste en esa métrica y
+    la distancia y los tramos se expresan en ella.
+    
+    Args:
+        grafo: Grafo con las regiones y distancias (NetworkX o GrafoCSR)
+        origen: Región de origen
+        destino: Región de destino
+        solo_adyacentes: Si es True, recorrer solo aristas entre departamentos
+            iguales o vecinos (ver asignar_regiones_limitrofes; 'ch' y
+            'tabla' pasan a A* sobre ese subgrafo). Sin los departamentos
+            vecinos se verifica que cada tramo sea una arista del grafo
+        metodo: 'dijkstra', 'astar' (A* con la distancia de círculo máximo como
+            cota), 'astar_bidireccional', 'ch' (jerarquía de contracción
+            precalculada, ver obtener_jerarquia) o 'tabla' (distancias entre
+            todos los pares precalculadas, ver obtener_tabla)
+        estadisticas: Diccionario opcional donde se guarda 'nodos_asentados'
+        metrica: None (la distancia), nombre de una métrica de las aristas o
+            combinación lineal {nombre: coeficiente} (ver metricas_grafo);
+            'ch' y 'tabla' solo admiten la distancia
+    
+    Returns:
+        tuple: (ruta, distancia, segmentos) donde segmentos es la lista de
+            distancias de cada tramo, o (None, 0, []) si no existe camino
+    
+    Raises:
+        ValueError: Si el método o la métrica no son válidos
+        KeyError: Si alguna métrica no existe en el grafo
+    """
+    tabla_nombres, ruta, distancia, segmentos = _buscar(grafo, origen, destino, solo_adyacentes, metodo,
+                                                        estadisticas, metrica)
+    if ruta is None:
+        return None, 0, []
+    if tabla_nombres is not None:
+        ruta = tabla_nombres.nombres_de(ruta)
+    return ruta, distancia, segmentos
+
+def _buscar(grafo, origen, destino, solo_adyacentes, metodo, estadisticas, metrica):
+    """
+    Búsqueda de buscar_ruta sin traducir la ruta a nombres
+    
+    Returns:
+        tuple: (tabla_nombres, ruta, distancia, segmentos) donde ruta son
+            los IDs de los nodos en tabla_nombres, o sus nombres si el grafo
+            es de NetworkX (y entonces tabla_nombres es None); ruta es None
+            si no existe camino
+    """
+    if metodo not in METODOS_BUSQUEDA:
+        raise ValueError(f"Método de búsqueda desconocido: {metodo}. "
+                         f"Opciones: {', '.join(METODOS_BUSQUEDA)}")
+    if metodo in ('ch', 'tabla') and not es_distancia(metrica):
+        raise ValueError(f"El método {metodo} está precalculado con la distancia; "
+                         f"con otras métricas use dijkstra, astar o astar_bidireccional")
+    
+    # Con los departamentos vecinos, solo_adyacentes busca directamente en el
+    # subgrafo de aristas limítrofes; los precálculos son del grafo completo,
+    # así que ahí se usa A*
+    subgrafo = obtener_subgrafo_limitrofe(grafo) if solo_adyacentes else None
+    if subgrafo is not None:
+        grafo = subgrafo
+        solo_adyacentes = False
+        if metodo in ('ch', 'tabla'):
+            metodo = 'astar'
+    
+    tabla_nombres = None
+    if metodo in ('ch', 'tabla'):
+        precalculo = obtener_jerarquia(grafo) if metodo == 'ch' else obtener_tabla(grafo)
+        ruta, distancia, segmentos = precalculo.consultar(
+            precalculo.id_nodo(origen), precalculo.id_nodo(destino), estadisticas
+        )
+        tabla_nombres = precalculo.tabla_nombres
+    elif isinstance(grafo, GrafoCSR):
+        ruta, distancia, segmentos = _ejecutar_busqueda(
+            grafo, grafo.id_nodo(origen), grafo.id_nodo(destino), metodo, estadisticas, metrica
+        )
+        tabla_nombres = grafo.tabla_nombres
+    else:
+        for nodo in (origen, destino):
+            if nodo not in grafo:
+                raise nx.NodeNotFound(f"El nodo {nodo} no existe en el grafo")
+        ruta, distancia, segmentos = _ejecutar_busqueda(grafo, origen, destino, metodo, estadisticas,
+                                                        metrica)
+    
+    if ruta is None:
+        return tabla_nombres, None, 0, []
+    
+    # Verificar adyacencia si se solicita
+    if solo_adyacentes:
+        if tabla_nombres is None:
+            # Ruta de NetworkX: cada tramo contra el grafo actual, con sus ediciones
+            adyacentes = all(grafo.has_edge(u, v) for u, v in zip(ruta[:-1], ruta[1:]))
+        else:
+            nombres = tabla_nombres.nombres_de(ruta)
+            adyacentes = son_adyacentes_lote(grafo, nombres[:-1], nombres[1:]).all()
+        if not adyacentes:
+            return tabla_nombres, None, 0, []
+    
+    return tabla_nombres, ruta, distancia, segmentos
+
+def _ejecutar_busqueda(grafo, origen, destino, metodo, estadisticas, metrica=None):
+    """Ejecutar el algoritmo elegido sobre nodos internos del grafo"""
+    vecinos = vecinos_de(grafo, metrica)
+    if metodo == 'dijkstra':
+        return dijkstra_ruta(vecinos, origen, destino, estadisticas)
+    
+    # La línea recta solo acota la parte de la métrica que es distancia (las
+    # demás métricas no son negativas); sin ella la cota es 0, como en Dijkstra
+    cota = obtener_cota_haversine(grafo)
+    factor = cota['factor'] * coeficiente_distancia(metrica)
+    if metodo == 'astar':
+        heuristica = heuristica_haversine(grafo, destino, factor)
+        return astar_ruta(vecinos, origen, destino, heuristica, estadisticas)
+    
+    # El potencial bidireccional debe ser consistente en todas las aristas,
+    # lo que solo se garantiza si todos los nodos tienen coordenadas
+    potencial = None
+    if factor and cota['nodos_sin_coordenadas'] == 0 and isinstance(grafo, GrafoCSR):
+        potenciales = (cotas_haversine(grafo, destino, factor) -
+                       cotas_haversine(grafo, origen, factor)) / 2
+        potencial = potenciales.tolist().__getitem__
+    elif factor and cota['nodos_sin_coordenadas'] == 0:
+        hacia_destino = heuristica_haversine(grafo, destino, factor)
+        hacia_origen = heuristica_haversine(grafo, origen, factor)
+        potencial = lambda v: (hacia_destino(v) - hacia_origen(v)) / 2
+    return astar_bidireccional_ruta(vecinos, origen, destino, potencial, estadisticas)
+
+def obtener_grafo_csr(grafo, metrica=None, limitrofe=False):
+    """
+    Copia compacta (GrafoCSR) de un grafo de NetworkX, convertida una vez por versión
+    
+    Las búsquedas que trabajan sobre arreglos (las rutas alternativas, las
+    rutas por lotes y la matriz de distancias) reutilizan la copia en lugar
+    de convertir el grafo, con coste O(aristas), en cada consulta. Hay una
+    copia por métrica y por subgrafo; se descartan cuando cambian las
+    aristas (ver marcar_grafo_modificado) o el número de nodos o aristas
+    (ver _precalculo_vigente).
+    
+    Args:
+        grafo: Grafo de NetworkX
+        metrica: Métrica que deben incluir las aristas (ver buscar_ruta)
+        limitrofe: Si es True, la copia del subgrafo limítrofe (ver
+            obtener_subgrafo_limitrofe)
+    
+    Returns:
+        GrafoCSR: Copia del grafo con los nodos en el mismo orden
+    """
+    version = version_grafo(grafo)
+    copias = grafo.graph.get('grafo_csr')
+    if copias is None or copias['version'] != version or not _precalculo_vigente(grafo, 'grafo_csr'):
+        copias = _guardar_precalculo(grafo, 'grafo_csr', {'version': version})
+    metricas = tuple(sorted(nombre for nombre, _ in normalizar_metrica(metrica)))
+    clave = (limitrofe, metricas)
+    if clave not in copias:
+        origen = obtener_subgrafo_limitrofe(grafo) if limitrofe else grafo
+        copias[clave] = GrafoCSR.desde_networkx(origen, metricas=list(metricas))
+    return copias[clave]
+
+def obtener_jerarquia(grafo):
+    """
+    Jerarquía de contracción del grafo, preparada una vez por grafo
+    
+    Si el grafo se cargó con cargar_datos se reutiliza la jerarquía guardada
+    en la carpeta de datos mientras los CSV no cambien; si no, se construye
+    en memoria.
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+    
+    Returns:
+        JerarquiaContraccion: Jerarquía del grafo
+    """
+    if 'jerarquia' not in grafo.graph:
+        grafo.graph['jerarquia'] = cargar_o_construir_jerarquia(grafo)
+    return grafo.graph['jerarquia']
+
+def obtener_tabla(grafo):
+    """
+    Tabla de distancias entre todos los pares, preparada una vez por grafo
+    
+    Se construye en la primera consulta que la necesita. Si el grafo se cargó
+    con cargar_datos se reutiliza la tabla guardada en la carpeta de datos
+    mientras los CSV no cambien.
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
     
-    return filtro.any()
+    Returns:
+        TablaDistancias: Tabla del grafo
+    """
+    if 'tabla_distancias' not in grafo.graph:
+        grafo.graph['tabla_distancias'] = cargar_o_construir_tabla(grafo)
+    return grafo.graph['tabla_distancias']
 
-def encontrar_ruta_mas_corta(grafo, origen, destino, solo_adyacentes=False):
+def obtener_cota_haversine(grafo):
+    """
+    Verificación de la cota de círculo máximo, calculada una vez por grafo
+    
+    El resultado de verificar_cota_haversine se guarda en grafo.graph para
+    no recorrer todas las aristas en cada consulta A*.
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+    
+    Returns:
+        dict: Resultado de verificar_cota_haversine
+    """
+    if 'cota_haversine' not in grafo.graph:
+        grafo.graph['cota_haversine'] = verificar_cota_haversine(grafo)
+    return grafo.graph['cota_haversine']
+
+def version_grafo(grafo):
+    """
+    Sello de versión del grafo, que cambia con cada modificación de aristas
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+    
+    Returns:
+        int: Versión actual (0 para un grafo recién creado)
+    """
+    return grafo.graph.get('version', 0)
+
+def marcar_grafo_modificado(grafo, conservar=()):
+    """
+    Registrar que las aristas del grafo cambiaron
+    
+    Incrementa el sello de versión (con lo que se invalidan las cachés de
+    rutas) y descarta los datos precalculados. El grafo deja de corresponder
+    a los CSV de origen, así que tampoco se reutilizan los precálculos
+    guardados en la carpeta de datos.
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        conservar: Claves de PRECALCULOS que siguen siendo válidas (por
+            ejemplo, porque ya se actualizaron)
+    
+    Returns:
+        int: Nueva versión del grafo
+    """
+    for clave in PRECALCULOS + ('fuentes', 'huella'):
+        if clave not in conservar:
+            grafo.graph.pop(clave, None)
+    grafo.graph['version'] = version_grafo(grafo) + 1
+    return grafo.graph['version']
+
+def encontrar_ruta_mas_corta(grafo, origen, destino, solo_adyacentes=False, metodo='dijkstra',
+                             metrica=None):
     """
     Encontrar la ruta más corta entre dos regiones utilizando el algoritmo de Dijkstra
     
@@ -108,85 +973,301 @@ def encontrar_ruta_mas_corta(grafo, origen, destino, solo_adyacentes=False):
         origen: Región de origen
         destino: Región de destino
         solo_adyacentes: Si es True, verificar que todas las regiones en la ruta sean adyacentes
+        metodo: 'dijkstra', 'astar', 'astar_bidireccional', 'ch' o 'tabla' (ver buscar_ruta)
+        metrica: Métrica que se minimiza; por defecto la distancia (ver buscar_ruta)
     
     Returns:
         tuple: (ruta, distancia) donde ruta es una lista de regiones y distancia es el valor en km
+            (o en la métrica indicada)
     """
-    try:
-        # Usar algoritmo de Dijkstra para encontrar el camino más corto
-        ruta = nx.dijkstra_path(grafo, origen, destino, weight='weight')
-        distancia = nx.dijkstra_path_length(grafo, origen, destino, weight='weight')
-        
-        # Verificar adyacencia si se solicita
-        if solo_adyacentes:
-            for i in range(len(ruta) - 1):
-                region_actual = ruta[i]
-                siguiente_region = ruta[i + 1]
-                
-                # Verificar si las regiones son adyacentes en el grafo
-                if not grafo.has_edge(region_actual, siguiente_region):
-                    return None, 0
-                
-                # Si tenemos información enriquecida, podríamos hacer más verificaciones aquí
-        
-        return ruta, distancia
-    except nx.NetworkXNoPath:
-        return None, 0
-    except Exception as e:
-        raise e
+    ruta, distancia, _ = buscar_ruta(grafo, origen, destino, solo_adyacentes, metodo, metrica=metrica)
+    return ruta, distancia
+
+def encontrar_alcanzables(grafo, origenes, limite, metrica=None, estadisticas=None):
+    """
+    Encontrar las regiones alcanzables desde uno o varios orígenes sin superar un límite
+    
+    Una sola búsqueda acotada responde "todas las regiones a menos de X km
+    de Lima" (o a menos de X minutos con la métrica del tiempo), en lugar
+    de buscar una ruta a cada destino. Con varios orígenes (por ejemplo,
+    almacenes) cada región queda asignada al más cercano.
+    
+    Args:
+        grafo: Grafo con las regiones y distancias (NetworkX o GrafoCSR)
+        origenes: Región de origen o lista de regiones de origen
+        limite: Distancia máxima (incluida), en km o en la métrica indicada
+        metrica: Métrica que se acota; por defecto la distancia (ver buscar_ruta)
+        estadisticas: Diccionario opcional donde se guarda 'nodos_asentados'
+    
+    Returns:
+        tuple: (regiones, distancias, fuentes) como arreglos de NumPy en
+            orden de distancia creciente, donde fuentes es la posición en
+            origenes del origen más cercano a cada región
+    
+    Raises:
+        ValueError: Si el límite es negativo
+        KeyError: Si algún origen o métrica no existe en un GrafoCSR
+        nx.NodeNotFound: Si algún origen no existe en un grafo de NetworkX
+    """
+    if limite < 0:
+        raise ValueError(f"El límite debe ser mayor o igual que 0: {limite}")
+    if isinstance(origenes, str):
+        origenes = [origenes]
+    
+    vecinos = vecinos_de(grafo, metrica)
+    if isinstance(grafo, GrafoCSR):
+        nodos, distancias, fuentes = alcance_acotado(
+            vecinos, [grafo.id_nodo(origen) for origen in origenes], limite, estadisticas
+        )
+        regiones = grafo.nombres[np.asarray(nodos, dtype=np.int64)]
+    else:
+        for origen in origenes:
+            if origen not in grafo:
+                raise nx.NodeNotFound(f"El nodo {origen} no existe en el grafo")
+        nodos, distancias, fuentes = alcance_acotado(vecinos, list(origenes), limite, estadisticas)
+        regiones = np.empty(len(nodos), dtype=object)
+        regiones[:] = nodos
+    return regiones, np.array(distancias), np.array(fuentes, dtype=np.int64)
 
-def obtener_detalles_ruta(grafo, ruta):
+def encontrar_ruta_con_detalles(grafo, origen, destino, solo_adyacentes=False, metodo='dijkstra',
+                                metrica=None):
+    """
+    Encontrar la ruta más corta junto con los detalles de cada segmento
+    
+    Args:
+        grafo: Grafo con las regiones y distancias
+        origen: Región de origen
+        destino: Región de destino
+        solo_adyacentes: Si es True, verificar que todas las regiones en la ruta sean adyacentes
+        metodo: 'dijkstra', 'astar', 'astar_bidireccional', 'ch' o 'tabla' (ver buscar_ruta)
+        metrica: Métrica que se minimiza; por defecto la distancia (ver buscar_ruta)
+    
+    Returns:
+        tuple: (ruta, distancia, detalles) con detalles en el formato de
+            obtener_detalles_ruta, o (None, 0, None) si no existe camino
+    """
+    tabla_nombres, ruta, distancia, segmentos = _buscar(grafo, origen, destino, solo_adyacentes, metodo,
+                                                        None, metrica)
+    if ruta is None:
+        return None, 0, None
+    detalles = _resultado_busqueda(grafo, tabla_nombres, ruta, segmentos, metrica)
+    return detalles.ruta, distancia, detalles
+
+def encontrar_rutas_alternativas(grafo, origen, destino, k=3, solo_adyacentes=False,
+                                 estadisticas=None, metrica=None):
+    """
+    Encontrar las k rutas más cortas sin ciclos entre dos regiones
+    
+    Sirven de alternativas cuando la mejor ruta no es practicable. Si el
+    grafo ya tiene su tabla de distancias (ver obtener_tabla), el árbol de
+    caminos mínimos hacia el destino se toma de ella en lugar de calcularlo.
+    
+    Args:
+        grafo: Grafo con las regiones y distancias (NetworkX o GrafoCSR)
+        origen: Región de origen
+        destino: Región de destino
+        k: Número máximo de rutas
+        solo_adyacentes: Si es True, descartar las rutas con regiones no adyacentes
+        estadisticas: Diccionario opcional donde se guardan 'nodos_asentados'
+            y 'busquedas' (ver k_rutas_mas_cortas)
+        metrica: Métrica que se minimiza; por defecto la distancia (ver buscar_ruta)
+    
+    Returns:
+        list: Tuplas (ruta, distancia, detalles) de menor a mayor distancia,
+            con detalles en el formato de obtener_detalles_ruta; vacía si no
+            existe camino
+    """
+    # Con los departamentos vecinos las rutas se buscan en el subgrafo limítrofe
+    subgrafo = obtener_subgrafo_limitrofe(grafo) if solo_adyacentes else None
+    busqueda = subgrafo if subgrafo is not None else grafo
+    if isinstance(busqueda, GrafoCSR):
+        csr = busqueda
+    else:
+        for nodo in (origen, destino):
+            if nodo not in grafo:
+                raise nx.NodeNotFound(f"El nodo {nodo} no existe en el grafo")
+        csr = obtener_grafo_csr(grafo, metrica, limitrofe=subgrafo is not None)
+    id_origen, id_destino = csr.id_nodo(origen), csr.id_nodo(destino)
+    
+    # La tabla de distancias solo sirve de árbol para la distancia en el grafo completo
+    tabla = grafo.graph.get('tabla_distancias') if es_distancia(metrica) and subgrafo is None else None
+    arbol = _arbol_desde_tabla(tabla, csr, destino) if tabla is not None else None
+    
+    alternativas = []
+    for ruta_ids, distancia, segmentos in k_rutas_mas_cortas(csr, id_origen, id_destino, k, arbol,
+                                                              estadisticas, metrica):
+        detalles = _resultado_busqueda(csr, csr.tabla_nombres, ruta_ids, segmentos, metrica)
+        ruta = detalles.ruta
+        if solo_adyacentes and subgrafo is None and not son_adyacentes_lote(grafo, ruta[:-1], ruta[1:]).all():
+            continue
+        alternativas.append((ruta, distancia, detalles))
+    return alternativas
+
+def _arbol_desde_tabla(tabla, csr, destino):
+    """
+    Árbol de caminos mínimos con raíz en destino tomado de la tabla de distancias
+    
+    Es la fila del destino (el grafo es no dirigido), con los IDs del GrafoCSR:
+    la tabla puede numerar los nodos en otro orden si se construyó con el
+    otro motor. Devuelve None si la tabla no tiene los mismos nodos.
+    """
+    fila = tabla.indices.get(destino)
+    if tabla.tabla_nombres is csr.tabla_nombres:
+        posiciones = np.arange(csr.number_of_nodes())
+    else:
+        posiciones = tabla.tabla_nombres.ids(csr.nombres)
+    if fila is None or tabla.number_of_nodes() != csr.number_of_nodes() or (posiciones < 0).any():
+        return None
+    distancias = tabla.distancias[fila][posiciones]
+    predecesores = tabla.predecesores[fila][posiciones]
+    ids_csr = np.empty(len(posiciones), dtype=np.int64)
+    ids_csr[posiciones] = np.arange(len(posiciones))
+    return distancias, np.where(predecesores >= 0, ids_csr[predecesores], -1)
+
+def obtener_detalles_ruta(grafo, ruta, segmentos=None, metrica=None):
     """
     Obtener los detalles de cada segmento de la ruta
     
     Args:
         grafo: Grafo con las regiones y distancias
         ruta: Lista de regiones en la ruta
+        segmentos: Valores de la métrica en cada tramo ya calculados por
+            buscar_ruta; se toman tal cual, sin consultar las aristas (salvo
+            la distancia en km con otra métrica). Si no se indican se
+            consultan en el grafo
+        metrica: Métrica de los segmentos; por defecto la distancia. Con otra
+            métrica cada tramo lleva también su 'costo' en ella
     
     Returns:
-        dict: Diccionario con detalles de cada segmento de la ruta y distancias
+        ResultadoRuta: IDs de los nodos y distancia de cada tramo; sus
+            claves 'detalles' (lista de diccionarios por tramo) y
+            'distancias_segmentos' (diccionario {(origen, destino): distancia})
+            se construyen al consultarlas
     """
-    detalles = []
-    distancias_segmentos = {}
+    if isinstance(grafo, GrafoCSR):
+        ids = grafo.tabla_nombres.ids(ruta)
+        if (ids < 0).any():
+            raise KeyError(f"El nodo {ruta[int(np.flatnonzero(ids < 0)[0])]} no existe en el grafo")
+        if segmentos is not None:
+            return _resultado_busqueda(grafo, grafo.tabla_nombres, ids, segmentos, metrica)
+        posiciones = _posiciones_ruta(grafo, ids)
+        costos = None if es_distancia(metrica) else grafo.pesos_metrica(metrica)[posiciones]
+        return ResultadoRuta(grafo.tabla_nombres, ids, grafo.pesos[posiciones], costos)
     
-    for i in range(len(ruta) - 1):
-        origen = ruta[i]
-        destino = ruta[i + 1]
-        distancia = grafo[origen][destino]['weight']
-        
-        detalles.append({
-            'origen': origen,
-            'destino': destino,
-            'distancia_km': distancia
-        })
-        
-        # También guardar las distancias en un formato más simple para la visualización
-        distancias_segmentos[(origen, destino)] = distancia
+    if segmentos is None:
+        segmentos = [_valor_arista(grafo, ruta[i], ruta[i + 1], metrica) for i in range(len(ruta) - 1)]
+    return _resultado_busqueda(grafo, None, ruta, segmentos, metrica)
+
+def _resultado_busqueda(grafo, tabla_nombres, ruta, segmentos, metrica=None):
+    """
+    ResultadoRuta armado con los tramos que ya devolvió la búsqueda
     
-    return {
-        'detalles': detalles,
-        'distancias_segmentos': distancias_segmentos
-    }
+    La búsqueda guarda el peso de la arista por la que llega a cada nodo,
+    así que con la distancia como métrica los tramos (y de ellos las
+    distancias acumuladas y el total) se toman tal cual, sin consultar el
+    grafo. Con otra métrica esos pesos son los costes y solo la distancia
+    en km de cada tramo se lee de las aristas.
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR donde se buscó la ruta
+        tabla_nombres: TablaNombres de los IDs de ruta, o None si ruta son
+            nombres de un grafo de NetworkX
+        ruta: IDs (o nombres) de los nodos de la ruta
+        segmentos: Valor de la métrica en cada tramo, según la búsqueda
+        metrica: Métrica minimizada; por defecto la distancia
+    """
+    if tabla_nombres is None:
+        if es_distancia(metrica):
+            return ResultadoRuta.desde_nombres(ruta, segmentos)
+        distancias = [_peso_arista(grafo, ruta[i], ruta[i + 1]) for i in range(len(ruta) - 1)]
+        return ResultadoRuta.desde_nombres(ruta, distancias, segmentos)
+    
+    # Los pesos conservan el tipo de la columna del grafo (enteros en los CSV)
+    tipo = grafo.pesos_metrica(metrica).dtype if isinstance(grafo, GrafoCSR) else None
+    segmentos = np.asarray(segmentos, dtype=tipo)
+    if es_distancia(metrica):
+        return ResultadoRuta(tabla_nombres, ruta, segmentos)
+    # Solo las búsquedas sobre el propio GrafoCSR admiten otra métrica
+    return ResultadoRuta(tabla_nombres, ruta, grafo.pesos[_posiciones_ruta(grafo, ruta)], segmentos)
+
+def _posiciones_ruta(grafo, ids):
+    """
+    Posiciones en el GrafoCSR de las aristas de una ruta de IDs
+    
+    Raises:
+        KeyError: Si dos nodos consecutivos no están unidos por una arista
+    """
+    posiciones = grafo.posiciones_aristas(ids[:-1], ids[1:])
+    if (posiciones < 0).any():
+        tramo = int(np.flatnonzero(posiciones < 0)[0])
+        nombres = grafo.tabla_nombres.nombres_de(ids[tramo:tramo + 2])
+        raise KeyError(f"No existe la arista {nombres[0]} - {nombres[1]}")
+    return posiciones
+
+def _peso_arista(grafo, origen, destino):
+    """Peso de la arista entre dos regiones para cualquiera de los motores"""
+    if isinstance(grafo, GrafoCSR):
+        return grafo.peso_arista(origen, destino)
+    return grafo[origen][destino]['weight']
+
+def _valor_arista(grafo, origen, destino, metrica=None):
+    """Valor de una métrica en la arista entre dos regiones para cualquiera de los motores"""
+    if es_distancia(metrica):
+        return _peso_arista(grafo, origen, destino)
+    if isinstance(grafo, GrafoCSR):
+        return grafo.peso_arista(origen, destino, metrica)
+    datos = grafo[origen][destino]
+    return sum(coeficiente * datos[atributo_arista(nombre)]
+               for nombre, coeficiente in normalizar_metrica(metrica))
+
+def metricas_grafo(grafo):
+    """
+    Métricas de las aristas del grafo que pueden usar las búsquedas
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+    
+    Returns:
+        list: Nombres de las métricas, empezando por la distancia; en
+            NetworkX, las de COLUMNAS_METRICAS que tiene la primera arista
+    """
+    if isinstance(grafo, GrafoCSR):
+        return grafo.metricas()
+    datos = next(iter(grafo.edges(data=True)), (None, None, {}))[2]
+    return [METRICA_DISTANCIA] + [nombre for nombre in COLUMNAS_METRICAS if nombre in datos]
+
+def obtener_conectividad(grafo):
+    """
+    Seguimiento de la conectividad del grafo, preparado una vez por grafo
+    
+    Las funciones de cierres_viales lo actualizan con cada tramo abierto o
+    cerrado en lugar de descartarlo. Si el grafo se editó por otra vía (por
+    ejemplo, con add_edge de NetworkX) se vuelve a preparar.
+    
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+    
+    Returns:
+        ConectividadIncremental: Componentes conexas y grados del grafo
+    """
+    conectividad = grafo.graph.get('conectividad')
+    if conectividad is None or not conectividad.corresponde_a(grafo):
+        conectividad = grafo.graph['conectividad'] = ConectividadIncremental(grafo)
+    return conectividad
 
 def verificar_integridad_grafo(grafo):
     """
     Verificar la integridad del grafo: conexidad, aislamiento de nodos, etc.
     
+    Las componentes, los nodos aislados y la conexidad se obtienen en un solo
+    recorrido de las aristas, que se reutiliza en las llamadas siguientes
+    mientras el grafo no cambie o se actualiza con cierres_viales (ver
+    obtener_conectividad).
+    
     Args:
-        grafo: Grafo de NetworkX a verificar
+        grafo: Grafo de NetworkX o GrafoCSR a verificar
     
     Returns:
         dict: Diccionario con información de la verificación
     """
-    resultado = {
-        'es_conexo': nx.is_connected(grafo),
-        'num_nodos': grafo.number_of_nodes(),
-        'num_aristas': grafo.number_of_edges(),
-        'nodos_aislados': list(nx.isolates(grafo)),
-        'componentes_conexas': list(nx.connected_components(grafo))
-    }
-    
-    # Convertir componentes_conexas a lista de listas para que sea JSON serializable
-    resultado['componentes_conexas'] = [list(comp) for comp in resultado['componentes_conexas']]
-    
-    return resultado
+    return obtener_conectividad(grafo).reporte()
@@ -0,0 +1,131 @@
+"""
+Índice de adyacencia entre regiones
+
+Cada par no dirigido de nodos conectados se codifica como un entero
+canónico min(u, v) * n + max(u, v) sobre los IDs de los nodos. Las claves se
+guardan ordenadas en un arreglo de NumPy para las consultas por lotes y en
+un conjunto de Python para las consultas individuales en O(1). Los nombres
+se traducen a IDs con la TablaNombres del grafo, sin un índice propio.
+"""
+import numpy as np
+import pandas as pd
+
+from .grafo_csr import GrafoCSR
+from .nombres import TablaNombres
+
+
+class IndiceAdyacencia:
+    """Conjunto de pares de nodos adyacentes, indexado por IDs enteros"""
+
+    def __init__(self, nombres, origenes, destinos):
+        """
+        Args:
+            nombres: Secuencia con el nombre de cada ID de nodo o TablaNombres
+            origenes: Arreglo de IDs de origen de las aristas
+            destinos: Arreglo de IDs de destino de las aristas
+        """
+        self.tabla_nombres = TablaNombres.crear(nombres)
+        # Ordenar y quitar repetidas (más rápido que np.unique con millones de claves)
+        claves = np.sort(self._claves(np.asarray(origenes, dtype=np.int64),
+                                      np.asarray(destinos, dtype=np.int64)))
+        self.claves = claves[np.concatenate(([True], claves[1:] != claves[:-1]))] if len(claves) else claves
+        self._conjunto = None
+
+    @classmethod
+    def desde_grafo(cls, grafo):
+        """
+        Construir el índice de un grafo de NetworkX o GrafoCSR
+
+        Args:
+            grafo: Grafo de NetworkX o GrafoCSR
+
+        Returns:
+            IndiceAdyacencia: Índice con las aristas del grafo
+        """
+        if isinstance(grafo, GrafoCSR):
+            return cls(grafo.tabla_nombres, grafo.extremos[:, 0], grafo.extremos[:, 1])
+
+        tabla = TablaNombres(list(grafo.nodes))
+        indices = tabla.indices
+        extremos = np.fromiter((indices[nodo] for arista in grafo.edges for nodo in arista),
+                               dtype=np.int64, count=2 * grafo.number_of_edges()).reshape(-1, 2)
+        return cls(tabla, extremos[:, 0], extremos[:, 1])
+
+    @classmethod
+    def desde_claves(cls, nombres, claves):
+        """
+        Reconstruir un índice a partir de sus claves ya calculadas
+
+        Args:
+            nombres: Secuencia con el nombre de cada ID de nodo o TablaNombres
+            claves: Arreglo ordenado de claves canónicas (atributo claves)
+
+        Returns:
+            IndiceAdyacencia: Índice equivalente al original
+        """
+        indice = cls(nombres, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        indice.claves = claves
+        return indice
+
+    @classmethod
+    def desde_distancias(cls, df_distancias):
+        """
+        Construir el índice directamente de un DataFrame de distancias
+
+        Args:
+            df_distancias: DataFrame con columnas 'origen' y 'destino'
+
+        Returns:
+            IndiceAdyacencia: Índice con los pares del DataFrame
+        """
+        codigos, nombres = pd.factorize(pd.concat([df_distancias['origen'], df_distancias['destino']],
+                                                  ignore_index=True))
+        num_aristas = len(df_distancias)
+        return cls(nombres, codigos[:num_aristas], codigos[num_aristas:])
+
+    def _claves(self, origenes, destinos):
+        """Claves canónicas de pares de IDs (el orden del par no importa)"""
+        return np.minimum(origenes, destinos) * len(self.tabla_nombres) + np.maximum(origenes, destinos)
+
+    def __len__(self):
+        return len(self.claves)
+
+    def son_adyacentes(self, origen, destino):
+        """
+        Verificar si dos nodos están conectados directamente
+
+        Args:
+            origen: Nombre del primer nodo
+            destino: Nombre del segundo nodo
+
+        Returns:
+            bool: True si existe la arista; False si no existe o algún nodo
+                no está en el índice
+        """
+        indices = self.tabla_nombres.indices
+        if origen not in indices or destino not in indices:
+            return False
+        u, v = indices[origen], indices[destino]
+        if self._conjunto is None:
+            self._conjunto = set(self.claves.tolist())
+        return (min(u, v) * len(self.tabla_nombres) + max(u, v)) in self._conjunto
+
+    def son_adyacentes_lote(self, origenes, destinos):
+        """
+        Verificar la adyacencia de muchos pares a la vez
+
+        Args:
+            origenes: Secuencia de nombres de los primeros nodos
+            destinos: Secuencia de nombres de los segundos nodos
+
+        Returns:
+            np.ndarray: Arreglo booleano, True para los pares conectados
+        """
+        u = self.tabla_nombres.ids(origenes)
+        v = self.tabla_nombres.ids(destinos)
+        conocidos = (u >= 0) & (v >= 0)
+        claves = self._claves(u, v)
+        if not len(self.claves):
+            return np.zeros(len(claves), dtype=bool)
+        posiciones = np.minimum(np.searchsorted(self.claves, claves), len(self.claves) - 1)
+        return conocidos & (self.claves[posiciones] == claves)
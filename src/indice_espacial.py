@@ -0,0 +1,133 @@
+"""
+Índice espacial de las coordenadas de los nodos (k-d tree)
+
+Permite partir de una coordenada GPS en lugar de elegir una región: el
+punto se ajusta al nodo más cercano del grafo. Las coordenadas se pasan a
+puntos de la esfera en 3D, donde la distancia euclídea (la cuerda) crece
+con la de círculo máximo, así que un cKDTree de scipy da los vecinos
+exactos sin los errores de tratar latitud y longitud como un plano. Las
+consultas aceptan arreglos de puntos y se resuelven en una sola llamada.
+"""
+import numpy as np
+
+from .geodesia import RADIO_TIERRA_KM
+from .grafo_csr import GrafoCSR
+from .nombres import TablaNombres
+
+
+def _puntos_esfera(latitudes, longitudes):
+    """Coordenadas cartesianas (en km) de puntos sobre la esfera terrestre"""
+    latitudes = np.radians(np.asarray(latitudes, dtype=np.float64))
+    longitudes = np.radians(np.asarray(longitudes, dtype=np.float64))
+    coseno = np.cos(latitudes)
+    return RADIO_TIERRA_KM * np.stack(
+        (coseno * np.cos(longitudes), coseno * np.sin(longitudes), np.sin(latitudes)), axis=-1
+    )
+
+
+def _cuerda_a_arco(cuerdas):
+    """Distancia de círculo máximo (km) correspondiente a una cuerda (km)"""
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.minimum(cuerdas / (2 * RADIO_TIERRA_KM), 1.0))
+
+
+def _arco_a_cuerda(distancia_km):
+    """Cuerda (km) que corresponde a una distancia de círculo máximo (km)"""
+    return 2 * RADIO_TIERRA_KM * np.sin(min(distancia_km / (2 * RADIO_TIERRA_KM), np.pi / 2))
+
+
+class IndiceEspacial:
+    """
+    k-d tree sobre las coordenadas de los nodos con coordenadas válidas
+
+    Los nodos sin coordenadas (NaN) no se indexan y nunca se devuelven.
+    """
+
+    def __init__(self, tabla_nombres, latitudes, longitudes):
+        """
+        Args:
+            tabla_nombres: TablaNombres (o secuencia de nombres) de los nodos
+            latitudes: Latitud de cada ID de nodo (NaN si no la tiene)
+            longitudes: Longitud de cada ID de nodo (NaN si no la tiene)
+        """
+        from scipy.spatial import cKDTree
+
+        self.tabla_nombres = TablaNombres.crear(tabla_nombres)
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        validos = ~(np.isnan(latitudes) | np.isnan(longitudes))
+        # IDs de nodo de cada punto del árbol
+        self.ids = np.flatnonzero(validos)
+        self.arbol = cKDTree(_puntos_esfera(latitudes[validos], longitudes[validos]))
+
+    @classmethod
+    def desde_grafo(cls, grafo):
+        """
+        Crear el índice con las coordenadas de los nodos de un grafo
+
+        Args:
+            grafo: Grafo de NetworkX (atributos 'lat' y 'lon') o GrafoCSR
+
+        Returns:
+            IndiceEspacial: Índice con los IDs del GrafoCSR o, en NetworkX,
+                con los nodos en el orden del grafo
+        """
+        if isinstance(grafo, GrafoCSR):
+            return cls(grafo.tabla_nombres, grafo.lat, grafo.lon)
+        nombres = list(grafo.nodes)
+        datos = grafo._node
+        latitudes = [datos[nombre].get('lat', np.nan) for nombre in nombres]
+        longitudes = [datos[nombre].get('lon', np.nan) for nombre in nombres]
+        return cls(nombres, latitudes, longitudes)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def cercanos(self, latitudes, longitudes, k=1, distancia_maxima=None):
+        """
+        Nodos más cercanos a uno o muchos puntos
+
+        Args:
+            latitudes: Latitud de un punto o arreglo de latitudes
+            longitudes: Longitud de un punto o arreglo de longitudes
+            k: Número de vecinos por punto
+            distancia_maxima: Distancia máxima opcional (km); los vecinos más
+                lejanos se devuelven como ID -1 y distancia inf
+
+        Returns:
+            tuple: (ids, distancias) con los IDs de los nodos y su distancia
+                de círculo máximo en km, de forma (n,) con k=1 o (n, k) con
+                más vecinos (sin la primera dimensión para un punto suelto)
+        """
+        puntos = _puntos_esfera(latitudes, longitudes)
+        cota = np.inf if distancia_maxima is None else _arco_a_cuerda(distancia_maxima)
+        cuerdas, posiciones = self.arbol.query(puntos, k=k, distance_upper_bound=cota)
+        # cKDTree marca los vecinos no encontrados con la posición len(ids)
+        encontrados = posiciones < len(self.ids)
+        ids = np.where(encontrados, self.ids[np.minimum(posiciones, len(self.ids) - 1)], -1)
+        return ids, np.where(encontrados, _cuerda_a_arco(cuerdas), np.inf)
+
+    def en_radio(self, latitudes, longitudes, radio_km):
+        """
+        Nodos a menos de cierta distancia de cada punto
+
+        Args:
+            latitudes: Arreglo de latitudes
+            longitudes: Arreglo de longitudes
+            radio_km: Distancia máxima de círculo máximo (incluida)
+
+        Returns:
+            tuple: (offsets, ids, distancias) en formato CSR: los nodos del
+                punto i son ids[offsets[i]:offsets[i + 1]], ordenados por
+                distancia
+        """
+        puntos = _puntos_esfera(np.atleast_1d(latitudes), np.atleast_1d(longitudes))
+        listas = self.arbol.query_ball_point(puntos, _arco_a_cuerda(radio_km), return_sorted=False)
+        cantidades = np.fromiter((len(lista) for lista in listas), dtype=np.int64, count=len(listas))
+        offsets = np.concatenate(([0], np.cumsum(cantidades)))
+        posiciones = np.fromiter((posicion for lista in listas for posicion in lista),
+                                 dtype=np.int64, count=offsets[-1])
+        filas = np.repeat(np.arange(len(listas)), cantidades)
+        distancias = _cuerda_a_arco(np.linalg.norm(self.arbol.data[posiciones] - puntos[filas], axis=1))
+        # Ordenar por punto y, dentro de cada punto, por distancia
+        orden = np.lexsort((distancias, filas))
+        return offsets, self.ids[posiciones[orden]], distancias[orden]
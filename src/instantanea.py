@@ -0,0 +1,164 @@
+"""
+Instantánea binaria de los datos cargados para acelerar el arranque
+
+cargar_datos compila una vez los CSV de regiones y distancias en una
+carpeta con un archivo .npy por arreglo (columnas de ambos DataFrames,
+arreglos CSR del grafo, métricas de las aristas y claves del índice de adyacencia) y un archivo de
+metadatos. Los arranques siguientes abren los arreglos mapeados en memoria,
+sin analizar los CSV ni reconstruir el grafo, mientras la huella del
+contenido de los CSV no cambie. Las columnas categóricas (los nombres de
+regiones codificados con la tabla de nombres del grafo) se guardan como sus
+códigos y categorías, y se reconstruyen sin volver a analizar los textos.
+"""
+import numpy as np
+import pandas as pd
+
+from .almacenamiento import abrir_arreglos, guardar_arreglos
+from .grafo_csr import ARREGLOS_CSR, GrafoCSR
+from .indice_adyacencia import IndiceAdyacencia
+
+ARCHIVO_INSTANTANEA = 'grafo_instantanea'
+VERSION_FORMATO = 3
+
+
+def _texto(valores):
+    """Convertir una secuencia de nombres en un arreglo de texto de NumPy"""
+    return np.array([str(valor) for valor in valores], dtype=str)
+
+
+def _objetos(valores):
+    """Convertir un arreglo de texto de NumPy en un arreglo de objetos"""
+    resultado = np.empty(len(valores), dtype=object)
+    resultado[:] = valores.tolist()
+    return resultado
+
+
+def _es_texto(serie):
+    """Verificar si una columna se guarda como códigos de la tabla de textos"""
+    return not pd.api.types.is_numeric_dtype(serie.dtype)
+
+
+def _valores_texto(serie):
+    """Textos de una columna (de una categórica basta con sus categorías)"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.categories.to_numpy(dtype=object)
+    return serie.dropna().to_numpy(dtype=object)
+
+
+def _guardar_columnas(arreglos, prefijo, df, textos):
+    """Añadir las columnas de un DataFrame a los arreglos y devolver su descripción"""
+    columnas = []
+    for numero, columna in enumerate(df.columns):
+        serie = df[columna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            # Códigos de la columna y categorías como códigos de la tabla de textos
+            arreglos[f'{prefijo}_{numero}'] = serie.cat.codes.to_numpy()
+            arreglos[f'{prefijo}_{numero}_categorias'] = textos.get_indexer(serie.cat.categories)
+        elif _es_texto(serie):
+            # Los nulos no están en la tabla y reciben el código -1
+            arreglos[f'{prefijo}_{numero}'] = textos.get_indexer(serie)
+        else:
+            arreglos[f'{prefijo}_{numero}'] = serie.to_numpy()
+        columnas.append([columna, str(serie.dtype), _es_texto(serie)])
+    return columnas
+
+
+def _cargar_columnas(datos, prefijo, columnas, textos):
+    """Reconstruir un DataFrame guardado con _guardar_columnas"""
+    series = {}
+    for numero, (columna, tipo, es_texto) in enumerate(columnas):
+        valores = datos[f'{prefijo}_{numero}']
+        if tipo == 'category':
+            categorias = pd.Index(textos[datos[f'{prefijo}_{numero}_categorias']], dtype=object)
+            series[columna] = pd.Series(pd.Categorical.from_codes(valores, categories=categorias))
+        else:
+            if es_texto:
+                valores = textos[valores]
+            series[columna] = pd.Series(valores, copy=False).astype(tipo, copy=False)
+    return pd.DataFrame(series, copy=False)
+
+
+def guardar_instantanea(ruta, huella, df_regiones, df_distancias, usar_enriquecido, grafo):
+    """
+    Guardar los datos cargados en una instantánea
+
+    Todos los textos (nombres de nodos y columnas de texto) se guardan una
+    sola vez en una tabla común y el resto de arreglos los referencian por
+    código, de modo que al cargar cada nombre se crea una sola vez.
+
+    Args:
+        ruta: Carpeta de la instantánea (se reemplaza si existe)
+        huella: Huella de los CSV de origen (ver huella_archivos)
+        df_regiones: DataFrame de regiones
+        df_distancias: DataFrame de distancias
+        usar_enriquecido: Si los datos de distancias son los enriquecidos
+        grafo: GrafoCSR construido a partir de los DataFrames
+    """
+    valores_texto = [grafo.nombres]
+    valores_texto += [np.asarray(categorias, dtype=object) for _, categorias in grafo.atributos_aristas.values()]
+    valores_texto += [_valores_texto(df[columna])
+                      for df in (df_regiones, df_distancias) for columna in df.columns
+                      if _es_texto(df[columna])]
+    textos = pd.Index(pd.unique(np.concatenate(valores_texto)))
+
+    arreglos = {'textos': _texto(textos)}
+    metadatos = {
+        'version': VERSION_FORMATO,
+        'huella': huella,
+        'usar_enriquecido': bool(usar_enriquecido),
+        'regiones': _guardar_columnas(arreglos, 'regiones', df_regiones, textos),
+        'distancias': _guardar_columnas(arreglos, 'distancias', df_distancias, textos),
+        'atributos_aristas': list(grafo.atributos_aristas),
+        'metricas_aristas': list(grafo.metricas_aristas),
+    }
+    arreglos['csr_nombres'] = textos.get_indexer(grafo.nombres)
+    for nombre in ARREGLOS_CSR:
+        arreglos['csr_' + nombre] = getattr(grafo, nombre)
+    for numero, (codigos, categorias) in enumerate(grafo.atributos_aristas.values()):
+        arreglos[f'atributo_{numero}_codigos'] = codigos
+        arreglos[f'atributo_{numero}_categorias'] = textos.get_indexer(categorias)
+    for numero, valores in enumerate(grafo.metricas_aristas.values()):
+        arreglos[f'metrica_{numero}'] = valores
+    arreglos['adyacencia_claves'] = grafo.graph['adyacencia'].claves
+
+    guardar_arreglos(ruta, arreglos, metadatos)
+
+
+def cargar_instantanea(ruta, huella):
+    """
+    Cargar una instantánea guardada con guardar_instantanea
+
+    Args:
+        ruta: Carpeta de la instantánea
+        huella: Huella que deben tener los CSV de origen
+
+    Returns:
+        tuple o None: (df_regiones, df_distancias, grafo, usar_enriquecido)
+            con un GrafoCSR con el índice de adyacencia ya preparado, o None
+            si la instantánea no existe, es de otra versión o corresponde a
+            otros datos. Los arreglos numéricos quedan mapeados en memoria
+    """
+    abierta = abrir_arreglos(ruta)
+    if abierta is None:
+        return None
+    metadatos, datos = abierta
+    if metadatos['version'] != VERSION_FORMATO or metadatos['huella'] != huella:
+        return None
+
+    # El código -1 (nulo) selecciona el None añadido al final de la tabla
+    textos = np.append(_objetos(datos['textos']), None)
+    df_regiones = _cargar_columnas(datos, 'regiones', metadatos['regiones'], textos)
+    df_distancias = _cargar_columnas(datos, 'distancias', metadatos['distancias'], textos)
+
+    nombres = textos[datos['csr_nombres']]
+    atributos = {
+        nombre: (datos[f'atributo_{numero}_codigos'], textos[datos[f'atributo_{numero}_categorias']])
+        for numero, nombre in enumerate(metadatos['atributos_aristas'])
+    }
+    metricas = {nombre: datos[f'metrica_{numero}']
+                for numero, nombre in enumerate(metadatos['metricas_aristas'])}
+    grafo = GrafoCSR(nombres=nombres, atributos_aristas=atributos, metricas_aristas=metricas,
+                     **{nombre: datos['csr_' + nombre] for nombre in ARREGLOS_CSR})
+    grafo.graph['adyacencia'] = IndiceAdyacencia.desde_claves(grafo.tabla_nombres, datos['adyacencia_claves'])
+
+    return df_regiones, df_distancias, grafo, metadatos['usar_enriquecido']
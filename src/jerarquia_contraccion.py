@@ -0,0 +1,452 @@
+"""
+Jerarquías de contracción (Contraction Hierarchies) para consultas rápidas
+
+El preprocesamiento contrae los nodos uno a uno, de menor a mayor
+importancia, añadiendo atajos entre sus vecinos cuando el camino que pasa
+por el nodo contraído es el único camino más corto. Cada arista (original o
+atajo) se guarda solo en el nodo de menor rango, formando el "grafo
+ascendente". Una consulta es un Dijkstra bidireccional que solo sube de
+rango, y los atajos se desempaquetan recursivamente para obtener la ruta.
+
+Preprocesamiento de los datos del proyecto:
+    python -m src.jerarquia_contraccion
+"""
+import heapq
+import math
+import os
+import time
+
+import numpy as np
+
+from .almacenamiento import huella_grafo, ruta_datos, ruta_precalculo
+from .grafo_csr import GrafoCSR
+from .nombres import TablaNombres
+
+ARCHIVO_JERARQUIA = 'jerarquia_contraccion.npz'
+VERSION_FORMATO = 1
+
+
+class JerarquiaContraccion:
+    """
+    Grafo ascendente de una jerarquía de contracción en arreglos CSR
+
+    Para el nodo u, sus aristas ascendentes están en el rango
+    offsets[u]:offsets[u + 1] de los arreglos destinos, pesos y medios.
+    medios[i] es el nodo contraído que representa el atajo, o -1 si la
+    arista es original.
+    """
+
+    def __init__(self, nombres, rangos, offsets, destinos, pesos, medios, huella=None):
+        self.tabla_nombres = TablaNombres.crear(nombres)
+        self.rangos = rangos
+        self.offsets = offsets
+        self.destinos = destinos
+        self.pesos = pesos
+        self.medios = medios
+        self.huella = huella
+        self._listas = None
+        self._aristas = None
+
+    @property
+    def nombres(self):
+        """Arreglo con el nombre de cada ID de nodo"""
+        return self.tabla_nombres.nombres
+
+    @property
+    def indices(self):
+        """Diccionario nombre -> ID (compartido con el grafo si se construyó a partir de él)"""
+        return self.tabla_nombres.indices
+
+    def number_of_nodes(self):
+        """Número de nodos de la jerarquía"""
+        return len(self.nombres)
+
+    def num_atajos(self):
+        """Número de atajos añadidos durante la contracción"""
+        return int(np.count_nonzero(self.medios >= 0))
+
+    def nbytes(self):
+        """Memoria ocupada por los arreglos del grafo ascendente (en bytes)"""
+        return sum(arreglo.nbytes for arreglo in
+                   (self.rangos, self.offsets, self.destinos, self.pesos, self.medios))
+
+    def _adyacencia(self):
+        """Grafo ascendente como listas de Python, más rápidas en el bucle de consulta"""
+        if self._listas is None:
+            offsets = self.offsets.tolist()
+            destinos = self.destinos.tolist()
+            pesos = self.pesos.tolist()
+            self._listas = [
+                list(zip(destinos[offsets[u]:offsets[u + 1]], pesos[offsets[u]:offsets[u + 1]]))
+                for u in range(self.number_of_nodes())
+            ]
+            # Índice (menor ID, mayor ID) -> (peso, medio) para desempaquetar atajos
+            origenes = np.repeat(np.arange(self.number_of_nodes()), np.diff(self.offsets))
+            menores = np.minimum(origenes, self.destinos).tolist()
+            mayores = np.maximum(origenes, self.destinos).tolist()
+            self._aristas = dict(zip(zip(menores, mayores), zip(pesos, self.medios.tolist())))
+        return self._listas
+
+    def id_nodo(self, nombre):
+        """
+        Obtener el identificador entero de un nodo
+
+        Raises:
+            KeyError: Si el nodo no existe en la jerarquía
+        """
+        return self.tabla_nombres.id_nodo(nombre)
+
+    def consultar(self, origen, destino, estadisticas=None):
+        """
+        Consulta de ruta más corta entre dos nodos (por ID)
+
+        Args:
+            origen: ID del nodo de origen
+            destino: ID del nodo de destino
+            estadisticas: Diccionario opcional donde se guarda 'nodos_asentados'
+
+        Returns:
+            tuple: (ruta, distancia, segmentos) con la ruta como lista de
+                IDs, o (None, 0, []) si no existe camino
+        """
+        if origen == destino:
+            return [origen], 0, []
+
+        mejor, encuentro, previos = self._buscar(origen, destino, estadisticas)
+        if encuentro is None:
+            return None, 0, []
+
+        # Camino en el grafo aumentado: origen -> encuentro -> destino
+        nodos = self._cadena(previos[0], encuentro)[::-1] + self._cadena(previos[1], encuentro)[1:]
+        ruta = [origen]
+        segmentos = []
+        for u, v in zip(nodos, nodos[1:]):
+            self._desempaquetar(u, v, ruta, segmentos)
+        return ruta, mejor, segmentos
+
+    def distancia(self, origen, destino):
+        """
+        Distancia más corta entre dos nodos (por ID), sin desempaquetar la ruta
+
+        Returns:
+            int, float o None: Distancia, o None si no existe camino
+        """
+        if origen == destino:
+            return 0
+        mejor, encuentro, _ = self._buscar(origen, destino)
+        return mejor if encuentro is not None else None
+
+    def _buscar(self, origen, destino, estadisticas=None):
+        """
+        Dijkstra bidireccional sobre el grafo ascendente
+
+        Returns:
+            tuple: (mejor distancia, nodo de encuentro o None, previos de cada lado)
+        """
+        adyacencia = self._adyacencia()
+        distancias = ({origen: 0}, {destino: 0})
+        previos = ({origen: None}, {destino: None})
+        cerrados = (set(), set())
+        colas = ([(0, origen)], [(0, destino)])
+        mejor = math.inf
+        encuentro = None
+
+        while colas[0] or colas[1]:
+            for lado in (0, 1):
+                cola = colas[lado]
+                if not cola:
+                    continue
+                # Este lado ya no puede mejorar la mejor distancia encontrada
+                if cola[0][0] >= mejor:
+                    cola.clear()
+                    continue
+
+                distancia, u = heapq.heappop(cola)
+                if u in cerrados[lado]:
+                    continue
+                cerrados[lado].add(u)
+
+                otra = distancias[1 - lado].get(u)
+                if otra is not None and distancia + otra < mejor:
+                    mejor = distancia + otra
+                    encuentro = u
+
+                # Stall-on-demand: si un vecino de mayor rango ya ofrece un
+                # camino más corto hasta u, no tiene sentido expandir u
+                alcanzados = distancias[lado]
+                detenido = False
+                for v, peso in adyacencia[u]:
+                    anterior = alcanzados.get(v)
+                    if anterior is not None and anterior + peso < distancia:
+                        detenido = True
+                        break
+                if detenido:
+                    continue
+
+                for v, peso in adyacencia[u]:
+                    nueva = distancia + peso
+                    if v not in alcanzados or nueva < alcanzados[v]:
+                        alcanzados[v] = nueva
+                        previos[lado][v] = u
+                        heapq.heappush(cola, (nueva, v))
+
+        if estadisticas is not None:
+            estadisticas['nodos_asentados'] = len(cerrados[0]) + len(cerrados[1])
+
+        return mejor, encuentro, previos
+
+    @staticmethod
+    def _cadena(previos, nodo):
+        """Nodos desde `nodo` hasta la raíz de la búsqueda"""
+        cadena = [nodo]
+        while previos[cadena[-1]] is not None:
+            cadena.append(previos[cadena[-1]])
+        return cadena
+
+    def _desempaquetar(self, u, v, ruta, segmentos):
+        """Añadir a la ruta los nodos y tramos originales de la arista u -> v"""
+        pendientes = [(u, v)]
+        while pendientes:
+            a, b = pendientes.pop()
+            peso, medio = self._aristas[(a, b) if a < b else (b, a)]
+            if medio < 0:
+                ruta.append(b)
+                segmentos.append(peso)
+            else:
+                # Se apila primero la segunda mitad para procesar antes la primera
+                pendientes.append((medio, b))
+                pendientes.append((a, medio))
+
+
+def construir_jerarquia(grafo, limite_testigos=64):
+    """
+    Construir la jerarquía de contracción de un grafo
+
+    El orden de contracción se decide con la diferencia de aristas (atajos
+    necesarios menos aristas eliminadas), el número de vecinos ya
+    contraídos y la profundidad del nodo en la jerarquía, actualizada de
+    forma perezosa.
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR (no dirigido)
+        limite_testigos: Máximo de nodos asentados en cada búsqueda de
+            caminos testigo; valores mayores producen menos atajos pero
+            un preprocesamiento más lento
+
+    Returns:
+        JerarquiaContraccion: Jerarquía construida
+    """
+    csr = grafo if isinstance(grafo, GrafoCSR) else GrafoCSR.desde_networkx(grafo)
+    num_nodos = csr.number_of_nodes()
+
+    # Grafo restante (sin los nodos ya contraídos) con el peso mínimo por par
+    adyacencia = [dict() for _ in range(num_nodos)]
+    for (u, v), peso in zip(csr.extremos.tolist(), csr.pesos_aristas.tolist()):
+        if u != v and (v not in adyacencia[u] or peso < adyacencia[u][v]):
+            adyacencia[u][v] = peso
+            adyacencia[v][u] = peso
+    medios = {}
+
+    vecinos_contraidos = [0] * num_nodos
+    # Profundidad en la jerarquía: evita contraer seguidos nodos de la misma zona
+    niveles = [0] * num_nodos
+    rangos = np.zeros(num_nodos, dtype=np.int64)
+    ascendentes = [None] * num_nodos
+
+    def prioridad(u):
+        atajos = _atajos_necesarios(u, adyacencia, limite_testigos)
+        diferencia = len(atajos) - len(adyacencia[u])
+        return 2 * diferencia + vecinos_contraidos[u] + niveles[u], atajos
+
+    cola = [(prioridad(u)[0], u) for u in range(num_nodos)]
+    heapq.heapify(cola)
+    rango = 0
+
+    while cola:
+        _, u = heapq.heappop(cola)
+        valor, atajos = prioridad(u)
+        # Actualización perezosa: si la prioridad empeoró, reinsertar
+        if cola and valor > cola[0][0]:
+            heapq.heappush(cola, (valor, u))
+            continue
+
+        rangos[u] = rango
+        rango += 1
+
+        # Las aristas que quedan en u van hacia nodos de mayor rango
+        ascendentes[u] = [(v, peso, medios.get((min(u, v), max(u, v)), -1))
+                          for v, peso in adyacencia[u].items()]
+
+        for v in adyacencia[u]:
+            del adyacencia[v][u]
+            vecinos_contraidos[v] += 1
+            niveles[v] = max(niveles[v], niveles[u] + 1)
+        adyacencia[u] = {}
+
+        for v, x, peso in atajos:
+            if x not in adyacencia[v] or peso < adyacencia[v][x]:
+                adyacencia[v][x] = peso
+                adyacencia[x][v] = peso
+                medios[(min(v, x), max(v, x))] = u
+
+    tamanos = np.array([len(aristas) for aristas in ascendentes], dtype=np.int64)
+    offsets = np.zeros(num_nodos + 1, dtype=np.int64)
+    np.cumsum(tamanos, out=offsets[1:])
+    planas = [arista for aristas in ascendentes for arista in aristas]
+    indice_tipo = csr.destinos.dtype
+
+    return JerarquiaContraccion(
+        nombres=csr.tabla_nombres,
+        rangos=rangos,
+        offsets=offsets,
+        destinos=np.array([v for v, _, _ in planas], dtype=indice_tipo),
+        pesos=np.array([peso for _, peso, _ in planas], dtype=csr.pesos_aristas.dtype),
+        medios=np.array([medio for _, _, medio in planas], dtype=indice_tipo),
+        huella=huella_grafo(csr),
+    )
+
+
+def _atajos_necesarios(u, adyacencia, limite_testigos):
+    """
+    Atajos que habría que añadir al contraer u
+
+    Para cada par de vecinos (v, x) se busca un camino testigo de v a x que
+    no pase por u y no sea más largo que v -> u -> x. Si no existe, hace
+    falta el atajo v - x.
+
+    Returns:
+        list: Lista de atajos (v, x, peso)
+    """
+    vecinos = list(adyacencia[u].items())
+    atajos = []
+    for i, (v, peso_v) in enumerate(vecinos[:-1]):
+        objetivos = [(x, peso_v + peso_x) for x, peso_x in vecinos[i + 1:]]
+        maximo = max(peso for _, peso in objetivos)
+        alcanzados = _busqueda_testigos(adyacencia, v, u, maximo, limite_testigos)
+        for x, peso in objetivos:
+            if alcanzados.get(x, math.inf) > peso:
+                atajos.append((v, x, peso))
+    return atajos
+
+
+def _busqueda_testigos(adyacencia, origen, excluido, maximo, limite):
+    """Dijkstra acotado desde origen que evita el nodo excluido"""
+    distancias = {origen: 0}
+    cerrados = set()
+    cola = [(0, origen)]
+    while cola and len(cerrados) < limite:
+        distancia, u = heapq.heappop(cola)
+        if distancia > maximo:
+            break
+        if u in cerrados:
+            continue
+        cerrados.add(u)
+        for v, peso in adyacencia[u].items():
+            if v == excluido:
+                continue
+            nueva = distancia + peso
+            if nueva <= maximo and (v not in distancias or nueva < distancias[v]):
+                distancias[v] = nueva
+                heapq.heappush(cola, (nueva, v))
+    return distancias
+
+
+def guardar_jerarquia(jerarquia, ruta):
+    """
+    Guardar la jerarquía en un archivo .npz
+
+    Args:
+        jerarquia: JerarquiaContraccion a guardar
+        ruta: Ruta del archivo
+    """
+    np.savez(
+        ruta,
+        version=np.array(VERSION_FORMATO),
+        huella=np.array(jerarquia.huella or ''),
+        nombres=np.array(jerarquia.nombres.tolist(), dtype=str),
+        rangos=jerarquia.rangos,
+        offsets=jerarquia.offsets,
+        destinos=jerarquia.destinos,
+        pesos=jerarquia.pesos,
+        medios=jerarquia.medios,
+    )
+
+
+def cargar_jerarquia(ruta, huella=None):
+    """
+    Cargar una jerarquía guardada con guardar_jerarquia
+
+    Args:
+        ruta: Ruta del archivo .npz
+        huella: Si se indica, huella que deben tener los datos de origen
+
+    Returns:
+        JerarquiaContraccion o None: La jerarquía, o None si el archivo no
+            existe, es de otra versión o corresponde a otros datos
+    """
+    if not os.path.exists(ruta):
+        return None
+    with np.load(ruta) as datos:
+        if int(datos['version']) != VERSION_FORMATO:
+            return None
+        huella_guardada = str(datos['huella']) or None
+        if huella is not None and huella_guardada != huella:
+            return None
+        return JerarquiaContraccion(
+            nombres=datos['nombres'].astype(object),
+            rangos=datos['rangos'],
+            offsets=datos['offsets'],
+            destinos=datos['destinos'],
+            pesos=datos['pesos'],
+            medios=datos['medios'],
+            huella=huella_guardada,
+        )
+
+
+def cargar_o_construir_jerarquia(grafo, ruta=None):
+    """
+    Obtener la jerarquía de un grafo, reutilizando la guardada si es válida
+
+    Si el grafo se cargó con cargar_datos, la jerarquía se guarda junto a
+    los archivos de datos y solo se reconstruye cuando cambian los CSV.
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        ruta: Ruta del archivo; por defecto jerarquia_contraccion.npz junto
+            a los CSV cuando el grafo tiene archivos fuente
+
+    Returns:
+        JerarquiaContraccion: Jerarquía del grafo
+    """
+    huella = huella_grafo(grafo)
+    if ruta is None and huella is not None:
+        ruta = ruta_precalculo(grafo, ARCHIVO_JERARQUIA)
+
+    if ruta is not None and huella is not None:
+        jerarquia = cargar_jerarquia(ruta, huella)
+        if jerarquia is not None:
+            # Con los mismos nombres que el grafo, un solo diccionario para ambos
+            jerarquia.tabla_nombres = jerarquia.tabla_nombres.compartir(getattr(grafo, 'tabla_nombres', None))
+            return jerarquia
+
+    jerarquia = construir_jerarquia(grafo)
+    if ruta is not None and huella is not None:
+        guardar_jerarquia(jerarquia, ruta)
+    return jerarquia
+
+
+def main():
+    from .grafo_peru import cargar_datos
+
+    _, _, grafo = cargar_datos(motor='csr')
+    inicio = time.perf_counter()
+    jerarquia = construir_jerarquia(grafo)
+    segundos = time.perf_counter() - inicio
+    ruta = ruta_datos(ARCHIVO_JERARQUIA)
+    guardar_jerarquia(jerarquia, ruta)
+    print(f"Jerarquía construida en {segundos:.3f}s: {jerarquia.number_of_nodes()} nodos, "
+          f"{jerarquia.num_atajos()} atajos")
+    print(f"Guardada en {ruta}")
+
+if __name__ == "__main__":
+    main()
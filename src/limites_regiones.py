@@ -0,0 +1,345 @@
+"""
+Polígonos de los departamentos: adyacencia real y localización de puntos
+
+Paso previo (sin conexión) que lee los límites de los departamentos de un
+archivo local (GeoJSON, Shapefile, GeoPackage...), busca los pares que
+comparten frontera con un STRtree de shapely y los guarda en
+data/regiones_limitrofes.csv, junto con los polígonos ya unidos por
+departamento (data/regiones_limites.geojson). Al cargar los datos, cada
+arista del grafo queda marcada como limítrofe si une dos nodos del mismo
+departamento o de departamentos vecinos (ver aristas_limitrofes), y las
+búsquedas con solo_adyacentes recorren solo esas aristas.
+
+LocalizadorRegiones asigna a cada punto de un arreglo de coordenadas el
+departamento que lo contiene: los puntos se agrupan en celdas y el STRtree
+se consulta con las cajas de las celdas, no punto a punto.
+
+Uso:
+    python -m src.limites_regiones limites.geojson [columna_nombre] [tolerancia]
+"""
+import os
+import sys
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from .almacenamiento import DIRECTORIO_DATOS, rutas_tablas
+from .tablas import COLUMNAS_REGIONES, leer_tabla
+
+ARCHIVO_LIMITROFES = 'regiones_limitrofes.csv'
+ARCHIVO_POLIGONOS = 'regiones_limites.geojson'
+# Con tolerancia, un tramo de frontera común debe medir al menos tantas
+# tolerancias para no confundirlo con el contacto en una esquina
+FACTOR_LONGITUD_MINIMA = 20
+# Puntos por bloque al localizar, para acotar la memoria de los pares candidatos
+TAMANO_BLOQUE_PUNTOS = 1_000_000
+# Celdas por lado de la cuadrícula con la que se agrupan los puntos al localizar
+CELDAS_POR_LADO = 256
+# Columnas habituales con el nombre del departamento en los archivos de límites
+COLUMNAS_NOMBRE = ('region', 'NOMBDEP', 'DEPARTAMEN', 'departamento', 'nombre', 'name', 'NAME_1')
+
+
+def normalizar_nombre(nombre):
+    """Nombre sin tildes, mayúsculas ni espacios sobrantes, para emparejar fuentes distintas"""
+    sin_tildes = unicodedata.normalize('NFKD', str(nombre)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sin_tildes.casefold().split())
+
+
+def leer_poligonos(ruta, columna=None, regiones=None):
+    """
+    Leer los polígonos de los departamentos de un archivo local
+
+    Args:
+        ruta: Archivo de límites legible por geopandas
+        columna: Columna con el nombre del departamento; por defecto la
+            primera de COLUMNAS_NOMBRE que exista
+        regiones: Nombres de las regiones del proyecto (opcional); los
+            nombres del archivo se sustituyen por el que coincide sin
+            tildes ni mayúsculas
+
+    Returns:
+        tuple: (nombres, geometrias, sin_pareja) con un polígono (unido)
+            por departamento y los nombres del archivo que no coinciden con
+            ninguna región (vacío si no se indican regiones)
+
+    Raises:
+        ValueError: Si no se encuentra la columna de nombres
+    """
+    import geopandas as gpd
+
+    poligonos = gpd.read_file(ruta)
+    # Las coordenadas de las regiones y de los puntos son latitud y longitud
+    if poligonos.crs is not None and poligonos.crs.to_epsg() != 4326:
+        poligonos = poligonos.to_crs(epsg=4326)
+    if columna is None:
+        columna = next((nombre for nombre in COLUMNAS_NOMBRE if nombre in poligonos.columns), None)
+    if columna not in poligonos.columns:
+        raise ValueError(f"No se encontró la columna con el nombre de los departamentos en {ruta}. "
+                         f"Columnas: {', '.join(map(str, poligonos.columns))}")
+
+    nombres = poligonos[columna].astype(str)
+    sin_pareja = []
+    if regiones is not None:
+        por_clave = {normalizar_nombre(region): region for region in regiones}
+        claves = nombres.map(normalizar_nombre)
+        sin_pareja = sorted(set(nombres[~claves.isin(por_clave)]))
+        nombres = claves.map(por_clave)
+
+    # Un solo polígono por departamento, aunque venga en varias filas
+    poligonos = poligonos.assign(region=nombres).dropna(subset=['region']).dissolve(by='region')
+    return poligonos.index.tolist(), np.asarray(poligonos.geometry), sin_pareja
+
+
+def regiones_limitrofes(nombres, geometrias, tolerancia=0.0, longitud_minima=None):
+    """
+    Pares de departamentos que comparten frontera
+
+    Un STRtree descarta de una vez los pares cuyas cajas no se tocan; de los
+    candidatos se conservan los que comparten un tramo de frontera, no solo
+    un punto (dos departamentos que se tocan en una esquina no son vecinos).
+    Con tolerancia, el tramo común es la parte del límite de un polígono que
+    queda a menos de la tolerancia del límite del otro; junto a una esquina
+    esa parte mide unas pocas tolerancias, de ahí la longitud mínima.
+
+    Args:
+        nombres: Nombre de cada departamento
+        geometrias: Polígono de cada departamento
+        tolerancia: Distancia (en unidades del sistema de coordenadas) que
+            se admite entre los límites de dos vecinos, para cerrar huecos
+            entre límites digitalizados por separado
+        longitud_minima: Longitud mínima del tramo común; por defecto
+            FACTOR_LONGITUD_MINIMA veces la tolerancia (0 sin tolerancia)
+
+    Returns:
+        list: Tuplas (region_a, region_b) ordenadas, con region_a < region_b
+    """
+    import shapely
+
+    geometrias = np.asarray(geometrias)
+    if longitud_minima is None:
+        longitud_minima = FACTOR_LONGITUD_MINIMA * tolerancia
+    arbol = shapely.STRtree(geometrias)
+    if tolerancia:
+        izquierda, derecha = arbol.query(geometrias, predicate='dwithin', distance=tolerancia)
+    else:
+        izquierda, derecha = arbol.query(geometrias, predicate='intersects')
+    cada_par = izquierda < derecha
+    izquierda, derecha = izquierda[cada_par], derecha[cada_par]
+
+    if tolerancia:
+        limites = shapely.boundary(geometrias)
+        comun = shapely.intersection(limites[izquierda], shapely.buffer(limites[derecha], tolerancia))
+    else:
+        comun = shapely.intersection(geometrias[izquierda], geometrias[derecha])
+    frontera = shapely.length(comun) > longitud_minima
+    nombres = np.asarray(nombres, dtype=object)
+    return sorted(tuple(sorted(par)) for par in zip(nombres[izquierda[frontera]].tolist(),
+                                                    nombres[derecha[frontera]].tolist()))
+
+
+class LocalizadorRegiones:
+    """
+    Departamento que contiene cada punto, con un STRtree sobre los polígonos
+    """
+
+    def __init__(self, nombres, geometrias):
+        """
+        Args:
+            nombres: Nombre de cada departamento (su posición es su ID)
+            geometrias: Polígono de cada departamento, en latitud y longitud
+        """
+        import shapely
+
+        self.nombres = np.asarray(nombres, dtype=object)
+        self.geometrias = np.asarray(geometrias)
+        # Los polígonos preparados responden al test exacto sin recorrer todo el anillo
+        shapely.prepare(self.geometrias)
+        self.arbol = shapely.STRtree(self.geometrias)
+
+    @classmethod
+    def desde_archivo(cls, ruta, columna=None, regiones=None):
+        """
+        Crear el localizador con los polígonos de un archivo (ver leer_poligonos)
+
+        Returns:
+            LocalizadorRegiones: Localizador con un polígono por departamento
+        """
+        nombres, geometrias, _ = leer_poligonos(ruta, columna, regiones)
+        return cls(nombres, geometrias)
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def localizar(self, latitudes, longitudes, tamano_bloque=TAMANO_BLOQUE_PUNTOS):
+        """
+        IDs de los departamentos que contienen muchos puntos
+
+        Los puntos de cada bloque se agrupan en una cuadrícula sobre la
+        extensión de los polígonos y el STRtree se consulta una sola vez con
+        las cajas de las celdas ocupadas, sin crear un objeto de shapely por
+        punto. Una celda que queda dentro de un polígono asigna ese
+        departamento a todos sus puntos; solo los puntos de las celdas que
+        cruzan una frontera se comprueban contra los polígonos preparados.
+        Un punto en la frontera entre dos departamentos se asigna al de
+        menor ID.
+
+        Args:
+            latitudes: Arreglo de latitudes
+            longitudes: Arreglo de longitudes
+            tamano_bloque: Puntos por bloque, para acotar la memoria
+
+        Returns:
+            np.ndarray: ID del departamento de cada punto (posición en
+                nombres), o -1 si ninguno lo contiene
+        """
+        latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        ids = np.full(len(latitudes), -1, dtype=np.int64)
+        for inicio in range(0, len(latitudes), tamano_bloque):
+            fin = inicio + tamano_bloque
+            ids[inicio:fin] = self._localizar_bloque(latitudes[inicio:fin], longitudes[inicio:fin])
+        return ids
+
+    def _localizar_bloque(self, latitudes, longitudes):
+        """IDs de los departamentos de un bloque de puntos (ver localizar)"""
+        import shapely
+
+        sin_region = len(self.nombres)
+        ids = np.full(len(latitudes), sin_region, dtype=np.int64)
+        x_min, y_min, x_max, y_max = shapely.total_bounds(self.geometrias)
+        ancho = (x_max - x_min) / CELDAS_POR_LADO or 1.0
+        alto = (y_max - y_min) / CELDAS_POR_LADO or 1.0
+        # Los puntos fuera de la caja de todos los polígonos (o con NaN) no tienen departamento
+        puntos = np.flatnonzero((longitudes >= x_min) & (longitudes <= x_max) &
+                                (latitudes >= y_min) & (latitudes <= y_max))
+        columnas = np.minimum(((longitudes[puntos] - x_min) / ancho).astype(np.int64), CELDAS_POR_LADO - 1)
+        filas = np.minimum(((latitudes[puntos] - y_min) / alto).astype(np.int64), CELDAS_POR_LADO - 1)
+        celdas = filas * CELDAS_POR_LADO + columnas
+        # Puntos ordenados por celda: los de cada celda ocupan un tramo contiguo
+        orden = np.argsort(celdas, kind='stable')
+        puntos = puntos[orden]
+        celdas, inicios, cuentas = np.unique(celdas[orden], return_index=True, return_counts=True)
+        filas, columnas = np.divmod(celdas, CELDAS_POR_LADO)
+        cajas = shapely.box(x_min + columnas * ancho, y_min + filas * alto,
+                            x_min + (columnas + 1) * ancho, y_min + (filas + 1) * alto)
+        indices_celdas, indices_poligonos = self.arbol.query(cajas)
+
+        # Celdas dentro de un polígono: todos sus puntos son de ese departamento
+        cubre = shapely.contains_properly(self.geometrias[indices_poligonos], cajas[indices_celdas])
+        cubierta = np.full(len(celdas), sin_region, dtype=np.int64)
+        np.minimum.at(cubierta, indices_celdas[cubre], indices_poligonos[cubre])
+        ids[puntos] = np.repeat(cubierta, cuentas)
+
+        # El resto de candidatos (solo los de menor ID que el que cubre la celda) punto a punto
+        resto = indices_poligonos < cubierta[indices_celdas]
+        indices_celdas, indices_poligonos = indices_celdas[resto], indices_poligonos[resto]
+        repeticiones = cuentas[indices_celdas]
+        desplazamientos = np.arange(repeticiones.sum()) - np.repeat(np.cumsum(repeticiones) - repeticiones,
+                                                                    repeticiones)
+        pares_puntos = puntos[np.repeat(inicios[indices_celdas], repeticiones) + desplazamientos]
+        pares_poligonos = np.repeat(indices_poligonos, repeticiones)
+        dentro = shapely.intersects_xy(self.geometrias[pares_poligonos],
+                                       longitudes[pares_puntos], latitudes[pares_puntos])
+        np.minimum.at(ids, pares_puntos[dentro], pares_poligonos[dentro])
+        ids[ids == sin_region] = -1
+        return ids
+
+    def nombres_de(self, ids):
+        """Nombres de los departamentos de una secuencia de IDs (None para -1)"""
+        return np.append(self.nombres, None)[np.asarray(ids, dtype=np.int64)]
+
+
+def guardar_poligonos(nombres, geometrias, ruta):
+    """Guardar los polígonos unidos por departamento (columna region) en GeoJSON"""
+    import geopandas as gpd
+
+    gpd.GeoDataFrame({'region': list(nombres)}, geometry=list(geometrias), crs='EPSG:4326').to_file(
+        ruta, driver='GeoJSON'
+    )
+
+
+def guardar_limitrofes(pares, ruta):
+    """Guardar los pares de departamentos vecinos en un CSV (region_a, region_b)"""
+    pd.DataFrame(pares, columns=['region_a', 'region_b']).to_csv(ruta, index=False)
+
+
+def cargar_limitrofes(ruta):
+    """
+    Leer los pares de departamentos vecinos
+
+    Returns:
+        list: Tuplas (region_a, region_b), o None si el archivo no existe
+    """
+    if not os.path.exists(ruta):
+        return None
+    pares = pd.read_csv(ruta, dtype=str)
+    return list(zip(pares['region_a'].tolist(), pares['region_b'].tolist()))
+
+
+def aristas_limitrofes(regiones_origen, regiones_destino, pares):
+    """
+    Marcar las aristas que unen departamentos iguales o vecinos
+
+    Los nombres se comparan sin tildes ni mayúsculas (ver normalizar_nombre),
+    porque la tabla de distancias y la de regiones no siempre los escriben
+    igual ('Apurímac' y 'Apurimac').
+
+    Args:
+        regiones_origen: Departamento del primer extremo de cada arista
+        regiones_destino: Departamento del segundo extremo de cada arista
+        pares: Pares de departamentos vecinos (ver regiones_limitrofes)
+
+    Returns:
+        np.ndarray: Arreglo booleano con una posición por arista; las
+            aristas con algún extremo sin departamento quedan en False
+    """
+    pares = list(pares)
+    codigos, nombres = pd.factorize(pd.Series(
+        [nombre for par in pares for nombre in par] + list(regiones_origen) + list(regiones_destino),
+        dtype=object
+    ))
+    # Cada nombre distinto se normaliza una sola vez
+    normalizados, claves_nombres = pd.factorize(pd.Series([normalizar_nombre(nombre) for nombre in nombres],
+                                                          dtype=object))
+    codigos = np.where(codigos >= 0, normalizados[codigos], -1)
+    num_pares, num_aristas = len(pares), len(regiones_origen)
+    n = len(claves_nombres)
+    u = codigos[2 * num_pares:2 * num_pares + num_aristas]
+    v = codigos[2 * num_pares + num_aristas:]
+    # Claves canónicas de los pares, como en IndiceAdyacencia
+    a, b = codigos[0:2 * num_pares:2], codigos[1:2 * num_pares:2]
+    vecinos = np.minimum(a, b) * n + np.maximum(a, b)
+    claves = np.minimum(u, v) * n + np.maximum(u, v)
+    conocidos = (u >= 0) & (v >= 0)
+    return conocidos & ((u == v) | np.isin(claves, vecinos))
+
+
+def main(ruta_poligonos, columna=None, tolerancia=0.0, directorio=None):
+    directorio = directorio or DIRECTORIO_DATOS
+    regiones_path, _, _ = rutas_tablas(directorio)
+    regiones = leer_tabla(regiones_path, COLUMNAS_REGIONES)['region'].tolist()
+
+    nombres, geometrias, sin_pareja = leer_poligonos(ruta_poligonos, columna, regiones)
+    if sin_pareja:
+        print(f"Polígonos sin región en {os.path.basename(regiones_path)}: {', '.join(sin_pareja)}")
+    sin_poligono = sorted(set(regiones) - set(nombres))
+    if sin_poligono:
+        print(f"Regiones sin polígono (sus aristas no serán limítrofes): {', '.join(sin_poligono)}")
+
+    pares = regiones_limitrofes(nombres, geometrias, tolerancia)
+    destino = os.path.join(directorio, ARCHIVO_LIMITROFES)
+    guardar_limitrofes(pares, destino)
+    print(f"{len(pares)} pares de departamentos vecinos guardados en {destino}")
+    # Los polígonos ya emparejados sirven para localizar puntos (LocalizadorRegiones)
+    destino = os.path.join(directorio, ARCHIVO_POLIGONOS)
+    guardar_poligonos(nombres, geometrias, destino)
+    print(f"{len(nombres)} polígonos de departamentos guardados en {destino}")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    if not argumentos:
+        print(__doc__)
+        sys.exit(1)
+    main(argumentos[0], argumentos[1] if len(argumentos) > 1 else None,
+         float(argumentos[2]) if len(argumentos) > 2 else 0.0)
@@ -0,0 +1,150 @@
+"""
+Memoria de los procesos y arreglos del grafo compartidos entre procesos
+
+Los procesos que calculan rutas en paralelo no necesitan una copia propia
+del grafo: GrafoCompartido copia una sola vez los arreglos numéricos de un
+GrafoCSR en un bloque de memoria compartida (multiprocessing.shared_memory)
+y cada proceso los usa directamente desde ese bloque. Las instantáneas y
+tablas de distancias guardadas en disco se comparten de otra forma: se abren
+mapeadas en memoria y el sistema operativo mantiene una sola copia de sus
+páginas para todos los procesos.
+"""
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .grafo_csr import ARREGLOS_CSR, GrafoCSR
+
+# Campos de /proc/<pid>/status que informa uso_memoria
+CAMPOS_MEMORIA = {
+    'VmRSS': 'rss',
+    'VmHWM': 'pico',
+    'RssAnon': 'privada',
+    'RssFile': 'archivos',
+    'RssShmem': 'compartida',
+}
+# Alineación en bytes de cada arreglo dentro del bloque compartido
+ALINEACION = 64
+
+
+def uso_memoria(pid=None):
+    """
+    Memoria residente de un proceso (solo Linux)
+
+    La memoria privada es la que cuesta cada proceso; las páginas de archivos
+    mapeados y de memoria compartida se cuentan en el RSS de todos los
+    procesos que las usan, pero existen una sola vez.
+
+    Args:
+        pid: Identificador del proceso; por defecto el proceso actual
+
+    Returns:
+        dict o None: 'rss', 'pico' (RSS máximo alcanzado), 'privada',
+            'archivos' y 'compartida' en bytes, o None si el sistema no
+            ofrece /proc
+    """
+    ruta = os.path.join('/proc', str(pid) if pid is not None else 'self', 'status')
+    try:
+        with open(ruta, encoding='ascii') as archivo:
+            lineas = archivo.readlines()
+    except OSError:
+        return None
+
+    uso = {}
+    for linea in lineas:
+        campo, _, valor = linea.partition(':')
+        if campo in CAMPOS_MEMORIA:
+            # Los valores vienen en kB
+            uso[CAMPOS_MEMORIA[campo]] = int(valor.split()[0]) * 1024
+    return uso
+
+
+class GrafoCompartido:
+    """
+    Arreglos de un GrafoCSR en un bloque de memoria compartida
+
+    El proceso que lo crea es el dueño del bloque y debe cerrarlo (o usarlo
+    como gestor de contexto) para liberarlo. La instancia se puede enviar a
+    otros procesos: solo viaja el nombre del bloque, la posición de cada
+    arreglo y los nombres de los nodos, y abrir() reconstruye allí el grafo
+    sin copiar los arreglos. Los arreglos de los grafos abiertos son de solo
+    lectura: los cambios de tramos (ver cierres_viales) trabajan sobre
+    copias privadas del proceso y nunca modifican el bloque.
+    """
+
+    def __init__(self, grafo):
+        """
+        Args:
+            grafo: GrafoCSR cuyos arreglos se copian al bloque
+        """
+        arreglos = {nombre: getattr(grafo, nombre) for nombre in ARREGLOS_CSR}
+        for numero, (codigos, _) in enumerate(grafo.atributos_aristas.values()):
+            arreglos[f'atributo_{numero}'] = codigos
+        for numero, valores in enumerate(grafo.metricas_aristas.values()):
+            arreglos[f'metrica_{numero}'] = valores
+
+        posiciones = []
+        tamano = 0
+        for nombre, arreglo in arreglos.items():
+            posiciones.append((nombre, arreglo.dtype.str, arreglo.shape, tamano))
+            tamano += -(-arreglo.nbytes // ALINEACION) * ALINEACION
+
+        self._bloque = shared_memory.SharedMemory(create=True, size=max(tamano, 1))
+        self._dueno = True
+        for nombre, tipo, forma, posicion in posiciones:
+            destino = np.ndarray(forma, dtype=tipo, buffer=self._bloque.buf, offset=posicion)
+            destino[...] = arreglos[nombre]
+        del destino
+
+        self.nombre_bloque = self._bloque.name
+        self.posiciones = posiciones
+        self.nombres = grafo.nombres
+        self.categorias = [(nombre, categorias) for nombre, (_, categorias) in grafo.atributos_aristas.items()]
+        self.metricas = list(grafo.metricas_aristas)
+
+    def __getstate__(self):
+        estado = dict(self.__dict__)
+        estado['_bloque'] = None
+        estado['_dueno'] = False
+        return estado
+
+    def abrir(self):
+        """
+        Grafo cuyos arreglos apuntan al bloque compartido
+
+        La instancia debe seguir viva mientras se use el grafo.
+
+        Returns:
+            GrafoCSR: Grafo equivalente al original (sin sus metadatos `graph`)
+        """
+        if self._bloque is None:
+            self._bloque = shared_memory.SharedMemory(name=self.nombre_bloque)
+        arreglos = {
+            nombre: np.ndarray(forma, dtype=tipo, buffer=self._bloque.buf, offset=posicion)
+            for nombre, tipo, forma, posicion in self.posiciones
+        }
+        for arreglo in arreglos.values():
+            arreglo.flags.writeable = False
+        atributos = {
+            nombre: (arreglos[f'atributo_{numero}'], categorias)
+            for numero, (nombre, categorias) in enumerate(self.categorias)
+        }
+        metricas = {nombre: arreglos[f'metrica_{numero}'] for numero, nombre in enumerate(self.metricas)}
+        return GrafoCSR(nombres=self.nombres, atributos_aristas=atributos, metricas_aristas=metricas,
+                        **{nombre: arreglos[nombre] for nombre in ARREGLOS_CSR})
+
+    def cerrar(self):
+        """Liberar el bloque (solo el proceso dueño lo elimina del sistema)"""
+        if self._bloque is None:
+            return
+        self._bloque.close()
+        if self._dueno:
+            self._bloque.unlink()
+        self._bloque = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
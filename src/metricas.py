@@ -0,0 +1,74 @@
+"""
+Métricas de las aristas: distancia, tiempo, peajes, desnivel...
+
+Además de la distancia en km, cada arista puede tener otras métricas
+(columnas opcionales de la tabla de distancias). En el GrafoCSR cada métrica
+es un arreglo por arista paralelo a los pesos, y en NetworkX un atributo más
+de la arista. Las búsquedas reciben la métrica en cada consulta: el nombre
+de una columna o una combinación lineal {nombre: coeficiente}, sin
+reconstruir el grafo.
+"""
+
+METRICA_DISTANCIA = 'distancia_km'
+# Columnas opcionales de la tabla de distancias que se cargan como métricas
+COLUMNAS_METRICAS = ['tiempo_min', 'peaje_soles', 'desnivel_m']
+
+
+def normalizar_metrica(metrica=None):
+    """
+    Forma canónica de una métrica, utilizable como clave de diccionario
+
+    Args:
+        metrica: None (la distancia), nombre de una métrica o diccionario
+            {nombre: coeficiente} con una combinación lineal
+
+    Returns:
+        tuple: Pares (nombre, coeficiente) ordenados por nombre, sin los
+            coeficientes nulos
+
+    Raises:
+        ValueError: Si algún coeficiente es negativo (las búsquedas
+            necesitan pesos no negativos) o la combinación queda vacía
+    """
+    if metrica is None:
+        return ((METRICA_DISTANCIA, 1.0),)
+    if isinstance(metrica, str):
+        return ((metrica, 1.0),)
+
+    combinacion = []
+    for nombre, coeficiente in sorted(dict(metrica).items()):
+        coeficiente = float(coeficiente)
+        if coeficiente < 0:
+            raise ValueError(f"El coeficiente de la métrica {nombre} no puede ser negativo "
+                             f"(recibido {coeficiente})")
+        if coeficiente > 0:
+            combinacion.append((nombre, coeficiente))
+    if not combinacion:
+        raise ValueError("La combinación de métricas no tiene ningún coeficiente positivo")
+    return tuple(combinacion)
+
+
+def es_distancia(metrica):
+    """Verificar si una métrica es la distancia en km sin escalar"""
+    return normalizar_metrica(metrica) == ((METRICA_DISTANCIA, 1.0),)
+
+
+def coeficiente_distancia(metrica):
+    """
+    Coeficiente de la distancia en una métrica
+
+    Como las demás métricas no son negativas, ese coeficiente por la
+    distancia en línea recta sigue siendo una cota inferior para A*.
+    """
+    return dict(normalizar_metrica(metrica)).get(METRICA_DISTANCIA, 0.0)
+
+
+def atributo_arista(nombre):
+    """Atributo de las aristas de NetworkX que guarda una métrica"""
+    return 'weight' if nombre == METRICA_DISTANCIA else nombre
+
+
+def describir_metrica(metrica):
+    """Texto legible de una métrica, por ejemplo '0.5·distancia_km + peaje_soles'"""
+    return ' + '.join(nombre if coeficiente == 1 else f"{coeficiente:g}·{nombre}"
+                      for nombre, coeficiente in normalizar_metrica(metrica))
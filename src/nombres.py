@@ -0,0 +1,127 @@
+"""
+Tabla de internado de los nombres de los nodos (nombre <-> ID entero)
+
+Los nombres de las regiones solo se usan en los bordes de la API: el grafo,
+los precálculos y las búsquedas trabajan con IDs enteros consecutivos. Una
+sola TablaNombres por grafo, construida al cargar los datos, se comparte
+entre el GrafoCSR, la tabla de distancias, la jerarquía de contracción y el
+índice de adyacencia, en lugar de que cada estructura guarde su propio
+diccionario nombre -> ID. Las columnas de nombres de los DataFrames se
+codifican como categóricas sobre los mismos textos (ver codificar), de modo
+que cada nombre existe una sola vez en memoria.
+"""
+import numpy as np
+import pandas as pd
+
+
+class TablaNombres:
+    """
+    Nombres de los nodos por ID y su índice inverso
+
+    El diccionario nombre -> ID y el tipo categórico se construyen en el
+    primer uso: las estructuras que solo necesitan traducir IDs a nombres
+    no los pagan.
+    """
+
+    def __init__(self, nombres, indices=None):
+        """
+        Args:
+            nombres: Secuencia con el nombre de cada ID de nodo
+            indices: Diccionario nombre -> ID ya construido (opcional)
+        """
+        if isinstance(nombres, np.ndarray) and nombres.dtype == object:
+            self.nombres = nombres
+        else:
+            self.nombres = np.empty(len(nombres), dtype=object)
+            self.nombres[:] = list(nombres)
+        self._indices = indices
+        self._tipo = None
+
+    @classmethod
+    def crear(cls, nombres):
+        """Devolver la tabla recibida o crear una con los nombres indicados"""
+        return nombres if isinstance(nombres, cls) else cls(nombres)
+
+    @property
+    def indices(self):
+        """Diccionario nombre -> ID, construido en el primer acceso"""
+        if self._indices is None:
+            self._indices = {nombre: i for i, nombre in enumerate(self.nombres.tolist())}
+        return self._indices
+
+    @property
+    def tipo(self):
+        """Tipo categórico con los nombres como categorías (el código es el ID)"""
+        if self._tipo is None:
+            self._tipo = pd.CategoricalDtype(pd.Index(self.nombres, dtype=object, copy=False))
+        return self._tipo
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def __contains__(self, nombre):
+        return nombre in self.indices
+
+    def id_nodo(self, nombre):
+        """
+        Obtener el identificador entero de un nodo
+
+        Raises:
+            KeyError: Si el nodo no existe en la tabla
+        """
+        try:
+            return self.indices[nombre]
+        except KeyError:
+            raise KeyError(f"El nodo {nombre} no existe en el grafo")
+
+    def ids(self, nombres):
+        """
+        IDs de muchos nombres a la vez
+
+        Cada nombre distinto se busca una sola vez en el diccionario.
+
+        Args:
+            nombres: Secuencia de nombres
+
+        Returns:
+            np.ndarray: IDs en el mismo orden, -1 para los nombres desconocidos
+        """
+        codigos, unicos = pd.factorize(np.asarray(nombres, dtype=object))
+        indices = self.indices
+        ids = np.fromiter((indices.get(nombre, -1) for nombre in unicos.tolist()),
+                          dtype=np.int64, count=len(unicos))
+        return np.where(codigos >= 0, ids[codigos], -1)
+
+    def nombres_de(self, ids):
+        """Lista de nombres de una secuencia de IDs"""
+        return self.nombres[np.asarray(ids, dtype=np.int64)].tolist()
+
+    def codificar(self, nombres):
+        """
+        Columna de nombres codificada como categórica sobre esta tabla
+
+        Args:
+            nombres: Secuencia de nombres
+
+        Returns:
+            pd.Categorical: Códigos iguales a los IDs de los nodos (nulos para
+                los nombres desconocidos)
+        """
+        return pd.Categorical.from_codes(self.ids(nombres), dtype=self.tipo)
+
+    def compartir(self, otra):
+        """
+        Tabla común para dos estructuras del mismo grafo
+
+        Args:
+            otra: TablaNombres de otra estructura (por ejemplo, la del grafo)
+
+        Returns:
+            TablaNombres: otra si tiene los mismos nombres en el mismo orden
+                (así se guarda un solo diccionario); si no, esta misma tabla
+        """
+        if otra is self or otra is None:
+            return self
+        if len(otra) == len(self) and (otra.nombres == self.nombres).all():
+            return otra
+        return self
@@ -17,16 +17,18 @@ def main():
     # Crear el grafo
     grafo = nx.Graph()
     
-    # Añadir nodos (regiones)
-    for idx, region in df_regiones.iterrows():
-        grafo.add_node(region['region'], 
-                        lat=region['latitude'], 
-                        lon=region['longitude'])
+    # Añadir nodos (regiones) en bloque a partir de las columnas
+    grafo.add_nodes_from(
+        (region, {'lat': lat, 'lon': lon})
+        for region, lat, lon in zip(df_regiones['region'].tolist(),
+                                    df_regiones['latitude'].tolist(),
+                                    df_regiones['longitude'].tolist())
+    )
     
-    # Añadir aristas (conexiones entre regiones)
-    for idx, ruta in df_distancias.iterrows():
-        grafo.add_edge(ruta['origen'], ruta['destino'], 
-                        weight=ruta['distancia_km'])
+    # Añadir aristas (conexiones entre regiones) en bloque
+    grafo.add_weighted_edges_from(zip(df_distancias['origen'].tolist(),
+                                      df_distancias['destino'].tolist(),
+                                      df_distancias['distancia_km'].tolist()))
     
     # Lista de pruebas origen-destino
     pruebas = [
@@ -44,8 +46,7 @@ def main():
     
     for origen, destino in pruebas:
         try:
-            ruta = nx.dijkstra_path(grafo, origen, destino, weight='weight')
-            distancia = nx.dijkstra_path_length(grafo, origen, destino, weight='weight')
+            distancia, ruta = nx.single_source_dijkstra(grafo, origen, destino, weight='weight')
             print(f"\nRuta más corta de {origen} a {destino}:")
             print(f"Distancia: {distancia} km")
             print(f"Ruta: {' -> '.join(ruta)}")
@@ -0,0 +1,122 @@
+"""
+Resultado compacto de una ruta
+
+Una ruta se guarda como dos arreglos de NumPy: los IDs de sus nodos y la
+distancia de cada tramo, más el coste de cada tramo cuando se minimiza otra
+métrica. Los nombres, las distancias acumuladas y los formatos de
+obtener_detalles_ruta (lista de diccionarios por tramo y diccionario
+{(origen, destino): distancia}) son vistas que se construyen al pedirlas,
+de modo que una caché o un lote de millones de rutas no reserva un
+diccionario por tramo.
+"""
+import numpy as np
+
+from .nombres import TablaNombres
+
+
+class ResultadoRuta:
+    """
+    Nodos y tramos de una ruta, con vistas perezosas de sus detalles
+
+    Admite resultado['detalles'] y resultado['distancias_segmentos'] igual
+    que el diccionario que devolvía obtener_detalles_ruta.
+    """
+
+    __slots__ = ('tabla_nombres', 'ids', 'tramos', 'costos')
+
+    def __init__(self, tabla_nombres, ids, tramos, costos=None):
+        """
+        Args:
+            tabla_nombres: TablaNombres que traduce los IDs (puede asignarse
+                después, por ejemplo al recibir el resultado de otro proceso)
+            ids: Secuencia de IDs de los nodos de la ruta
+            tramos: Distancia en km de cada tramo (un valor menos que ids)
+            costos: Valor de la métrica en cada tramo, si no es la distancia
+        """
+        self.tabla_nombres = tabla_nombres
+        ids = np.asarray(ids, dtype=np.int64)
+        # IDs de 32 bits, como los índices del GrafoCSR, salvo en grafos enormes
+        self.ids = ids.astype(np.int32) if not len(ids) or ids.max() < 2**31 else ids
+        self.tramos = np.asarray(tramos)
+        self.costos = None if costos is None else np.asarray(costos)
+
+    @classmethod
+    def desde_nombres(cls, ruta, tramos, costos=None):
+        """
+        Resultado de una ruta dada por nombres (por ejemplo, de un grafo de NetworkX)
+
+        Args:
+            ruta: Lista de nombres de los nodos
+            tramos: Distancia en km de cada tramo
+            costos: Valor de la métrica en cada tramo, si no es la distancia
+
+        Returns:
+            ResultadoRuta: Resultado con una tabla de nombres propia de la ruta
+        """
+        return cls(TablaNombres(ruta), np.arange(len(ruta)), tramos, costos)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, clave):
+        if clave in ('detalles', 'distancias_segmentos'):
+            return getattr(self, clave)
+        raise KeyError(clave)
+
+    def __repr__(self):
+        if not len(self.ids):
+            return "ResultadoRuta(vacía)"
+        nombres = self.tabla_nombres.nombres_de(self.ids[[0, -1]])
+        return f"ResultadoRuta({nombres[0]} → {nombres[1]}, {len(self.ids)} nodos, {self.distancia} km)"
+
+    @property
+    def ruta(self):
+        """Lista de nombres de los nodos de la ruta"""
+        return self.tabla_nombres.nombres_de(self.ids)
+
+    @property
+    def distancia(self):
+        """Distancia total en km"""
+        return self.acumuladas[-1].item() if len(self.ids) else 0
+
+    @property
+    def costo(self):
+        """Valor total de la métrica minimizada (la distancia si no hay otra)"""
+        if self.costos is None:
+            return self.distancia
+        return np.cumsum(self.costos)[-1].item() if len(self.costos) else 0
+
+    @property
+    def acumuladas(self):
+        """
+        Distancia acumulada desde el origen hasta cada nodo (empieza en 0)
+
+        Se suma tramo a tramo en orden, igual que la búsqueda, así que el
+        último valor coincide con la distancia que devuelve la búsqueda.
+        """
+        return np.concatenate(([0], np.cumsum(self.tramos))).astype(self.tramos.dtype, copy=False)
+
+    @property
+    def detalles(self):
+        """Lista de diccionarios {'origen', 'destino', 'distancia_km'} por tramo ('costo' con otra métrica)"""
+        ruta = self.ruta
+        if self.costos is None:
+            return [{'origen': origen, 'destino': destino, 'distancia_km': distancia}
+                    for origen, destino, distancia in zip(ruta, ruta[1:], self.tramos.tolist())]
+        return [{'origen': origen, 'destino': destino, 'distancia_km': distancia, 'costo': costo}
+                for origen, destino, distancia, costo in zip(ruta, ruta[1:], self.tramos.tolist(),
+                                                               self.costos.tolist())]
+
+    @property
+    def distancias_segmentos(self):
+        """Diccionario {(origen, destino): distancia} de los tramos, para la visualización"""
+        ruta = self.ruta
+        return dict(zip(zip(ruta, ruta[1:]), self.tramos.tolist()))
+
+    def a_diccionario(self):
+        """Detalles en el formato de diccionario de obtener_detalles_ruta"""
+        return {'detalles': self.detalles, 'distancias_segmentos': self.distancias_segmentos}
+
+    def nbytes(self):
+        """Memoria de los arreglos del resultado (en bytes)"""
+        return self.ids.nbytes + self.tramos.nbytes + (0 if self.costos is None else self.costos.nbytes)
@@ -0,0 +1,181 @@
+"""
+Rutas alternativas: las k rutas más cortas sin ciclos (algoritmo de Yen)
+
+Cada ruta nueva se obtiene desviándose de una ruta ya aceptada en uno de sus
+nodos (el nodo de desvío), sin repetir los nodos anteriores ni las salidas ya
+usadas por otras rutas con el mismo tramo inicial. Dos mejoras evitan que
+k rutas cuesten k búsquedas completas o más:
+    - El árbol de caminos mínimos hacia el destino se calcula una sola vez
+      (o se toma de la tabla de distancias) y sirve de heurística exacta
+      para A* en cada desvío. La búsqueda termina en cuanto alcanza un nodo
+      cuyo camino del árbol al destino no usa nodos ni aristas prohibidos,
+      así que suele asentar solo unos pocos nodos. El árbol se limita a los
+      nodos a menos de FACTOR_ARBOL veces la distancia de la mejor ruta; para
+      los demás, ese límite es una cota inferior válida de su distancia.
+    - Mejora de Lawler: de cada ruta solo se exploran los desvíos a partir
+      del nodo en que se separó de la ruta de la que procede; los anteriores
+      ya se calcularon para esa ruta.
+"""
+import heapq
+import math
+
+from .busqueda import arbol_caminos_minimos, vecinos_de
+
+# Radio del árbol hacia el destino, en múltiplos de la distancia de la mejor ruta
+FACTOR_ARBOL = 1.5
+
+
+def _camino_del_arbol(siguientes, nodo, destino):
+    """Nodos del camino del árbol desde un nodo hasta el destino (incluidos ambos)"""
+    camino = [nodo]
+    while camino[-1] != destino:
+        camino.append(siguientes[camino[-1]])
+    return camino
+
+
+def _tramos(pesos, grafo, ruta):
+    """Peso de cada tramo de una ruta de IDs"""
+    return [pesos[grafo.posicion_arista(u, v)].item() for u, v in zip(ruta, ruta[1:])]
+
+
+def _desvio(vecinos, desvio, destino, distancias, siguientes, prohibidos, salidas_prohibidas,
+            estadisticas):
+    """
+    Ruta más corta de desvio al destino sin pasar por los nodos prohibidos ni
+    salir de desvio hacia salidas_prohibidas
+
+    Returns:
+        tuple: (ruta, distancia) o (None, inf) si no existe
+    """
+    def camino_libre(nodo):
+        """Verificar si el camino del árbol desde nodo es válido para este desvío"""
+        if nodo == destino:
+            return True
+        siguiente = siguientes[nodo]
+        if siguiente < 0 or (nodo == desvio and siguiente in salidas_prohibidas):
+            return False
+        while siguiente != destino:
+            if siguiente in prohibidos or siguiente == desvio:
+                return False
+            siguiente = siguientes[siguiente]
+        return True
+
+    costos = {desvio: 0}
+    previos = {desvio: None}
+    cerrados = set()
+    cola = [(distancias[desvio], 0, desvio)]
+    extraer = heapq.heappop
+    insertar = heapq.heappush
+
+    while cola:
+        _, costo, u = extraer(cola)
+        if u in cerrados:
+            continue
+        cerrados.add(u)
+        if camino_libre(u):
+            estadisticas['nodos_asentados'] += len(cerrados)
+            ruta = [u]
+            while previos[ruta[-1]] is not None:
+                ruta.append(previos[ruta[-1]])
+            ruta.reverse()
+            return ruta + _camino_del_arbol(siguientes, u, destino)[1:], costo + distancias[u]
+
+        for v, peso in vecinos(u):
+            if v in cerrados or v in prohibidos or distancias[v] == math.inf:
+                continue
+            if u == desvio and v in salidas_prohibidas:
+                continue
+            nuevo = costo + peso
+            if nuevo < costos.get(v, math.inf):
+                costos[v] = nuevo
+                previos[v] = u
+                insertar(cola, (nuevo + distancias[v], nuevo, v))
+
+    estadisticas['nodos_asentados'] += len(cerrados)
+    return None, math.inf
+
+
+def k_rutas_mas_cortas(grafo, origen, destino, k, arbol=None, estadisticas=None, metrica=None):
+    """
+    Las k rutas más cortas sin ciclos entre dos nodos, de menor a mayor distancia
+
+    Args:
+        grafo: GrafoCSR
+        origen: ID del nodo de origen
+        destino: ID del nodo de destino
+        k: Número máximo de rutas
+        arbol: Tupla opcional (distancias, predecesores) del árbol completo
+            de caminos mínimos con raíz en el destino, en la misma métrica
+            (por ejemplo, la fila del destino de la tabla de distancias); si
+            no se indica se calcula hasta FACTOR_ARBOL veces la distancia de
+            la mejor ruta
+        estadisticas: Diccionario opcional donde se guardan 'nodos_asentados'
+            (en total, incluido el árbol si se calcula) y 'busquedas' (desvíos
+            explorados)
+        metrica: Métrica de los pesos; por defecto la distancia (ver
+            GrafoCSR.pesos_metrica)
+
+    Returns:
+        list: Tuplas (ruta, distancia, segmentos) con la ruta como lista de
+            IDs; vacía si no existe camino
+    """
+    if estadisticas is None:
+        estadisticas = {}
+    estadisticas['nodos_asentados'] = 0
+    estadisticas['busquedas'] = 0
+
+    vecinos = vecinos_de(grafo, metrica)
+    pesos = grafo.pesos_metrica(metrica)
+    num_nodos = grafo.number_of_nodes()
+    cota = math.inf
+    if arbol is None:
+        # Primero la distancia de la mejor ruta y después el árbol hasta el radio elegido
+        hasta_origen, _ = arbol_caminos_minimos(vecinos, destino, num_nodos, objetivos=[origen])
+        estadisticas['nodos_asentados'] += int((hasta_origen < math.inf).sum())
+        if hasta_origen[origen] == math.inf:
+            return []
+        cota = FACTOR_ARBOL * hasta_origen[origen]
+        arbol = arbol_caminos_minimos(vecinos, destino, num_nodos, limite=cota)
+        estadisticas['nodos_asentados'] += int((arbol[0] < math.inf).sum())
+    distancias, siguientes = (valores.tolist() for valores in arbol)
+    if k < 1 or distancias[origen] == math.inf:
+        return []
+    if cota < math.inf:
+        # Los nodos fuera del árbol están como mínimo a la distancia del límite
+        distancias = [distancia if distancia < cota else cota for distancia in distancias]
+
+    # Rutas aceptadas, con el índice del nodo en que se desviaron de su ruta de procedencia
+    aceptadas = [(_camino_del_arbol(siguientes, origen, destino), 0)]
+    candidatas = []
+    vistas = {tuple(aceptadas[0][0])}
+    contador = 0
+
+    while len(aceptadas) < k:
+        ruta, desviacion = aceptadas[-1]
+        tramos = _tramos(pesos, grafo, ruta)
+        costo_raiz = sum(tramos[:desviacion])
+        for i in range(desviacion, len(ruta) - 1):
+            raiz = ruta[:i + 1]
+            salidas_prohibidas = {otra[i + 1] for otra, _ in aceptadas
+                                  if len(otra) > i + 1 and otra[:i + 1] == raiz}
+            estadisticas['busquedas'] += 1
+            tramo_desvio, costo_desvio = _desvio(vecinos, ruta[i], destino, distancias, siguientes,
+                                                 set(raiz[:-1]), salidas_prohibidas, estadisticas)
+            if tramo_desvio is not None:
+                nueva = raiz[:-1] + tramo_desvio
+                if tuple(nueva) not in vistas:
+                    vistas.add(tuple(nueva))
+                    heapq.heappush(candidatas, (costo_raiz + costo_desvio, contador, nueva, i))
+                    contador += 1
+            costo_raiz += tramos[i]
+
+        if not candidatas:
+            break
+        _, _, nueva, desviacion = heapq.heappop(candidatas)
+        aceptadas.append((nueva, desviacion))
+
+    resultados = []
+    for ruta, _ in aceptadas:
+        segmentos = _tramos(pesos, grafo, ruta)
+        resultados.append((ruta, sum(segmentos), segmentos))
+    return resultados
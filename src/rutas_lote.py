@@ -0,0 +1,316 @@
+"""
+Cálculo de rutas por lotes (matrices origen-destino)
+
+Los pares se agrupan por origen para que un solo árbol de caminos mínimos
+sirva a todos los destinos de ese origen, y los grupos se reparten entre
+procesos. Los arreglos del grafo se copian una sola vez a memoria
+compartida y todos los procesos los leen de ahí, sin una copia propia
+(ver GrafoCompartido), y los resultados se devuelven como un generador, procesando la
+entrada por bloques para que la memoria no crezca con el tamaño del lote.
+
+matriz_distancias calcula con el mismo esquema matrices de distancias entre
+un conjunto de orígenes y otro de destinos, densas (en memoria o en un
+archivo .npy mapeado en memoria) o dispersas cuando se acota la distancia.
+"""
+import multiprocessing
+from itertools import islice
+
+import numpy as np
+
+from .busqueda import arbol_caminos_minimos, ruta_desde_predecesores, vecinos_de
+from .grafo_csr import GrafoCSR
+from .memoria import GrafoCompartido
+from .metricas import es_distancia
+from .resultado_ruta import ResultadoRuta
+
+# Pares leídos de la entrada antes de agruparlos y repartirlos
+TAMANO_BLOQUE = 10_000
+
+# Estado de cada proceso del pool, fijado por _iniciar_trabajador
+_compartido_trabajador = None
+_grafo_trabajador = None
+_vecinos_trabajador = None
+_destinos_trabajador = None
+
+
+def _iniciar_trabajador(compartido, destinos=None, metrica=None):
+    """Abrir el grafo compartido (y guardar los destinos de una matriz) en el proceso (inicializador del pool)"""
+    global _compartido_trabajador, _grafo_trabajador, _vecinos_trabajador, _destinos_trabajador
+    _compartido_trabajador = compartido
+    _grafo_trabajador = compartido.abrir()
+    _vecinos_trabajador = vecinos_de(_grafo_trabajador, metrica)
+    _destinos_trabajador = destinos
+
+
+def _resolver_grupo(tarea):
+    """Resolver un grupo con el grafo del proceso (función de las tareas del pool)"""
+    resultados = resolver_grupo(_grafo_trabajador, _vecinos_trabajador, *tarea)
+    for _, _, ruta, _ in resultados:
+        if isinstance(ruta, ResultadoRuta):
+            # La tabla de nombres no viaja con cada ruta: se asigna al recibirla
+            ruta.tabla_nombres = None
+    return resultados
+
+
+def ruta_compacta(grafo, ids, metrica=None, llegadas=None):
+    """
+    ResultadoRuta de una ruta de IDs, con la distancia (y el coste) de cada tramo
+
+    Args:
+        grafo: GrafoCSR
+        ids: Lista de IDs de los nodos de la ruta
+        metrica: Métrica minimizada; por defecto la distancia
+        llegadas: Arreglo opcional con el peso, en la métrica, de la arista
+            por la que se llega a cada nodo en el árbol de la ruta (ver
+            arbol_caminos_minimos con con_tramos); los tramos se leen de él
+            sin buscar las aristas en el grafo
+
+    Returns:
+        ResultadoRuta: Resultado con la tabla de nombres del grafo
+    """
+    pesos_metrica = grafo.pesos_metrica(metrica)
+    if llegadas is not None:
+        valores = llegadas[ids[1:]].astype(pesos_metrica.dtype, copy=False)
+        if es_distancia(metrica):
+            return ResultadoRuta(grafo.tabla_nombres, ids, valores)
+        # Con otra métrica la distancia en km de cada tramo sí se consulta
+        posiciones = grafo.posiciones_aristas(ids[:-1], ids[1:])
+        return ResultadoRuta(grafo.tabla_nombres, ids, grafo.pesos[posiciones], valores)
+    posiciones = grafo.posiciones_aristas(ids[:-1], ids[1:])
+    costos = None if es_distancia(metrica) else pesos_metrica[posiciones]
+    return ResultadoRuta(grafo.tabla_nombres, ids, grafo.pesos[posiciones], costos)
+
+
+def resolver_grupo(grafo, vecinos, origen, destinos, con_rutas=True, metrica=None, compactas=False):
+    """
+    Resolver todos los destinos de un origen con un único árbol de caminos mínimos
+
+    Args:
+        grafo: GrafoCSR
+        vecinos: Función de vecinos del grafo en la métrica (ver vecinos_de)
+        origen: ID del nodo de origen
+        destinos: Lista de IDs de los destinos
+        con_rutas: Si es False solo se calculan las distancias
+        metrica: Métrica de los pesos de vecinos; por defecto la distancia
+        compactas: Si es True cada ruta es un ResultadoRuta (IDs y distancia
+            de cada tramo) en lugar de una lista de nombres
+
+    Returns:
+        list: Tuplas (origen, destino, ruta, distancia) con los nombres de
+            los nodos; ruta es None (y distancia 0) si no existe camino, y
+            también None cuando con_rutas es False
+    """
+    # Las rutas compactas toman sus tramos del propio árbol
+    arbol = arbol_caminos_minimos(
+        vecinos, origen, grafo.number_of_nodes(), objetivos=destinos, con_tramos=con_rutas and compactas
+    )
+    distancias, predecesores = arbol[:2]
+    llegadas = arbol[2] if len(arbol) > 2 else None
+    enteros = grafo.pesos_metrica(metrica).dtype.kind in 'iu'
+    nombres = grafo.nombres
+    nombre_origen = nombres[origen]
+
+    resultados = []
+    for destino in destinos:
+        distancia = distancias[destino]
+        if not np.isfinite(distancia):
+            resultados.append((nombre_origen, nombres[destino], None, 0))
+            continue
+        ruta = None
+        if con_rutas:
+            ids = ruta_desde_predecesores(predecesores, origen, destino)
+            ruta = ruta_compacta(grafo, ids, metrica, llegadas) if compactas else nombres[ids].tolist()
+        distancia = int(distancia) if enteros else float(distancia)
+        resultados.append((nombre_origen, nombres[destino], ruta, distancia))
+    return resultados
+
+
+def _agrupar_por_origen(grafo, pares, con_rutas, metrica, compactas):
+    """Agrupar un bloque de pares por origen, en el orden de aparición"""
+    grupos = {}
+    for origen, destino in pares:
+        grupos.setdefault(grafo.id_nodo(origen), []).append(grafo.id_nodo(destino))
+    return [(origen, destinos, con_rutas, metrica, compactas) for origen, destinos in grupos.items()]
+
+
+def _a_csr(grafo, metrica):
+    """
+    GrafoCSR del grafo, con las métricas de la consulta si es de NetworkX
+
+    La copia de un grafo de NetworkX se guarda en el grafo y se reutiliza
+    en las llamadas siguientes mientras no cambie (ver obtener_grafo_csr).
+    """
+    # grafo_peru importa este módulo
+    from .grafo_peru import obtener_grafo_csr
+
+    if isinstance(grafo, GrafoCSR):
+        return grafo
+    return obtener_grafo_csr(grafo, metrica)
+
+
+def encontrar_rutas_lote(grafo, pares, procesos=None, con_rutas=True, tamano_bloque=TAMANO_BLOQUE,
+                         metrica=None, compactas=False):
+    """
+    Calcular las rutas más cortas de muchos pares origen-destino
+
+    Los resultados se entregan agrupados por origen dentro de cada bloque de
+    la entrada, no necesariamente en el orden de los pares.
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        pares: Iterable de tuplas (origen, destino) con nombres de nodos
+        procesos: Número de procesos; None usa todos los núcleos y 1 calcula
+            en el proceso actual
+        con_rutas: Si es False solo se devuelven las distancias (ruta None),
+            lo que reduce el tráfico entre procesos
+        tamano_bloque: Pares que se agrupan y reparten a la vez
+        metrica: Métrica que se minimiza; por defecto la distancia (ver
+            GrafoCSR.pesos_metrica)
+        compactas: Si es True cada ruta es un ResultadoRuta en lugar de una
+            lista de nombres: dos arreglos por ruta en vez de una cadena por
+            nodo, con los nombres y detalles disponibles al pedirlos
+
+    Yields:
+        tuple: (origen, destino, ruta, distancia) como en resolver_grupo
+
+    Raises:
+        KeyError: Si algún nodo no existe en el grafo
+    """
+    csr = _a_csr(grafo, metrica)
+    iterador = iter(pares)
+
+    def bloques():
+        while True:
+            bloque = list(islice(iterador, tamano_bloque))
+            if not bloque:
+                return
+            yield _agrupar_por_origen(csr, bloque, con_rutas, metrica, compactas)
+
+    if procesos == 1:
+        vecinos = vecinos_de(csr, metrica)
+        for tareas in bloques():
+            for tarea in tareas:
+                yield from resolver_grupo(csr, vecinos, *tarea)
+        return
+
+    with GrafoCompartido(csr) as compartido, \
+            multiprocessing.Pool(procesos, initializer=_iniciar_trabajador,
+                                 initargs=(compartido, None, metrica)) as pool:
+        for tareas in bloques():
+            for resultados in pool.imap_unordered(_resolver_grupo, tareas):
+                if compactas:
+                    for _, _, ruta, _ in resultados:
+                        if ruta is not None:
+                            ruta.tabla_nombres = csr.tabla_nombres
+                yield from resultados
+
+
+def fila_distancias(grafo, vecinos, origen, destinos, limite=None):
+    """
+    Distancias de un origen a un conjunto de destinos con una sola búsqueda
+
+    Args:
+        grafo: GrafoCSR
+        vecinos: Función de vecinos del grafo (ver vecinos_de)
+        origen: ID del nodo de origen
+        destinos: Arreglo de IDs de los destinos
+        limite: Distancia máxima opcional (los destinos más lejanos quedan en inf)
+
+    Returns:
+        np.ndarray: Distancias en float64, inf si el destino es inalcanzable
+    """
+    distancias, _ = arbol_caminos_minimos(
+        vecinos, origen, grafo.number_of_nodes(), objetivos=destinos.tolist(), limite=limite
+    )
+    return distancias[destinos]
+
+
+def _fila_matriz(tarea):
+    """Calcular una fila de la matriz con el grafo del proceso (función de las tareas del pool)"""
+    fila, origen, limite = tarea
+    return fila, fila_distancias(_grafo_trabajador, _vecinos_trabajador, origen,
+                                 _destinos_trabajador, limite)
+
+
+def _filas_matriz(csr, origenes, destinos, limite, procesos, metrica):
+    """Generar las filas (índice, distancias) de la matriz en cualquier orden"""
+    tareas = [(fila, origen, limite) for fila, origen in enumerate(origenes)]
+    if procesos == 1:
+        vecinos = vecinos_de(csr, metrica)
+        for fila, origen, _ in tareas:
+            yield fila, fila_distancias(csr, vecinos, origen, destinos, limite)
+        return
+
+    with GrafoCompartido(csr) as compartido, \
+            multiprocessing.Pool(procesos, initializer=_iniciar_trabajador,
+                                 initargs=(compartido, destinos, metrica)) as pool:
+        yield from pool.imap_unordered(_fila_matriz, tareas)
+
+
+def matriz_distancias(grafo, origenes, destinos, procesos=None, salida=None, limite=None,
+                      disperso=False, metrica=None):
+    """
+    Matriz de distancias más cortas entre un conjunto de orígenes y otro de destinos
+
+    Se ejecuta una búsqueda por origen, que se detiene al asentar todos los
+    destinos (o al superar el límite). Con salida, la matriz se escribe
+    directamente en un archivo .npy mapeado en memoria, por lo que puede ser
+    mayor que la RAM disponible.
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        origenes: Lista de nombres de los nodos de origen (filas)
+        destinos: Lista de nombres de los nodos de destino (columnas)
+        procesos: Número de procesos; None usa todos los núcleos y 1 calcula
+            en el proceso actual
+        salida: Ruta opcional de un archivo .npy donde escribir la matriz densa
+        limite: Distancia máxima opcional; las distancias mayores quedan en inf
+        disperso: Si es True (requiere limite y scipy) se devuelve una matriz
+            dispersa con solo las distancias dentro del límite; las ausentes
+            son destinos fuera del límite, y las distancias 0 (origen igual
+            al destino) se guardan explícitamente
+        metrica: Métrica de las distancias (y del límite); por defecto la
+            distancia en km (ver GrafoCSR.pesos_metrica)
+
+    Returns:
+        np.ndarray, np.memmap o scipy.sparse.csr_matrix: Matriz de distancias
+            en float64 con inf para los pares sin camino
+
+    Raises:
+        KeyError: Si algún nodo no existe en el grafo
+        ValueError: Si se pide una matriz dispersa sin límite o con salida
+    """
+    if disperso and (limite is None or salida is not None):
+        raise ValueError("La matriz dispersa requiere un límite de distancia y no admite salida a archivo")
+
+    csr = _a_csr(grafo, metrica)
+    ids_origenes = [csr.id_nodo(nombre) for nombre in origenes]
+    ids_destinos = np.array([csr.id_nodo(nombre) for nombre in destinos], dtype=np.int64)
+    forma = (len(ids_origenes), len(ids_destinos))
+    filas = _filas_matriz(csr, ids_origenes, ids_destinos, limite, procesos, metrica)
+
+    if disperso:
+        from scipy import sparse
+
+        indices_filas, indices_columnas, valores = [], [], []
+        for fila, distancias in filas:
+            columnas = np.flatnonzero(np.isfinite(distancias))
+            indices_filas.append(np.full(len(columnas), fila, dtype=np.int64))
+            indices_columnas.append(columnas)
+            valores.append(distancias[columnas])
+        if not valores:
+            return sparse.csr_matrix(forma, dtype=np.float64)
+        return sparse.csr_matrix(
+            (np.concatenate(valores), (np.concatenate(indices_filas), np.concatenate(indices_columnas))),
+            shape=forma
+        )
+
+    if salida is not None:
+        matriz = np.lib.format.open_memmap(salida, mode='w+', dtype=np.float64, shape=forma)
+    else:
+        matriz = np.empty(forma, dtype=np.float64)
+    for fila, distancias in filas:
+        matriz[fila] = distancias
+    if salida is not None:
+        matriz.flush()
+    return matriz
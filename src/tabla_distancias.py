@@ -0,0 +1,352 @@
+"""
+Tabla precalculada de distancias y predecesores entre todos los pares de nodos
+
+Para grafos pequeños y estáticos (como el de las regiones) una consulta se
+reduce a leer la distancia de la tabla y recorrer la fila de predecesores
+del origen, en O(longitud de la ruta).
+
+La tabla se guarda como una carpeta de archivos .npy que se abren mapeados
+en memoria: todos los procesos que cargan la misma tabla comparten una sola
+copia física de las matrices (la caché de páginas del sistema operativo).
+"""
+import heapq
+import math
+import time
+
+import numpy as np
+
+from .almacenamiento import abrir_arreglos, guardar_arreglos, huella_grafo, ruta_datos, ruta_precalculo
+from .busqueda import arbol_caminos_minimos, ruta_desde_predecesores, vecinos_de
+from .grafo_csr import GrafoCSR
+from .nombres import TablaNombres
+
+ARCHIVO_TABLA = 'tabla_distancias'
+VERSION_FORMATO = 2
+# Por encima de este tamaño la tabla n x n ocupa demasiada memoria
+MAX_NODOS_TABLA = 10_000
+
+
+class TablaDistancias:
+    """
+    Distancias y predecesores de todos los pares de nodos
+
+    distancias[s, t] es la distancia más corta de s a t (inf si no hay
+    camino) y predecesores[s, t] el nodo anterior a t en esa ruta (-1 para
+    el propio origen y los nodos inalcanzables). La fila s es, por tanto, el
+    árbol de caminos mínimos con raíz en s.
+    """
+
+    def __init__(self, nombres, distancias, predecesores, pesos_enteros=False, huella=None):
+        self.tabla_nombres = TablaNombres.crear(nombres)
+        self.distancias = distancias
+        self.predecesores = predecesores
+        self.pesos_enteros = pesos_enteros
+        self.huella = huella
+
+    @property
+    def nombres(self):
+        """Arreglo con el nombre de cada ID de nodo"""
+        return self.tabla_nombres.nombres
+
+    @property
+    def indices(self):
+        """Diccionario nombre -> ID (compartido con el grafo si se construyó a partir de él)"""
+        return self.tabla_nombres.indices
+
+    def number_of_nodes(self):
+        """Número de nodos de la tabla"""
+        return len(self.nombres)
+
+    def nbytes(self):
+        """Memoria ocupada por las matrices (en bytes)"""
+        return self.distancias.nbytes + self.predecesores.nbytes
+
+    def id_nodo(self, nombre):
+        """
+        Obtener el identificador entero de un nodo
+
+        Raises:
+            KeyError: Si el nodo no existe en la tabla
+        """
+        return self.tabla_nombres.id_nodo(nombre)
+
+    def _valor(self, distancia):
+        """Convertir una distancia de la tabla al tipo de los pesos originales"""
+        return int(distancia) if self.pesos_enteros else float(distancia)
+
+    def distancia(self, origen, destino):
+        """
+        Distancia más corta entre dos nodos (por ID)
+
+        Returns:
+            int, float o None: Distancia, o None si no existe camino
+        """
+        distancia = self.distancias[origen, destino]
+        return self._valor(distancia) if np.isfinite(distancia) else None
+
+    def consultar(self, origen, destino, estadisticas=None):
+        """
+        Ruta más corta entre dos nodos (por ID) recorriendo los predecesores
+
+        Args:
+            origen: ID del nodo de origen
+            destino: ID del nodo de destino
+            estadisticas: Diccionario opcional donde se guarda 'nodos_asentados'
+                (siempre 0: la consulta no explora el grafo)
+
+        Returns:
+            tuple: (ruta, distancia, segmentos) con la ruta como lista de
+                IDs, o (None, 0, []) si no existe camino
+        """
+        if estadisticas is not None:
+            estadisticas['nodos_asentados'] = 0
+        fila_distancias = self.distancias[origen]
+        if not np.isfinite(fila_distancias[destino]):
+            return None, 0, []
+
+        ruta = ruta_desde_predecesores(self.predecesores[origen], origen, destino)
+
+        acumuladas = fila_distancias[ruta]
+        segmentos = [self._valor(tramo) for tramo in np.diff(acumuladas)]
+        return ruta, self._valor(acumuladas[-1]), segmentos
+
+
+    def reparar_arista(self, vecinos, a, b, peso_anterior, peso_nuevo):
+        """
+        Actualizar la tabla tras cambiar el peso de la arista a - b
+
+        Solo se recalculan las filas (orígenes) afectadas:
+            - Si la arista se alarga o se cierra, los orígenes cuyo árbol de
+              caminos mínimos la usa; en cada uno solo cambia el subárbol que
+              cuelga de la arista, que se vuelve a calcular a partir de sus
+              vecinos fuera del subárbol.
+            - Si se acorta o se abre, los orígenes para los que la arista
+              ofrece un camino más corto, propagando la mejora desde sus
+              extremos sin recorrer el resto del grafo.
+
+        Args:
+            vecinos: Función de vecinos del grafo ya modificado (ver vecinos_de)
+            a: ID de un extremo de la arista
+            b: ID del otro extremo
+            peso_anterior: Peso antes del cambio (None si la arista no existía)
+            peso_nuevo: Peso después del cambio (None si la arista se cerró)
+
+        Returns:
+            np.ndarray: IDs de los orígenes cuyas filas se recalcularon
+        """
+        anterior = math.inf if peso_anterior is None else peso_anterior
+        nuevo = math.inf if peso_nuevo is None else peso_nuevo
+        distancias = self.distancias
+        predecesores = self.predecesores
+
+        if nuevo > anterior:
+            cuelga_de_b = predecesores[:, b] == a
+            afectados = np.flatnonzero(cuelga_de_b | (predecesores[:, a] == b))
+            for origen in afectados.tolist():
+                self._reparar_subarbol(vecinos, origen, b if cuelga_de_b[origen] else a)
+        elif nuevo < anterior:
+            afectados = np.flatnonzero((distancias[:, a] + nuevo < distancias[:, b]) |
+                                       (distancias[:, b] + nuevo < distancias[:, a]))
+            for origen in afectados.tolist():
+                self._propagar_mejora(vecinos, origen, a, b, nuevo)
+        else:
+            afectados = np.empty(0, dtype=np.int64)
+        return afectados
+
+    def _reparar_subarbol(self, vecinos, origen, raiz):
+        """Recalcular las distancias del subárbol de raiz en el árbol de origen"""
+        fila_distancias = self.distancias[origen]
+        fila_predecesores = self.predecesores[origen]
+
+        # Hijos de cada nodo del árbol, agrupando los nodos por predecesor
+        orden = np.argsort(fila_predecesores, kind='stable')
+        inicios = np.searchsorted(fila_predecesores[orden], np.arange(len(fila_predecesores) + 1))
+        subarbol = [raiz]
+        for nodo in subarbol:
+            subarbol.extend(orden[inicios[nodo]:inicios[nodo + 1]].tolist())
+
+        dentro = set(subarbol)
+        fila_distancias[subarbol] = math.inf
+        fila_predecesores[subarbol] = -1
+
+        # Las distancias fuera del subárbol no cambian: sirven de punto de partida
+        cola = []
+        for v in subarbol:
+            for u, peso in vecinos(v):
+                if u not in dentro and fila_distancias[u] + peso < fila_distancias[v]:
+                    fila_distancias[v] = fila_distancias[u] + peso
+                    fila_predecesores[v] = u
+            if fila_distancias[v] < math.inf:
+                cola.append((fila_distancias[v], v))
+        heapq.heapify(cola)
+
+        while cola:
+            distancia, u = heapq.heappop(cola)
+            if distancia > fila_distancias[u]:
+                continue
+            for v, peso in vecinos(u):
+                nueva = distancia + peso
+                if v in dentro and nueva < fila_distancias[v]:
+                    fila_distancias[v] = nueva
+                    fila_predecesores[v] = u
+                    heapq.heappush(cola, (nueva, v))
+
+    def _propagar_mejora(self, vecinos, origen, a, b, peso):
+        """Propagar desde los extremos de una arista acortada las distancias que mejoran"""
+        fila_distancias = self.distancias[origen]
+        fila_predecesores = self.predecesores[origen]
+        cola = []
+        for u, v in ((a, b), (b, a)):
+            nueva = fila_distancias[u] + peso
+            if nueva < fila_distancias[v]:
+                fila_distancias[v] = nueva
+                fila_predecesores[v] = u
+                heapq.heappush(cola, (nueva, v))
+
+        while cola:
+            distancia, u = heapq.heappop(cola)
+            if distancia > fila_distancias[u]:
+                continue
+            for v, peso_arista in vecinos(u):
+                nueva = distancia + peso_arista
+                if nueva < fila_distancias[v]:
+                    fila_distancias[v] = nueva
+                    fila_predecesores[v] = u
+                    heapq.heappush(cola, (nueva, v))
+
+
+def construir_tabla(grafo):
+    """
+    Calcular la tabla con un Dijkstra completo desde cada nodo
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+
+    Returns:
+        TablaDistancias: Tabla del grafo
+
+    Raises:
+        ValueError: Si el grafo tiene más de MAX_NODOS_TABLA nodos
+    """
+    csr = grafo if isinstance(grafo, GrafoCSR) else GrafoCSR.desde_networkx(grafo)
+    num_nodos = csr.number_of_nodes()
+    if num_nodos > MAX_NODOS_TABLA:
+        raise ValueError(f"El grafo tiene {num_nodos} nodos; la tabla de distancias "
+                         f"solo admite hasta {MAX_NODOS_TABLA}")
+
+    vecinos = vecinos_de(csr)
+    distancias = np.empty((num_nodos, num_nodos), dtype=np.float64)
+    predecesores = np.empty((num_nodos, num_nodos), dtype=csr.destinos.dtype)
+    for origen in range(num_nodos):
+        distancias[origen], predecesores[origen] = arbol_caminos_minimos(vecinos, origen, num_nodos)
+
+    return TablaDistancias(
+        nombres=csr.tabla_nombres,
+        distancias=distancias,
+        predecesores=predecesores,
+        pesos_enteros=csr.pesos_aristas.dtype.kind in 'iu',
+        huella=huella_grafo(csr),
+    )
+
+
+def guardar_tabla(tabla, ruta):
+    """
+    Guardar la tabla en una carpeta de archivos .npy
+
+    Args:
+        tabla: TablaDistancias a guardar
+        ruta: Ruta de la carpeta (se reemplaza si existe)
+    """
+    arreglos = {
+        'nombres': np.array(tabla.nombres.tolist(), dtype=str),
+        'distancias': tabla.distancias,
+        'predecesores': tabla.predecesores,
+    }
+    metadatos = {
+        'version': VERSION_FORMATO,
+        'huella': tabla.huella,
+        'pesos_enteros': bool(tabla.pesos_enteros),
+    }
+    guardar_arreglos(ruta, arreglos, metadatos)
+
+
+def cargar_tabla(ruta, huella=None):
+    """
+    Cargar una tabla guardada con guardar_tabla
+
+    Las matrices quedan mapeadas en memoria con copia en escritura: solo se
+    leen del disco las filas consultadas, y las reparaciones por cierres de
+    tramos modifican la copia del proceso, nunca el archivo.
+
+    Args:
+        ruta: Ruta de la carpeta
+        huella: Si se indica, huella que deben tener los datos de origen
+
+    Returns:
+        TablaDistancias o None: La tabla, o None si la carpeta no existe,
+            es de otra versión o corresponde a otros datos
+    """
+    abierta = abrir_arreglos(ruta)
+    if abierta is None:
+        return None
+    metadatos, datos = abierta
+    if metadatos['version'] != VERSION_FORMATO:
+        return None
+    if huella is not None and metadatos['huella'] != huella:
+        return None
+    return TablaDistancias(
+        nombres=datos['nombres'].astype(object),
+        distancias=datos['distancias'],
+        predecesores=datos['predecesores'],
+        pesos_enteros=metadatos['pesos_enteros'],
+        huella=metadatos['huella'],
+    )
+
+
+def cargar_o_construir_tabla(grafo, ruta=None):
+    """
+    Obtener la tabla de un grafo, reutilizando la guardada si es válida
+
+    Si el grafo se cargó con cargar_datos, la tabla se guarda junto a los
+    archivos de datos y se reconstruye automáticamente cuando cambian los CSV.
+
+    Args:
+        grafo: Grafo de NetworkX o GrafoCSR
+        ruta: Ruta de la carpeta; por defecto tabla_distancias junto a los
+            CSV cuando el grafo tiene archivos fuente
+
+    Returns:
+        TablaDistancias: Tabla del grafo
+    """
+    huella = huella_grafo(grafo)
+    if ruta is None and huella is not None:
+        ruta = ruta_precalculo(grafo, ARCHIVO_TABLA)
+
+    if ruta is not None and huella is not None:
+        tabla = cargar_tabla(ruta, huella)
+        if tabla is not None:
+            # Con los mismos nombres que el grafo, un solo diccionario para ambos
+            tabla.tabla_nombres = tabla.tabla_nombres.compartir(getattr(grafo, 'tabla_nombres', None))
+            return tabla
+
+    tabla = construir_tabla(grafo)
+    if ruta is not None and huella is not None:
+        guardar_tabla(tabla, ruta)
+    return tabla
+
+
+def main():
+    from .grafo_peru import cargar_datos
+
+    _, _, grafo = cargar_datos(motor='csr')
+    inicio = time.perf_counter()
+    tabla = construir_tabla(grafo)
+    segundos = time.perf_counter() - inicio
+    ruta = ruta_datos(ARCHIVO_TABLA)
+    guardar_tabla(tabla, ruta)
+    print(f"Tabla construida en {segundos:.3f}s: {tabla.number_of_nodes()} nodos, "
+          f"{tabla.nbytes() / 1024:.1f} KB")
+    print(f"Guardada en {ruta}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Tablas de regiones y distancias en CSV, Parquet o Arrow IPC
+
+Los formatos columnares guardan cada columna con su tipo (nombres como
+texto, distancias como enteros y coordenadas como reales), se leen sin
+analizar texto y permiten leer solo las columnas necesarias, lo que acelera
+la carga de listas de aristas de millones de filas. Requieren pyarrow, que
+solo se importa al usarlos.
+
+Conversión de los CSV de una carpeta (los archivos se escriben junto a ellos):
+    python -m src.tablas [parquet|arrow] [directorio]
+"""
+import os
+import sys
+
+import pandas as pd
+
+from .almacenamiento import FORMATOS_TABLAS, rutas_tablas
+
+COLUMNAS_REGIONES = ['region', 'latitude', 'longitude']
+
+
+def formato_tabla(ruta):
+    """
+    Formato de una tabla según la extensión del archivo
+
+    Returns:
+        str: 'parquet', 'arrow' o 'csv'
+
+    Raises:
+        ValueError: Si la extensión no corresponde a ningún formato
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    for formato, extension_formato in FORMATOS_TABLAS.items():
+        if extension == extension_formato:
+            return formato
+    raise ValueError(f"Formato de tabla desconocido: {os.path.basename(ruta)}")
+
+
+def columnas_tabla(ruta):
+    """Nombres de las columnas de una tabla, sin leer sus filas"""
+    formato = formato_tabla(ruta)
+    if formato == 'csv':
+        return list(pd.read_csv(ruta, nrows=0).columns)
+    if formato == 'parquet':
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(ruta).names
+
+    import pyarrow as pa
+
+    with pa.memory_map(ruta) as fuente:
+        return pa.ipc.open_file(fuente).schema.names
+
+
+def leer_tabla(ruta, columnas=None):
+    """
+    Leer una tabla completa
+
+    Args:
+        ruta: Ruta del archivo (.csv, .parquet o .arrow)
+        columnas: Columnas que se leen; por defecto todas
+
+    Returns:
+        pd.DataFrame: Contenido de la tabla
+    """
+    formato = formato_tabla(ruta)
+    if formato == 'csv':
+        return pd.read_csv(ruta, usecols=columnas)
+    if formato == 'parquet':
+        return pd.read_parquet(ruta, columns=columnas)
+    # Arrow IPC en formato de archivo (el de Feather v2)
+    return pd.read_feather(ruta, columns=columnas)
+
+
+def leer_tabla_por_bloques(ruta, columnas=None, tamano_bloque=100_000):
+    """
+    Leer una tabla en bloques de filas, sin cargarla entera en memoria
+
+    Args:
+        ruta: Ruta del archivo (.csv, .parquet o .arrow)
+        columnas: Columnas que se leen; por defecto todas
+        tamano_bloque: Filas por bloque
+
+    Yields:
+        tuple: (bloque, bytes_leidos) con el DataFrame del bloque y la
+            posición aproximada en el archivo tras leerlo
+    """
+    formato = formato_tabla(ruta)
+    total = os.path.getsize(ruta)
+
+    if formato == 'csv':
+        with open(ruta, 'rb') as archivo:
+            for bloque in pd.read_csv(archivo, usecols=columnas, chunksize=tamano_bloque):
+                # El lector usa su propio búfer: la posición es aproximada
+                yield bloque, min(archivo.tell(), total)
+        return
+
+    if formato == 'parquet':
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(ruta)
+        total_filas = max(archivo.metadata.num_rows, 1)
+        filas = 0
+        for lote in archivo.iter_batches(batch_size=tamano_bloque, columns=columnas):
+            filas += lote.num_rows
+            yield lote.to_pandas(), total * filas // total_filas
+        return
+
+    import pyarrow as pa
+
+    # El archivo se mapea en memoria: cada bloque solo convierte sus filas
+    with pa.memory_map(ruta) as fuente:
+        tabla = pa.ipc.open_file(fuente).read_all()
+        if columnas is not None:
+            tabla = tabla.select(columnas)
+        total_filas = max(tabla.num_rows, 1)
+        for inicio in range(0, tabla.num_rows, tamano_bloque):
+            lote = tabla.slice(inicio, tamano_bloque)
+            yield lote.to_pandas(), total * (inicio + lote.num_rows) // total_filas
+
+
+def escribir_tabla(df, ruta):
+    """
+    Escribir un DataFrame en el formato que indica la extensión de la ruta
+
+    Args:
+        df: DataFrame a escribir (el índice no se guarda)
+        ruta: Ruta del archivo (.csv, .parquet o .arrow)
+    """
+    formato = formato_tabla(ruta)
+    if formato == 'csv':
+        df.to_csv(ruta, index=False)
+    elif formato == 'parquet':
+        df.to_parquet(ruta, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(ruta)
+
+
+def convertir_tablas(directorio=None, formato='parquet', destino=None):
+    """
+    Convertir los CSV de regiones y distancias a un formato columnar
+
+    Las distancias se validan igual que al cargarlas (ver leer_distancias),
+    de modo que los archivos convertidos solo contienen filas válidas, con
+    distancia_km numérica y las coordenadas como reales. cargar_datos
+    prefiere los archivos columnares cuando existen, salvo que algún CSV sea
+    más reciente que su copia (ver rutas_tablas): tras modificar los CSV hay
+    que volver a convertirlos para recuperar la carga rápida.
+
+    Args:
+        directorio: Carpeta con los CSV; por defecto la carpeta data del proyecto
+        formato: 'parquet' (por defecto) o 'arrow'
+        destino: Carpeta de salida; por defecto la de los CSV
+
+    Returns:
+        tuple: (ruta_regiones, ruta_distancias) de los archivos escritos
+
+    Raises:
+        ValueError: Si el formato no es columnar
+    """
+    # carga_bloques lee las tablas con este módulo
+    from .carga_bloques import leer_distancias
+
+    if formato not in ('parquet', 'arrow'):
+        raise ValueError(f"Formato columnar desconocido: {formato}. Opciones: parquet, arrow")
+
+    regiones_path, distancias_path, _ = rutas_tablas(directorio, formato='csv')
+    if destino is None:
+        destino = os.path.dirname(regiones_path)
+    extension = FORMATOS_TABLAS[formato]
+    salidas = []
+    for ruta in (regiones_path, distancias_path):
+        nombre = os.path.splitext(os.path.basename(ruta))[0]
+        salidas.append(os.path.join(destino, nombre + extension))
+
+    df_regiones = leer_tabla(regiones_path, COLUMNAS_REGIONES)
+    df_regiones = df_regiones.astype({'latitude': 'float64', 'longitude': 'float64'})
+    escribir_tabla(df_regiones, salidas[0])
+    escribir_tabla(leer_distancias(distancias_path), salidas[1])
+    return tuple(salidas)
+
+
+def main(formato='parquet', directorio=None):
+    for ruta in convertir_tablas(directorio, formato):
+        print(f"Escrito {ruta} ({os.path.getsize(ruta) / 1024:.1f} KB)")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(argumentos[0] if argumentos else 'parquet',
+         argumentos[1] if len(argumentos) > 1 else None)
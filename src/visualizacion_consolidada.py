@@ -9,6 +9,55 @@ from PIL import Image
 from PyQt5.QtGui import QPixmap, QImage
 import base64
 
+from .resultado_ruta import ResultadoRuta
+
+def coordenadas_regiones(df_regiones, regiones):
+    """
+    Obtener las coordenadas de una lista de regiones
+    
+    Todas las regiones se buscan en una sola pasada por el índice de nombres,
+    en lugar de filtrar el DataFrame completo para cada una.
+    
+    Args:
+        df_regiones: DataFrame con información de las regiones
+        regiones: Lista de nombres de regiones (por ejemplo, una ruta)
+    
+    Returns:
+        list: Pares [latitud, longitud] en el orden de regiones
+    
+    Raises:
+        KeyError: Si alguna región no está en df_regiones
+    """
+    posiciones = pd.Index(df_regiones['region']).get_indexer(regiones)
+    if (posiciones < 0).any():
+        faltantes = [region for region, posicion in zip(regiones, posiciones.tolist()) if posicion < 0]
+        raise KeyError(f"Regiones sin coordenadas: {', '.join(map(str, faltantes))}")
+    latitudes = df_regiones['latitude'].to_numpy()[posiciones].tolist()
+    longitudes = df_regiones['longitude'].to_numpy()[posiciones].tolist()
+    return [list(punto) for punto in zip(latitudes, longitudes)]
+
+def tramos_ruta(ruta, distancias=None):
+    """
+    Nombres de una ruta y distancia de cada tramo para dibujarla
+    
+    Con un ResultadoRuta los tramos y las distancias acumuladas salen de sus
+    arreglos, sin buscar cada par de regiones en un diccionario.
+    
+    Args:
+        ruta: Lista de regiones o ResultadoRuta
+        distancias: Diccionario {(origen, destino): distancia} de los tramos,
+            solo si ruta es una lista
+    
+    Returns:
+        tuple: (nombres, tramos, acumuladas) donde tramos tiene la distancia
+            de cada tramo (None si no se conoce) y acumuladas la distancia
+            desde el origen hasta cada región, o None si ruta es una lista
+    """
+    if isinstance(ruta, ResultadoRuta):
+        return ruta.ruta, ruta.tramos.tolist(), ruta.acumuladas.tolist()
+    distancias = distancias or {}
+    return list(ruta), [distancias.get(tramo) for tramo in zip(ruta, ruta[1:])], None
+
 def generar_mapa_base(df_regiones, usar_matplotlib=False):
     """
     Generar un mapa base con todas las regiones de Perú
@@ -114,8 +163,10 @@ def generar_mapa_con_ruta(df_regiones, ruta, distancias=None, usar_matplotlib=Fa
     
     Args:
         df_regiones: DataFrame con información de las regiones
-        ruta: Lista de regiones en la ruta
+        ruta: Lista de regiones en la ruta o ResultadoRuta (de obtener_detalles_ruta),
+            que ya trae la distancia de cada tramo
         distancias: Diccionario con las distancias entre cada par de regiones en la ruta
+            (solo si ruta es una lista)
         usar_matplotlib: Si es True, genera un mapa estático con Matplotlib en lugar de Folium
         
     Returns:
@@ -130,6 +181,9 @@ def generar_mapa_con_ruta_folium(df_regiones, ruta, distancias=None):
     """
     Generar un mapa con la ruta resaltada usando Folium
     """
+    ruta, tramos, acumuladas = tramos_ruta(ruta, distancias)
+    en_ruta = set(ruta)
+    
     # Coordenadas centrales de Perú
     peru_center = [-9.1900, -75.0152]
     
@@ -155,7 +209,7 @@ def generar_mapa_con_ruta_folium(df_regiones, ruta, distancias=None):
             color = 'red'
             icon_type = 'flag-checkered'
             z_index = 1000
-        elif region['region'] in ruta:
+        elif region['region'] in en_ruta:
             color = 'blue'
             icon_type = 'map-marker'
             z_index = 900
@@ -182,26 +236,19 @@ def generar_mapa_con_ruta_folium(df_regiones, ruta, distancias=None):
         ).add_to(mapa)
     
     # Añadir líneas para la ruta con estilo mejorado y popups para distancias
-    puntos_ruta = []
-    for i in range(len(ruta)):
-        region = df_regiones[df_regiones['region'] == ruta[i]]
-        puntos_ruta.append([region['latitude'].values[0], region['longitude'].values[0]])
+    puntos_ruta = coordenadas_regiones(df_regiones, ruta)
     
     # Añadir líneas para cada segmento de la ruta con colores graduales
     colores = ['#FF6B6B', '#FF8E8E', '#FFB1B1', '#FFD4D4', '#FFF7F7']
     num_segmentos = len(ruta) - 1
     
     for i in range(len(ruta) - 1):
-        origen_region = df_regiones[df_regiones['region'] == ruta[i]]
-        destino_region = df_regiones[df_regiones['region'] == ruta[i + 1]]
-        
-        origen_coords = [origen_region['latitude'].values[0], origen_region['longitude'].values[0]]
-        destino_coords = [destino_region['latitude'].values[0], destino_region['longitude'].values[0]]
+        origen_coords = puntos_ruta[i]
+        destino_coords = puntos_ruta[i + 1]
         
         # Determinar la distancia para este segmento
-        distancia_segmento = "N/A"
-        if distancias and (ruta[i], ruta[i + 1]) in distancias:
-            distancia_segmento = distancias[(ruta[i], ruta[i + 1])]
+        distancia_segmento = "N/A" if tramos[i] is None else tramos[i]
+        acumulado = f" (acumulado: {acumuladas[i + 1]} km)" if acumuladas is not None else ""
         
         # Calcular el color basado en la posición en la ruta (inicio a fin)
         color_idx = min(i, len(colores) - 1)
@@ -213,7 +260,7 @@ def generar_mapa_con_ruta_folium(df_regiones, ruta, distancias=None):
             color=color,
             weight=5,
             opacity=0.8,
-            tooltip=f"{ruta[i]} → {ruta[i + 1]}: {distancia_segmento} km"
+            tooltip=f"{ruta[i]} → {ruta[i + 1]}: {distancia_segmento} km{acumulado}"
         )
         line.add_to(mapa)
         
@@ -241,6 +288,9 @@ def generar_mapa_con_ruta_matplotlib(df_regiones, ruta, distancias=None):
     """
     Generar un mapa con la ruta resaltada usando Matplotlib
     """
+    ruta, _, _ = tramos_ruta(ruta, distancias)
+    en_ruta = set(ruta)
+    
     plt.figure(figsize=(10, 8))
     
     # Límites del mapa de Perú (ampliados un poco)
@@ -252,7 +302,7 @@ def generar_mapa_con_ruta_matplotlib(df_regiones, ruta, distancias=None):
     
     # Dibujar puntos para cada región
     for idx, region in df_regiones.iterrows():
-        if region['region'] in ruta:
+        if region['region'] in en_ruta:
             if region['region'] == ruta[0]:
                 # Origen: verde
                 plt.plot(region['longitude'], region['latitude'], 'go', markersize=10)
@@ -270,12 +320,7 @@ def generar_mapa_con_ruta_matplotlib(df_regiones, ruta, distancias=None):
                 fontsize=8, ha='left', va='center')
     
     # Dibujar la ruta
-    ruta_lons = []
-    ruta_lats = []
-    for region_nombre in ruta:
-        region = df_regiones[df_regiones['region'] == region_nombre]
-        ruta_lons.append(region['longitude'].values[0])
-        ruta_lats.append(region['latitude'].values[0])
+    ruta_lats, ruta_lons = zip(*coordenadas_regiones(df_regiones, ruta))
     
     plt.plot(ruta_lons, ruta_lats, 'r-', linewidth=2.5)
     
@@ -300,6 +345,174 @@ def generar_mapa_con_ruta_matplotlib(df_regiones, ruta, distancias=None):
     image = Image.open(buf)
     return image
 
+# Colores de las bandas de distancia, de la más cercana a la más lejana
+COLORES_BANDAS = ['#1a9850', '#91cf60', '#d9ef8b', '#fee08b', '#fc8d59', '#d73027']
+
+def colores_bandas(num_bandas):
+    """
+    Un color distinto por banda, interpolado a lo largo de COLORES_BANDAS
+    
+    La primera banda es siempre verde y la última roja, con cualquier número
+    de bandas (no se repiten colores aunque haya más bandas que COLORES_BANDAS).
+    
+    Returns:
+        list: Colores '#rrggbb', de la banda más cercana a la más lejana
+    """
+    anclas = np.array([[int(color[i:i + 2], 16) for i in (1, 3, 5)] for color in COLORES_BANDAS], dtype=np.float64)
+    posiciones = np.linspace(0, len(anclas) - 1, num_bandas) if num_bandas > 1 else np.zeros(num_bandas)
+    rgb = np.column_stack([np.interp(posiciones, np.arange(len(anclas)), anclas[:, canal]) for canal in range(3)])
+    return ['#%02x%02x%02x' % tuple(fila) for fila in np.rint(rgb).astype(int).tolist()]
+
+def bandas_distancia(distancias, bandas=None, num_bandas=4):
+    """
+    Asignar cada distancia a una banda
+    
+    Args:
+        distancias: Arreglo de distancias (por ejemplo, de encontrar_alcanzables)
+        bandas: Límites superiores de las bandas en orden creciente; por
+            defecto num_bandas bandas iguales hasta la mayor distancia
+        num_bandas: Número de bandas cuando no se indican los límites
+    
+    Returns:
+        tuple: (indices, limites) con la banda de cada distancia y el
+            límite superior de cada banda; si alguna distancia supera el
+            último límite, la última banda queda abierta (límite inf)
+    """
+    distancias = np.asarray(distancias, dtype=np.float64)
+    if bandas is None:
+        maximo = distancias.max() if len(distancias) else 0
+        bandas = np.linspace(0, maximo, num_bandas + 1)[1:] if maximo > 0 else [0]
+    limites = np.asarray(bandas, dtype=np.float64)
+    # Una distancia igual al límite pertenece a su banda; las que superan el
+    # último límite quedan en la última
+    indices = np.minimum(np.searchsorted(limites, distancias, side='left'), len(limites) - 1)
+    if len(distancias) and distancias.max() > limites[-1]:
+        limites[-1] = np.inf
+    return indices, limites.tolist()
+
+def generar_mapa_alcance(df_regiones, regiones, distancias, origenes=(), bandas=None,
+                         usar_matplotlib=False):
+    """
+    Generar un mapa con las regiones alcanzables coloreadas por banda de distancia
+    
+    Args:
+        df_regiones: DataFrame con información de las regiones
+        regiones: Regiones alcanzables (por ejemplo, de encontrar_alcanzables)
+        distancias: Distancia de cada región a su origen más cercano
+        origenes: Regiones de origen, que se marcan aparte
+        bandas: Límites superiores de las bandas (ver bandas_distancia)
+        usar_matplotlib: Si es True, genera un mapa estático con Matplotlib en lugar de Folium
+    
+    Returns:
+        mapa o imagen según el método utilizado
+    """
+    if isinstance(origenes, str):
+        origenes = [origenes]
+    if usar_matplotlib:
+        return generar_mapa_alcance_matplotlib(df_regiones, regiones, distancias, origenes, bandas)
+    else:
+        return generar_mapa_alcance_folium(df_regiones, regiones, distancias, origenes, bandas)
+
+def _puntos_alcance(df_regiones, regiones, distancias, bandas):
+    """
+    Bandas y coordenadas de las regiones alcanzables
+    
+    Las regiones del grafo sin fila en df_regiones (ciudades intermedias de
+    la tabla de distancias) no se pueden dibujar y se omiten, pero cuentan
+    para calcular las bandas.
+    """
+    regiones = np.asarray(regiones, dtype=object)
+    distancias = np.asarray(distancias)
+    indices, limites = bandas_distancia(distancias, bandas, len(COLORES_BANDAS))
+    dibujables = pd.Index(df_regiones['region']).get_indexer(regiones) >= 0
+    regiones = regiones[dibujables].tolist()
+    puntos = coordenadas_regiones(df_regiones, regiones)
+    return regiones, puntos, distancias[dibujables].tolist(), indices[dibujables], limites
+
+def _etiquetas_bandas(limites):
+    """Texto de cada banda, por ejemplo '100 - 200 km' o '> 200 km' si es abierta"""
+    inicios = [0] + limites[:-1]
+    return [f"{inicio:g} - {fin:g} km" if np.isfinite(fin) else f"> {inicio:g} km"
+            for inicio, fin in zip(inicios, limites)]
+
+def generar_mapa_alcance_folium(df_regiones, regiones, distancias, origenes=(), bandas=None):
+    """
+    Generar un mapa de alcance usando Folium, con una capa por banda
+    """
+    regiones, puntos, distancias, indices, limites = _puntos_alcance(df_regiones, regiones, distancias, bandas)
+    etiquetas = _etiquetas_bandas(limites)
+    colores = colores_bandas(len(limites))
+    
+    mapa = folium.Map(
+        location=[-9.1900, -75.0152],
+        zoom_start=6,
+        tiles="CartoDB positron",
+        attr="&copy; <a href='http://www.openstreetmap.org/copyright'>OpenStreetMap</a> &copy; <a href='http://cartodb.com/attributions'>CartoDB</a>"
+    )
+    mapa.add_child(MeasureControl())
+    
+    # Regiones fuera del alcance en gris
+    alcanzadas = set(regiones)
+    for region, lat, lon in zip(df_regiones['region'], df_regiones['latitude'], df_regiones['longitude']):
+        if region not in alcanzadas:
+            folium.CircleMarker(location=[lat, lon], radius=3, color='gray', fill=True,
+                                tooltip=f"{region}: fuera de alcance").add_to(mapa)
+    
+    # Una capa por banda: el control de capas hace de leyenda
+    capas = [folium.FeatureGroup(name=etiqueta) for etiqueta in etiquetas]
+    for region, punto, distancia, banda in zip(regiones, puntos, distancias, indices.tolist()):
+        color = colores[banda]
+        folium.CircleMarker(location=punto, radius=6, color=color, fill=True, fill_color=color,
+                            fill_opacity=0.8, tooltip=f"{region}: {distancia:g} km").add_to(capas[banda])
+    for capa in capas:
+        capa.add_to(mapa)
+    
+    for origen, punto in zip(origenes, coordenadas_regiones(df_regiones, list(origenes))):
+        folium.Marker(location=punto, tooltip=f"Origen: {origen}",
+                      icon=folium.Icon(color='green', icon='home')).add_to(mapa)
+    
+    folium.LayerControl(collapsed=False).add_to(mapa)
+    return mapa
+
+def generar_mapa_alcance_matplotlib(df_regiones, regiones, distancias, origenes=(), bandas=None):
+    """
+    Generar un mapa de alcance usando Matplotlib
+    """
+    regiones, puntos, _, indices, limites = _puntos_alcance(df_regiones, regiones, distancias, bandas)
+    etiquetas = _etiquetas_bandas(limites)
+    colores = colores_bandas(len(limites))
+    
+    plt.figure(figsize=(10, 8))
+    min_lat, max_lat = -18.5, -0.0  # Sur a Norte
+    min_lon, max_lon = -82.0, -68.0  # Oeste a Este
+    plt.fill_between([min_lon, max_lon], [min_lat, min_lat], [max_lat, max_lat], color='#ADD8E6')
+    
+    # Todas las regiones en gris y encima las alcanzables por banda
+    plt.scatter(df_regiones['longitude'], df_regiones['latitude'], color='gray', s=20)
+    if regiones:
+        lats, lons = np.array(puntos).T
+        for banda, etiqueta in enumerate(etiquetas):
+            en_banda = indices == banda
+            if en_banda.any():
+                plt.scatter(lons[en_banda], lats[en_banda], s=60, label=etiqueta,
+                            color=colores[banda])
+    if len(origenes):
+        lats, lons = np.array(coordenadas_regiones(df_regiones, list(origenes))).T
+        plt.scatter(lons, lats, marker='*', s=250, color='black', label='Origen')
+    
+    plt.title('Regiones alcanzables por distancia', fontsize=14)
+    plt.xlabel('Longitud')
+    plt.ylabel('Latitud')
+    plt.xlim(min_lon, max_lon)
+    plt.ylim(min_lat, max_lat)
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend(loc='lower left')
+    
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png', dpi=100, bbox_inches='tight')
+    buf.seek(0)
+    return Image.open(buf)
+
 def guardar_mapa(mapa, ruta_archivo):
     """
     Guardar el mapa en un archivo HTML